@@ -7,22 +7,595 @@ Autor: XeBoLaX
 Versión: 1.0.0
 """
 
+import os
+import time
+import api
 import globalPluginHandler
+import globalVars
 import ui
 import scriptHandler
 import wx
+import tones
+import winUser
+import gui
+import config
+from gui import guiHelper, settingsDialogs
 import addonHandler
+from logHandler import log
 
 # Inicializar traducciones
 addonHandler.initTranslation()
 
-# Importar la librería de escritorios virtuales
+# Las excepciones se importan ya; la capa COM se carga bajo demanda (ver _cargarLibreria)
 try:
-	from .escritorios_virtuales import EscritorioVirtual, VistaAplicacion, GestorEscritorios, ExcepcionEVD
+	from .escritorios_virtuales import EscritorioCambiado, EscritorioNoEncontrado, OperacionNoSoportada
+	from .escritorios_virtuales.reglas import ANCLAR, Regla, cargar_reglas, guardar_reglas, validar_regla
 	LIBRERIA_DISPONIBLE = True
 except ImportError:
 	LIBRERIA_DISPONIBLE = False
 
+# Retardo tras el arranque antes de inicializar el gestor en segundo plano
+RETARDO_INICIALIZACION_MS = 3000
+
+# Máximo de escritorios que se pueden crear de una vez
+MAXIMO_ESCRITORIOS_LOTE = 20
+
+# Espera tras un cambio de escritorio hecho desde Windows antes de anunciarlo
+# (los cambios rápidos seguidos solo anuncian el último)
+RETARDO_ANUNCIO_MS = 250
+
+# Segundos entre pulsaciones para seguir recorriendo la misma lista de ventanas recientes
+PAUSA_CICLO_RECIENTES = 2.0
+
+# Estados de inicialización del gestor
+GESTOR_PENDIENTE = 0
+GESTOR_LISTO = 1
+GESTOR_ERROR = 2
+
+# Opciones del complemento en la configuración de NVDA
+confspec = {
+	"anunciarCambiosWindows": "boolean(default=True)",
+	"anunciarCantidadVentanas": "boolean(default=False)",
+}
+config.conf.spec["escritoriosVirtuales"] = confspec
+
+
+def _directorioDatos():
+	"""Carpeta de la configuración de NVDA donde el complemento guarda sus archivos"""
+	return os.path.join(globalVars.appArgs.configPath, "escritoriosVirtuales")
+
+
+def _cargarLibreria():
+	"""Importa la capa COM y devuelve la clase del gestor y los segundos que tardó la importación"""
+	inicio = time.perf_counter()
+	from .escritorios_virtuales import GestorEscritorios
+	return GestorEscritorios, time.perf_counter() - inicio
+
+
+def _analizarNumeros(texto, maximo):
+	"""Convierte «3», «2-4» o «2,5,7-8» en la lista ordenada de números válidos (1..maximo)"""
+	numeros = set()
+	for parte in texto.replace(" ", "").split(","):
+		if not parte:
+			continue
+		desde, _guion, hasta = parte.partition("-")
+		desde = int(desde)
+		hasta = int(hasta) if hasta else desde
+		if desde > hasta:
+			desde, hasta = hasta, desde
+		numeros.update(range(max(desde, 1), min(hasta, maximo) + 1))
+	return sorted(numeros)
+
+
+def _describirNumeros(numeros):
+	"""Texto para confirmar la eliminación de uno o varios escritorios"""
+	if len(numeros) == 1:
+		return _("el escritorio {numero}").format(numero=numeros[0])
+	return _("los escritorios {numeros}").format(numeros=", ".join(str(numero) for numero in numeros))
+
+
+def _describirEscritorio(numero, nombre=""):
+	"""Texto para anunciar un escritorio: su nombre, si lo tiene, y su número"""
+	if nombre:
+		return _("{nombre}, escritorio {numero}").format(nombre=nombre, numero=numero)
+	return _("Escritorio {numero}").format(numero=numero)
+
+
+def _crearScriptIrAEscritorio(numero):
+	"""Crea el script que cambia directamente al escritorio indicado"""
+	def script(self, gesture):
+		self._irAEscritorioNumero(numero)
+	script.__name__ = "script_irAEscritorio{numero}".format(numero=numero)
+	return scriptHandler.script(
+		description=_("Cambia directamente al escritorio {numero}").format(numero=numero),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+alt+{numero}".format(numero=numero)
+	)(script)
+
+
+def _crearScriptMoverVentanaAEscritorio(numero):
+	"""Crea el script que mueve la ventana actual directamente al escritorio indicado"""
+	def script(self, gesture):
+		self._moverVentanaAEscritorioNumero(numero)
+	script.__name__ = "script_moverVentanaAEscritorio{numero}".format(numero=numero)
+	return scriptHandler.script(
+		description=_("Mueve la ventana actual directamente al escritorio {numero}").format(numero=numero),
+		category=_("Escritorios Virtuales")
+	)(script)
+
+
+class DialogoBuscarVentana(wx.Dialog):
+	"""Diálogo que filtra mientras se escribe las ventanas de todos los escritorios"""
+	
+	# Número máximo de resultados mostrados en la lista
+	LIMITE_RESULTADOS = 200
+	
+	def __init__(self, parent, gestor):
+		super(DialogoBuscarVentana, self).__init__(parent, title=_("Buscar ventana en todos los escritorios"))
+		self.gestor = gestor
+		self.resultados = []
+		self.hwndElegido = None
+		
+		# Números de escritorio resueltos una sola vez desde el índice en caché
+		self.numeros = {e.id: i for i, e in enumerate(gestor.obtener_indice_escritorios(), 1)}
+		
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		sizer.Add(wx.StaticText(self, label=_("&Buscar:")), 0, wx.LEFT | wx.TOP, 10)
+		self.texto = wx.TextCtrl(self, style=wx.TE_PROCESS_ENTER)
+		sizer.Add(self.texto, 0, wx.EXPAND | wx.ALL, 10)
+		sizer.Add(wx.StaticText(self, label=_("&Ventanas:")), 0, wx.LEFT, 10)
+		self.lista = wx.ListBox(self, size=(500, 300), style=wx.LB_SINGLE)
+		sizer.Add(self.lista, 1, wx.EXPAND | wx.ALL, 10)
+		
+		botones = wx.BoxSizer(wx.HORIZONTAL)
+		self.botonIr = wx.Button(self, wx.ID_OK, _("&Ir a la ventana"))
+		self.botonIr.SetDefault()
+		botones.Add(self.botonIr, 0, wx.RIGHT, 10)
+		botones.Add(wx.Button(self, wx.ID_CANCEL, _("Cancelar")), 0)
+		sizer.Add(botones, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+		self.SetSizerAndFit(sizer)
+		
+		self.texto.Bind(wx.EVT_TEXT, self.onTexto)
+		self.texto.Bind(wx.EVT_TEXT_ENTER, self.onAceptar)
+		self.texto.Bind(wx.EVT_KEY_DOWN, self.onTeclaTexto)
+		self.lista.Bind(wx.EVT_LISTBOX_DCLICK, self.onAceptar)
+		self.Bind(wx.EVT_BUTTON, self.onAceptar, id=wx.ID_OK)
+		
+		self.filtrar("")
+		self.texto.SetFocus()
+	
+	def describir(self, entrada):
+		"""Texto de una fila: título, aplicación y escritorio"""
+		numero = self.numeros.get(entrada.id_escritorio)
+		escritorio = _("escritorio {numero}").format(numero=numero) if numero else _("anclada")
+		aplicacion = self.gestor.nombres_aplicaciones.obtener(entrada.id_aplicacion) or entrada.proceso
+		return _("{titulo} — {aplicacion}, {escritorio}").format(
+			titulo=entrada.titulo or _("sin título"),
+			aplicacion=aplicacion,
+			escritorio=escritorio
+		)
+	
+	def filtrar(self, consulta):
+		"""Consulta el índice de búsqueda y rellena la lista"""
+		self.resultados = self.gestor.indice_busqueda.buscar(consulta, limite=self.LIMITE_RESULTADOS)
+		self.lista.Set([self.describir(entrada) for entrada in self.resultados])
+		if self.resultados:
+			self.lista.SetSelection(0)
+		self.botonIr.Enable(bool(self.resultados))
+	
+	def onTexto(self, event):
+		self.filtrar(self.texto.GetValue())
+	
+	def onTeclaTexto(self, event):
+		# Flecha abajo lleva a la lista de resultados
+		if event.GetKeyCode() == wx.WXK_DOWN and self.resultados:
+			self.lista.SetFocus()
+			return
+		event.Skip()
+	
+	def onAceptar(self, event):
+		seleccion = self.lista.GetSelection()
+		if seleccion == wx.NOT_FOUND or seleccion >= len(self.resultados):
+			return
+		self.hwndElegido = self.resultados[seleccion].hwnd
+		self.EndModal(wx.ID_OK)
+
+
+# Clave del grupo de ventanas ancladas en el alternador
+ID_ANCLADAS = "ancladas"
+
+
+class ListaEscritoriosVirtual(wx.ListCtrl):
+	"""Lista virtual de escritorios y ventanas: las filas se generan bajo demanda desde una instantánea"""
+	
+	def __init__(self, parent, instantanea):
+		super(ListaEscritoriosVirtual, self).__init__(
+			parent, size=(550, 350), style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL
+		)
+		self.instantanea = instantanea
+		# Solo se expande al principio el escritorio actual
+		self.expandidos = {instantanea.id_actual}
+		self.filas = []
+		self.InsertColumn(0, _("Escritorios y ventanas"), width=530)
+		self.reconstruirFilas()
+	
+	def grupos(self):
+		"""Grupos de la lista: cada escritorio y, si las hay, las ventanas ancladas"""
+		grupos = [(escritorio.id, escritorio.ventanas) for escritorio in self.instantanea.escritorios]
+		if self.instantanea.ancladas:
+			grupos.append((ID_ANCLADAS, self.instantanea.ancladas))
+		return grupos
+	
+	def reconstruirFilas(self):
+		"""Recalcula las filas visibles: un grupo por escritorio y sus ventanas si está expandido"""
+		filas = []
+		for clave, ventanas in self.grupos():
+			filas.append((clave, None))
+			if clave in self.expandidos:
+				filas.extend((clave, ventana) for ventana in ventanas)
+		self.filas = filas
+		self.SetItemCount(len(filas))
+		self.Refresh()
+	
+	def textoGrupo(self, clave):
+		estado = _("expandido") if clave in self.expandidos else _("contraído")
+		if clave == ID_ANCLADAS:
+			return _("Ventanas ancladas: {ventanas}, {estado}").format(
+				ventanas=len(self.instantanea.ancladas),
+				estado=estado
+			)
+		escritorio = self.instantanea.escritorio(clave)
+		return _("{escritorio}{actual}: {ventanas} ventanas, {estado}").format(
+			escritorio=_describirEscritorio(escritorio.numero, escritorio.nombre),
+			actual=_(" (actual)") if clave == self.instantanea.id_actual else "",
+			ventanas=len(escritorio.ventanas),
+			estado=estado
+		)
+	
+	def OnGetItemText(self, item, column):
+		clave, ventana = self.filas[item]
+		if ventana is None:
+			return self.textoGrupo(clave)
+		return ventana.titulo or _("sin título")
+	
+	def filaActual(self):
+		"""Índice de la fila enfocada o None"""
+		indice = self.GetFocusedItem()
+		return indice if 0 <= indice < len(self.filas) else None
+	
+	def seleccionar(self, indice):
+		indice = max(0, min(indice, len(self.filas) - 1))
+		self.Select(indice)
+		self.Focus(indice)
+	
+	def filaDeGrupo(self, clave):
+		for indice, (claveFila, ventana) in enumerate(self.filas):
+			if claveFila == clave and ventana is None:
+				return indice
+		return 0
+	
+	def alternarGrupo(self, clave, expandir):
+		"""Expande o contrae un grupo y deja el foco en su fila"""
+		if expandir:
+			self.expandidos.add(clave)
+		else:
+			self.expandidos.discard(clave)
+		self.reconstruirFilas()
+		self.seleccionar(self.filaDeGrupo(clave))
+
+
+class DialogoAlternadorVentanas(wx.Dialog):
+	"""Alternador accesible de escritorios y ventanas basado en una lista virtual"""
+	
+	# Tiempo (en segundos) tras el cual la búsqueda por escritura empieza de nuevo
+	PAUSA_ESCRITURA = 1.0
+	
+	def __init__(self, parent, gestor, instantanea):
+		super(DialogoAlternadorVentanas, self).__init__(parent, title=_("Alternador de escritorios y ventanas"))
+		self.gestor = gestor
+		self.instantanea = instantanea
+		self.eleccion = None
+		self._textoEscrito = ""
+		self._ultimaTecla = 0.0
+		
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		sizer.Add(wx.StaticText(self, label=_("&Escritorios y ventanas:")), 0, wx.LEFT | wx.TOP, 10)
+		self.lista = ListaEscritoriosVirtual(self, instantanea)
+		sizer.Add(self.lista, 1, wx.EXPAND | wx.ALL, 10)
+		
+		botones = wx.BoxSizer(wx.HORIZONTAL)
+		for etiqueta, manejador, identificador in (
+			(_("&Cambiar"), self.onCambiar, wx.ID_OK),
+			(_("&Mover a..."), self.onMover, wx.ID_ANY),
+			(_("&Anclar o desanclar"), self.onAnclar, wx.ID_ANY),
+			(_("Cerrar &ventana"), self.onCerrarVentana, wx.ID_ANY),
+		):
+			boton = wx.Button(self, identificador, etiqueta)
+			boton.Bind(wx.EVT_BUTTON, manejador)
+			botones.Add(boton, 0, wx.RIGHT, 10)
+		botones.Add(wx.Button(self, wx.ID_CANCEL, _("Cerrar")), 0)
+		sizer.Add(botones, 0, wx.ALIGN_RIGHT | wx.ALL, 10)
+		self.SetSizerAndFit(sizer)
+		
+		self.lista.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.onCambiar)
+		self.lista.Bind(wx.EVT_KEY_DOWN, self.onTecla)
+		self.lista.Bind(wx.EVT_CHAR, self.onCaracter)
+		
+		self.lista.seleccionar(self.lista.filaDeGrupo(instantanea.id_actual))
+		self.lista.SetFocus()
+	
+	def filaElegida(self):
+		indice = self.lista.filaActual()
+		return None if indice is None else self.lista.filas[indice]
+	
+	def ventanaElegida(self):
+		"""Ventana de la fila actual o None (avisando) si es un escritorio"""
+		fila = self.filaElegida()
+		if fila is None or fila[1] is None:
+			ui.message(_("Selecciona una ventana"))
+			return None
+		return fila[1]
+	
+	def onTecla(self, event):
+		indice = self.lista.filaActual()
+		tecla = event.GetKeyCode()
+		if indice is None or tecla not in (wx.WXK_RIGHT, wx.WXK_LEFT, wx.WXK_DELETE):
+			event.Skip()
+			return
+		clave, ventana = self.lista.filas[indice]
+		if tecla == wx.WXK_DELETE:
+			self.onCerrarVentana(event)
+		elif tecla == wx.WXK_RIGHT and ventana is None:
+			if clave in self.lista.expandidos:
+				self.lista.seleccionar(indice + 1)
+			else:
+				self.lista.alternarGrupo(clave, True)
+				ui.message(_("expandido"))
+		elif tecla == wx.WXK_LEFT:
+			if ventana is not None:
+				self.lista.seleccionar(self.lista.filaDeGrupo(clave))
+			elif clave in self.lista.expandidos:
+				self.lista.alternarGrupo(clave, False)
+				ui.message(_("contraído"))
+	
+	def onCaracter(self, event):
+		"""Búsqueda por escritura: salta a la siguiente fila que empieza por lo escrito"""
+		caracter = event.GetUnicodeKey()
+		if caracter <= wx.WXK_SPACE or event.HasModifiers() or not self.lista.filas:
+			event.Skip()
+			return
+		ahora = time.monotonic()
+		if ahora - self._ultimaTecla > self.PAUSA_ESCRITURA:
+			self._textoEscrito = ""
+		self._ultimaTecla = ahora
+		self._textoEscrito += chr(caracter).casefold()
+		
+		inicio = self.lista.filaActual() or 0
+		# Con una sola letra se avanza a la siguiente coincidencia; con más se refina la actual
+		if len(self._textoEscrito) == 1:
+			inicio += 1
+		total = len(self.lista.filas)
+		for desplazamiento in range(total):
+			indice = (inicio + desplazamiento) % total
+			if self.lista.OnGetItemText(indice, 0).casefold().startswith(self._textoEscrito):
+				self.lista.seleccionar(indice)
+				return
+		tones.beep(220, 50)
+	
+	def onCambiar(self, event):
+		fila = self.filaElegida()
+		if fila is None:
+			return
+		self.eleccion = fila
+		self.EndModal(wx.ID_OK)
+	
+	def onMover(self, event):
+		ventana = self.ventanaElegida()
+		if ventana is None:
+			return
+		escritorios = self.instantanea.escritorios
+		dlg = wx.SingleChoiceDialog(
+			self,
+			_("Escritorio destino:"),
+			_("Mover ventana"),
+			[_describirEscritorio(numero, nombre) for numero, nombre in self.instantanea.destinos()]
+		)
+		if dlg.ShowModal() == wx.ID_OK:
+			destino = escritorios[dlg.GetSelection()]
+			try:
+				ventana.vista.mover_a_escritorio(destino.escritorio)
+				self.instantanea.mover_ventana(ventana, destino.id)
+				self.actualizarLista()
+				ui.message(_("Ventana movida al escritorio {numero}").format(numero=destino.numero))
+			except Exception as e:
+				ui.message(_("Error: {error}").format(error=str(e)))
+		dlg.Destroy()
+		self.lista.SetFocus()
+	
+	def onAnclar(self, event):
+		ventana = self.ventanaElegida()
+		if ventana is None:
+			return
+		try:
+			if ventana.anclada and ventana.vista.aplicacion_anclada:
+				ui.message(_("La aplicación está anclada en todos los escritorios"))
+			elif ventana.anclada:
+				ventana.vista.desanclar()
+				self.instantanea.mover_ventana(ventana, ventana.vista.id_escritorio, anclada=False)
+				ui.message(_("Ventana desanclada"))
+			else:
+				ventana.vista.anclar()
+				self.instantanea.mover_ventana(ventana, ventana.id_escritorio, anclada=True)
+				ui.message(_("Ventana anclada en todos los escritorios"))
+			self.actualizarLista()
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+		self.lista.SetFocus()
+	
+	def onCerrarVentana(self, event):
+		ventana = self.ventanaElegida()
+		if ventana is None:
+			return
+		try:
+			ventana.vista.cerrar()
+			self.instantanea.quitar_ventana(ventana)
+			self.actualizarLista()
+			ui.message(_("Ventana cerrada"))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+		self.lista.SetFocus()
+	
+	def actualizarLista(self):
+		"""Recalcula las filas conservando la posición del foco"""
+		indice = self.lista.filaActual() or 0
+		self.lista.reconstruirFilas()
+		self.lista.seleccionar(indice)
+
+
+class DialogoRegla(wx.Dialog):
+	"""Diálogo para crear o editar una regla de colocación"""
+	
+	def __init__(self, parent, regla=None):
+		super(DialogoRegla, self).__init__(parent, title=_("Regla de colocación"))
+		regla = regla or Regla()
+		
+		sizer = wx.BoxSizer(wx.VERTICAL)
+		sHelper = guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+		self.aplicacion = sHelper.addLabeledControl(_("&Aplicación (ejecutable o AUMID, vacío para cualquiera):"), wx.TextCtrl)
+		self.aplicacion.SetValue(regla.aplicacion)
+		self.titulo = sHelper.addLabeledControl(_("Patrón del &título (expresión regular, vacío para cualquiera):"), wx.TextCtrl)
+		self.titulo.SetValue(regla.titulo)
+		self.anclar = sHelper.addItem(wx.CheckBox(self, label=_("A&nclar en todos los escritorios")))
+		self.anclar.SetValue(regla.escritorio == ANCLAR)
+		self.escritorio = sHelper.addLabeledControl(
+			_("&Escritorio destino:"), wx.SpinCtrl, min=1, max=MAXIMO_ESCRITORIOS_LOTE,
+			initial=max(regla.escritorio, 1)
+		)
+		self.escritorio.Enable(regla.escritorio != ANCLAR)
+		sHelper.addDialogDismissButtons(self.CreateButtonSizer(wx.OK | wx.CANCEL))
+		sizer.Add(sHelper.sizer, 0, wx.ALL, 10)
+		self.SetSizerAndFit(sizer)
+		
+		self.anclar.Bind(wx.EVT_CHECKBOX, lambda event: self.escritorio.Enable(not self.anclar.GetValue()))
+		self.Bind(wx.EVT_BUTTON, self.onAceptar, id=wx.ID_OK)
+		self.aplicacion.SetFocus()
+	
+	def obtenerRegla(self):
+		"""Regla con los valores del diálogo"""
+		return Regla(
+			self.aplicacion.GetValue().strip(),
+			self.titulo.GetValue(),
+			ANCLAR if self.anclar.GetValue() else self.escritorio.GetValue()
+		)
+	
+	def onAceptar(self, event):
+		motivo = validar_regla(self.obtenerRegla())
+		if motivo:
+			gui.messageBox(motivo, _("Regla no válida"), wx.OK | wx.ICON_ERROR, self)
+			return
+		event.Skip()
+
+
+class PanelEscritoriosVirtuales(settingsDialogs.SettingsPanel):
+	"""Panel de opciones: anuncios y reglas de colocación automática de ventanas"""
+	
+	title = _("Escritorios Virtuales")
+	# Plugin activo (lo asigna GlobalPlugin) para aplicar las reglas sin reiniciar
+	plugin = None
+	
+	def makeSettings(self, settingsSizer):
+		sHelper = guiHelper.BoxSizerHelper(self, sizer=settingsSizer)
+		self.anunciarCambios = sHelper.addItem(
+			wx.CheckBox(self, label=_("Anunciar los cambios de escritorio hechos desde &Windows"))
+		)
+		self.anunciarCambios.SetValue(config.conf["escritoriosVirtuales"]["anunciarCambiosWindows"])
+		self.anunciarVentanas = sHelper.addItem(
+			wx.CheckBox(self, label=_("Incluir el número de &ventanas en esos anuncios"))
+		)
+		self.anunciarVentanas.SetValue(config.conf["escritoriosVirtuales"]["anunciarCantidadVentanas"])
+		
+		self.lista = sHelper.addLabeledControl(
+			_("&Reglas de colocación (se aplican a las ventanas nuevas):"),
+			wx.ListCtrl, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(550, 250)
+		)
+		self.lista.InsertColumn(0, _("Aplicación"), width=160)
+		self.lista.InsertColumn(1, _("Título"), width=160)
+		self.lista.InsertColumn(2, _("Destino"), width=130)
+		self.lista.InsertColumn(3, _("Aciertos"), width=80)
+		
+		botones = guiHelper.ButtonHelper(wx.HORIZONTAL)
+		botones.addButton(self, label=_("&Añadir...")).Bind(wx.EVT_BUTTON, self.onAnadir)
+		botones.addButton(self, label=_("&Editar...")).Bind(wx.EVT_BUTTON, self.onEditar)
+		botones.addButton(self, label=_("&Quitar")).Bind(wx.EVT_BUTTON, self.onQuitar)
+		sHelper.addItem(botones)
+		
+		gestor = self.plugin.gestor if self.plugin else None
+		if gestor is not None:
+			estadisticas = gestor.reglas.estadisticas()
+		else:
+			estadisticas = [(regla, 0) for regla in cargar_reglas(_directorioDatos())]
+		self.reglas = [regla for regla, _aciertos in estadisticas]
+		self.aciertos = [aciertos for _regla, aciertos in estadisticas]
+		self.actualizarLista()
+	
+	def actualizarLista(self, seleccion=0):
+		self.lista.DeleteAllItems()
+		for i, regla in enumerate(self.reglas):
+			destino = _("Anclar") if regla.escritorio == ANCLAR else _("Escritorio {numero}").format(numero=regla.escritorio)
+			aciertos = self.aciertos[i] if i < len(self.aciertos) else 0
+			self.lista.Append((regla.aplicacion or _("cualquiera"), regla.titulo or _("cualquiera"), destino, str(aciertos)))
+		if self.reglas:
+			seleccion = min(seleccion, len(self.reglas) - 1)
+			self.lista.Select(seleccion)
+			self.lista.Focus(seleccion)
+	
+	def _editar(self, regla=None):
+		dlg = DialogoRegla(self, regla)
+		resultado = dlg.ShowModal()
+		nueva = dlg.obtenerRegla()
+		dlg.Destroy()
+		return nueva if resultado == wx.ID_OK else None
+	
+	def onAnadir(self, event):
+		regla = self._editar()
+		if regla is not None:
+			self.reglas.append(regla)
+			self.aciertos.append(0)
+			self.actualizarLista(len(self.reglas) - 1)
+		self.lista.SetFocus()
+	
+	def onEditar(self, event):
+		indice = self.lista.GetFirstSelected()
+		if indice < 0:
+			return
+		regla = self._editar(self.reglas[indice])
+		if regla is not None:
+			self.reglas[indice] = regla
+			self.aciertos[indice] = 0
+			self.actualizarLista(indice)
+		self.lista.SetFocus()
+	
+	def onQuitar(self, event):
+		indice = self.lista.GetFirstSelected()
+		if indice < 0:
+			return
+		del self.reglas[indice]
+		del self.aciertos[indice]
+		self.actualizarLista(indice)
+		self.lista.SetFocus()
+	
+	def onSave(self):
+		config.conf["escritoriosVirtuales"]["anunciarCambiosWindows"] = self.anunciarCambios.GetValue()
+		config.conf["escritoriosVirtuales"]["anunciarCantidadVentanas"] = self.anunciarVentanas.GetValue()
+		gestor = self.plugin.gestor if self.plugin else None
+		try:
+			if gestor is not None:
+				gestor.establecer_reglas(self.reglas)
+			else:
+				guardar_reglas(_directorioDatos(), self.reglas)
+		except Exception:
+			log.error("Escritorios virtuales: no se pudieron guardar las reglas", exc_info=True)
+
 
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	"""Plugin global para gestión de escritorios virtuales"""
@@ -30,7 +603,27 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	def __init__(self):
 		super(GlobalPlugin, self).__init__()
 		
+		# Capa de comandos: estado y teclas disponibles mientras está activa
+		self._capaActiva = False
+		# Ventanas marcadas (hwnd, en orden de marcado) para moverlas juntas
+		self._ventanasMarcadas = []
+		# Recorrido de ventanas recientes: (escritorio, hwnds congelados, posición, instante)
+		self._cicloRecientes = None
+		
+		# El gestor se crea con el primer gesto o poco después del arranque, lo que ocurra antes
+		self.gestor = None
+		self.estadoGestor = GESTOR_PENDIENTE
+		# Segundos empleados en importar la capa COM y en crear el gestor
+		self.tiempoImportacion = None
+		self.tiempoInicializacion = None
+		self._inicializacionDiferida = None
+		# Cambios de escritorio hechos desde Windows: suscripción y anuncio pendiente
+		self._suscripcionCambios = None
+		self._anuncioPendiente = None
+		self._idPorAnunciar = None
+		
 		if not LIBRERIA_DISPONIBLE:
+			self.estadoGestor = GESTOR_ERROR
 			wx.CallAfter(
 				ui.message,
 				_("Error: La librería escritorios-virtuales no está instalada. "
@@ -38,20 +631,289 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			)
 			return
 		
-		# Inicializar gestor
+		PanelEscritoriosVirtuales.plugin = self
+		settingsDialogs.NVDASettingsDialog.categoryClasses.append(PanelEscritoriosVirtuales)
+		
+		# Los objetos COM y los ganchos de eventos deben vivir en el hilo principal
+		wx.CallAfter(self._programarInicializacion)
+	
+	def _programarInicializacion(self):
+		"""Deja la inicialización para cuando NVDA haya terminado de arrancar"""
+		if self.estadoGestor == GESTOR_PENDIENTE:
+			self._inicializacionDiferida = wx.CallLater(RETARDO_INICIALIZACION_MS, self._inicializarGestor)
+	
+	def _inicializarGestor(self):
+		"""Importa la capa COM y crea el gestor; solo se intenta una vez"""
+		if self.estadoGestor != GESTOR_PENDIENTE:
+			return
+		if self._inicializacionDiferida:
+			self._inicializacionDiferida.Stop()
+			self._inicializacionDiferida = None
+		
 		try:
-			self.gestor = GestorEscritorios()
-		except Exception as e:
-			wx.CallAfter(
-				ui.message,
-				_("Error al inicializar el gestor de escritorios: {error}").format(error=str(e))
+			GestorEscritorios, self.tiempoImportacion = _cargarLibreria()
+			inicio = time.perf_counter()
+			self.gestor = GestorEscritorios(
+				directorio_datos=_directorioDatos()
 			)
+			self.gestor.iniciar_notificaciones()
+			try:
+				self.gestor.iniciar_eventos_ventana()
+			except Exception:
+				# Sin ganchos de eventos se recurre a enumerar las ventanas
+				log.warning("Escritorios virtuales: no se pudieron instalar los eventos de ventana", exc_info=True)
+			self._suscripcionCambios = self.gestor.suscribir(self._alCambiarEscritorio, tipos=[EscritorioCambiado])
+			self.tiempoInicializacion = time.perf_counter() - inicio
+		except Exception as e:
+			log.error("Escritorios virtuales: no se pudo inicializar el gestor", exc_info=True)
+			self.estadoGestor = GESTOR_ERROR
+			ui.message(_("Error al inicializar el gestor de escritorios: {error}").format(error=str(e)))
+			if self.gestor:
+				self.gestor.cerrar()
 			self.gestor = None
+			return
+		
+		self.estadoGestor = GESTOR_LISTO
+		log.info(
+			"Escritorios virtuales: capa COM importada en %.1f ms, gestor inicializado en %.1f ms",
+			self.tiempoImportacion * 1000, self.tiempoInicializacion * 1000
+		)
+	
+	def _asegurarGestor(self):
+		"""Devuelve el gestor, inicializándolo en este momento si aún no lo estaba"""
+		if self.estadoGestor == GESTOR_PENDIENTE:
+			self._inicializarGestor()
+		return self.gestor
 	
 	def terminate(self):
 		"""Limpieza al cerrar NVDA"""
+		if self._inicializacionDiferida:
+			self._inicializacionDiferida.Stop()
+			self._inicializacionDiferida = None
+		if self._anuncioPendiente:
+			self._anuncioPendiente.Stop()
+			self._anuncioPendiente = None
+		if PanelEscritoriosVirtuales in settingsDialogs.NVDASettingsDialog.categoryClasses:
+			settingsDialogs.NVDASettingsDialog.categoryClasses.remove(PanelEscritoriosVirtuales)
+		PanelEscritoriosVirtuales.plugin = None
+		# Si el gestor no llegó a crearse no hay nada que liberar
+		self.estadoGestor = GESTOR_ERROR
+		if self.gestor:
+			self.gestor.cerrar()
+			self.gestor = None
 		super(GlobalPlugin, self).terminate()
 	
+	def _alCambiarEscritorio(self, evento):
+		"""Cambio de escritorio publicado por el gestor (llega en el hilo de la suscripción)"""
+		if not evento.propio:
+			wx.CallAfter(self._programarAnuncioEscritorio, evento.actual)
+	
+	def _programarAnuncioEscritorio(self, idEscritorio):
+		"""Espera a que termine una ráfaga de cambios y anuncia solo el último"""
+		if not config.conf["escritoriosVirtuales"]["anunciarCambiosWindows"]:
+			return
+		self._idPorAnunciar = idEscritorio
+		if self._anuncioPendiente and self._anuncioPendiente.IsRunning():
+			self._anuncioPendiente.Start(RETARDO_ANUNCIO_MS)
+		else:
+			self._anuncioPendiente = wx.CallLater(RETARDO_ANUNCIO_MS, self._anunciarCambioEscritorio)
+	
+	def _anunciarCambioEscritorio(self):
+		"""Anuncia el escritorio al que se llegó desde Windows con los datos en caché"""
+		self._anuncioPendiente = None
+		idEscritorio, self._idPorAnunciar = self._idPorAnunciar, None
+		if not self.gestor or not idEscritorio or idEscritorio != self.gestor.id_escritorio_actual():
+			return
+		try:
+			numero = self.gestor.numero_escritorio(idEscritorio)
+			if numero is None:
+				return
+			escritorio = self.gestor.obtener_escritorio_por_numero(numero)
+			mensaje = _describirEscritorio(numero, self.gestor.nombre_escritorio(escritorio))
+			# Los recuentos solo son gratuitos con los eventos de ventana activos
+			if config.conf["escritoriosVirtuales"]["anunciarCantidadVentanas"] and self.gestor.eventos_ventana_activos:
+				especificas, _ancladas = self.gestor.contar_ventanas(idEscritorio)
+				mensaje = _("{escritorio}, {cantidad} ventanas").format(escritorio=mensaje, cantidad=especificas)
+			ui.message(mensaje)
+		except Exception:
+			log.debugWarning("Escritorios virtuales: no se pudo anunciar el cambio de escritorio", exc_info=True)
+	
+	def event_foreground(self, obj, nextHandler):
+		"""Recuerda la ventana en primer plano de cada escritorio para restaurarla al volver"""
+		# Con eventos de ventana activos el gestor ya lo hace desde su propio gancho
+		if self.gestor and obj.windowHandle and not self.gestor.eventos_ventana_activos:
+			try:
+				# Escritorio de la ventana (una consulta por hwnd, sin enumerar); sin notificaciones,
+				# además revela los cambios de escritorio hechos desde Windows
+				idEscritorio = self.gestor.comprobar_escritorio_primer_plano(obj.windowHandle)
+				self.gestor.registrar_foco(obj.windowHandle, idEscritorio)
+			except Exception:
+				pass
+		nextHandler()
+	
+	def event_nameChange(self, obj, nextHandler):
+		"""Mantiene al día los títulos del índice de búsqueda"""
+		if self.gestor and obj.windowHandle and not self.gestor.eventos_ventana_activos:
+			try:
+				# Los títulos se guardan por ventana de nivel superior
+				hwnd = winUser.getAncestor(obj.windowHandle, winUser.GA_ROOT) or obj.windowHandle
+				self.gestor.notificar_cambio_titulo(hwnd)
+			except Exception:
+				pass
+		nextHandler()
+	
+	# Teclas de la capa de comandos (se activan con NVDA+Ctrl+E)
+	__capaGestures = {
+		"kb:leftArrow": "escritorioAnterior",
+		"kb:rightArrow": "escritorioSiguiente",
+		"kb:shift+leftArrow": "moverVentanaAnterior",
+		"kb:shift+rightArrow": "moverVentanaSiguiente",
+		"kb:control+leftArrow": "moverEscritorioIzquierda",
+		"kb:control+rightArrow": "moverEscritorioDerecha",
+		"kb:backspace": "escritorioPrevio",
+		"kb:n": "crearEscritorio",
+		"kb:shift+n": "crearVariosEscritorios",
+		"kb:v": "eliminarEscritoriosVacios",
+		"kb:o": "ordenarEscritorios",
+		"kb:s": "guardarDisposicion",
+		"kb:shift+s": "restaurarDisposicion",
+		"kb:r": "renombrarEscritorio",
+		"kb:f": "buscarVentana",
+		"kb:l": "alternadorVentanas",
+		"kb:d": "anunciarEscritorioActual",
+		"kb:c": "contarVentanas",
+		"kb:w": "infoVentana",
+		"kb:tab": "ventanaReciente",
+		"kb:p": "anclarVentana",
+		"kb:shift+p": "anclarAplicacion",
+		"kb:a": "moverAplicacionAEscritorio",
+		"kb:t": "moverVentanasEscritorio",
+		"kb:k": "marcarVentana",
+		"kb:shift+k": "moverVentanasMarcadas",
+		"kb:escape": "salirCapa",
+	}
+	for _numero in range(1, 10):
+		__capaGestures["kb:{numero}".format(numero=_numero)] = "capaIrAEscritorio"
+		__capaGestures["kb:shift+{numero}".format(numero=_numero)] = "capaMoverVentanaAEscritorio"
+	del _numero
+	
+	def getScript(self, gesture):
+		"""Durante la capa de comandos, cualquier tecla ejecuta una orden y cierra la capa"""
+		if not self._capaActiva:
+			return super(GlobalPlugin, self).getScript(gesture)
+		script = super(GlobalPlugin, self).getScript(gesture)
+		if not script:
+			script = self.script_teclaCapaDesconocida
+		return self._envolverScriptCapa(script)
+	
+	def _envolverScriptCapa(self, script):
+		"""Envuelve un script para que la capa se cierre al terminar"""
+		def envoltura(gesture):
+			try:
+				script(gesture)
+			finally:
+				self._terminarCapa()
+		return envoltura
+	
+	def _terminarCapa(self):
+		"""Sale de la capa de comandos y restaura los gestos normales"""
+		self._capaActiva = False
+		self.clearGestureBindings()
+		self.bindGestures(self.__gestures)
+	
+	@scriptHandler.script(
+		description=_("Activa la capa de comandos de escritorios virtuales"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+e"
+	)
+	def script_capaComandos(self, gesture):
+		"""Activa la capa de comandos: la siguiente tecla ejecuta una orden"""
+		if self._capaActiva:
+			self._terminarCapa()
+			return
+		self.bindGestures(self.__capaGestures)
+		self._capaActiva = True
+		tones.beep(880, 60)
+	
+	def script_salirCapa(self, gesture):
+		"""Cierra la capa de comandos sin hacer nada"""
+		tones.beep(440, 60)
+	
+	def script_teclaCapaDesconocida(self, gesture):
+		"""Tecla sin orden asignada en la capa de comandos"""
+		tones.beep(220, 80)
+	
+	def script_capaIrAEscritorio(self, gesture):
+		"""Cambia al escritorio del número pulsado en la capa"""
+		self._irAEscritorioNumero(int(gesture.mainKeyName))
+	
+	def script_capaMoverVentanaAEscritorio(self, gesture):
+		"""Mueve la ventana al escritorio del número pulsado en la capa"""
+		self._moverVentanaAEscritorioNumero(int(gesture.mainKeyName))
+	
+	def _ventanaObjetivo(self):
+		"""Ventana sobre la que actúan las órdenes: la del objeto del navegador o, si no tiene, la enfocada"""
+		objeto = api.getNavigatorObject()
+		hwnd = getattr(objeto, "windowHandle", 0)
+		if hwnd:
+			ventana = self.gestor.resolver_ventana(hwnd)
+			if ventana is not None:
+				return ventana
+		return self.gestor.obtener_ventana_actual()
+	
+	def _irAEscritorioNumero(self, numero):
+		"""Cambia al escritorio indicado resolviéndolo desde el índice en caché"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			escritorio = self.gestor.ir_a_escritorio(numero)
+			ui.message(_describirEscritorio(numero, escritorio.nombre_personalizado))
+		except EscritorioNoEncontrado:
+			ui.message(_("No existe el escritorio {numero}").format(numero=numero))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	def _moverVentanaAEscritorioNumero(self, numero):
+		"""Mueve la ventana actual al escritorio indicado resolviéndolo desde el índice en caché"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			ventana = self._ventanaObjetivo()
+			if not ventana:
+				ui.message(_("No hay ventana enfocada"))
+				return
+			
+			self.gestor.mover_ventana_a_escritorio(ventana, numero)
+			ui.message(_("Ventana movida al escritorio {numero}").format(numero=numero))
+		except EscritorioNoEncontrado:
+			ui.message(_("No existe el escritorio {numero}").format(numero=numero))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	# Gestos directos: ir al escritorio 1-9 y mover la ventana al escritorio 1-9
+	script_irAEscritorio1 = _crearScriptIrAEscritorio(1)
+	script_irAEscritorio2 = _crearScriptIrAEscritorio(2)
+	script_irAEscritorio3 = _crearScriptIrAEscritorio(3)
+	script_irAEscritorio4 = _crearScriptIrAEscritorio(4)
+	script_irAEscritorio5 = _crearScriptIrAEscritorio(5)
+	script_irAEscritorio6 = _crearScriptIrAEscritorio(6)
+	script_irAEscritorio7 = _crearScriptIrAEscritorio(7)
+	script_irAEscritorio8 = _crearScriptIrAEscritorio(8)
+	script_irAEscritorio9 = _crearScriptIrAEscritorio(9)
+	script_moverVentanaAEscritorio1 = _crearScriptMoverVentanaAEscritorio(1)
+	script_moverVentanaAEscritorio2 = _crearScriptMoverVentanaAEscritorio(2)
+	script_moverVentanaAEscritorio3 = _crearScriptMoverVentanaAEscritorio(3)
+	script_moverVentanaAEscritorio4 = _crearScriptMoverVentanaAEscritorio(4)
+	script_moverVentanaAEscritorio5 = _crearScriptMoverVentanaAEscritorio(5)
+	script_moverVentanaAEscritorio6 = _crearScriptMoverVentanaAEscritorio(6)
+	script_moverVentanaAEscritorio7 = _crearScriptMoverVentanaAEscritorio(7)
+	script_moverVentanaAEscritorio8 = _crearScriptMoverVentanaAEscritorio(8)
+	script_moverVentanaAEscritorio9 = _crearScriptMoverVentanaAEscritorio(9)
+	
 	@scriptHandler.script(
 		description=_("Anuncia el escritorio virtual actual"),
 		category=_("Escritorios Virtuales"),
@@ -59,7 +921,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_anunciarEscritorioActual(self, gesture):
 		"""Anuncia el escritorio actual"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
@@ -68,8 +930,8 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			escritorios = self.gestor.obtener_escritorios()
 			total = len(escritorios)
 			
-			mensaje = _("Escritorio {numero} de {total}").format(
-				numero=actual.numero,
+			mensaje = _("{escritorio} de {total}").format(
+				escritorio=_describirEscritorio(actual.numero, actual.nombre_personalizado),
 				total=total
 			)
 			ui.message(mensaje)
@@ -83,22 +945,21 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_listarEscritorios(self, gesture):
 		"""Lista todos los escritorios"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			escritorios = self.gestor.obtener_escritorios()
-			actual = self.gestor.obtener_escritorio_actual()
+			# Una sola enumeración de ventanas para todos los escritorios
+			instantanea = self.gestor.obtener_instantanea()
 			
-			mensaje = _("Total de escritorios: {total}. ").format(total=len(escritorios))
+			mensaje = _("Total de escritorios: {total}. ").format(total=len(instantanea.escritorios))
 			
-			for escritorio in escritorios:
-				es_actual = _(" (actual)") if escritorio.id == actual.id else ""
-				ventanas = escritorio.obtener_ventanas()
-				mensaje += _("Escritorio {numero}: {ventanas} ventanas{actual}. ").format(
-					numero=escritorio.numero,
-					ventanas=len(ventanas),
+			for escritorio in instantanea.escritorios:
+				es_actual = _(" (actual)") if escritorio.id == instantanea.id_actual else ""
+				mensaje += _("{escritorio}: {ventanas} ventanas{actual}. ").format(
+					escritorio=_describirEscritorio(escritorio.numero, escritorio.nombre),
+					ventanas=len(escritorio.ventanas) + len(instantanea.ancladas),
 					actual=es_actual
 				)
 			
@@ -113,7 +974,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_crearEscritorio(self, gesture):
 		"""Crea un nuevo escritorio"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
@@ -123,6 +984,48 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		except Exception as e:
 			ui.message(_("Error al crear escritorio: {error}").format(error=str(e)))
 	
+	@scriptHandler.script(
+		description=_("Cambia el nombre del escritorio actual (abre diálogo)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+r"
+	)
+	def script_renombrarEscritorio(self, gesture):
+		"""Abre un diálogo para renombrar el escritorio actual"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			actual = self.gestor.obtener_escritorio_actual()
+			numero = actual.numero
+			
+			def mostrarDialogo():
+				dlg = wx.TextEntryDialog(
+					gui.mainFrame,
+					_("Nombre del escritorio {numero} (vacío para el predeterminado):").format(numero=numero),
+					_("Renombrar escritorio"),
+					actual.nombre_personalizado
+				)
+				gui.mainFrame.prePopup()
+				resultado = dlg.ShowModal()
+				gui.mainFrame.postPopup()
+				nombre = dlg.GetValue().strip()
+				dlg.Destroy()
+				
+				if resultado != wx.ID_OK:
+					return
+				try:
+					actual.renombrar(nombre)
+					wx.CallAfter(ui.message, _describirEscritorio(numero, nombre))
+				except OperacionNoSoportada:
+					wx.CallAfter(ui.message, _("Esta versión de Windows no permite renombrar escritorios"))
+				except Exception as e:
+					wx.CallAfter(ui.message, _("Error: {error}").format(error=str(e)))
+			
+			wx.CallAfter(mostrarDialogo)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
 	@scriptHandler.script(
 		description=_("Cambia al escritorio virtual anterior"),
 		category=_("Escritorios Virtuales"),
@@ -130,7 +1033,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_escritorioAnterior(self, gesture):
 		"""Cambia al escritorio anterior"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
@@ -154,7 +1057,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			escritorio_anterior = escritorios[indice_anterior]
 			
 			escritorio_anterior.ir()
-			ui.message(_("Escritorio {numero}").format(numero=escritorio_anterior.numero))
+			ui.message(_describirEscritorio(escritorio_anterior.numero, escritorio_anterior.nombre_personalizado))
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
@@ -165,7 +1068,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_escritorioSiguiente(self, gesture):
 		"""Cambia al escritorio siguiente"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
@@ -189,7 +1092,27 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			escritorio_siguiente = escritorios[indice_siguiente]
 			
 			escritorio_siguiente.ir()
-			ui.message(_("Escritorio {numero}").format(numero=escritorio_siguiente.numero))
+			ui.message(_describirEscritorio(escritorio_siguiente.numero, escritorio_siguiente.nombre_personalizado))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Vuelve al último escritorio visitado (alterna entre los dos más recientes)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+backspace"
+	)
+	def script_escritorioPrevio(self, gesture):
+		"""Vuelve al escritorio visitado anteriormente según el historial"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			escritorio = self.gestor.volver_a_escritorio_anterior()
+			if escritorio is None:
+				ui.message(_("No hay escritorio anterior en el historial"))
+				return
+			ui.message(_describirEscritorio(escritorio.numero, escritorio.nombre_personalizado))
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
@@ -200,12 +1123,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_moverVentanaAnterior(self, gesture):
 		"""Mueve la ventana actual al escritorio anterior"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			ventana = self.gestor.obtener_ventana_actual()
+			ventana = self._ventanaObjetivo()
 			if not ventana:
 				ui.message(_("No hay ventana enfocada"))
 				return
@@ -240,12 +1163,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_moverVentanaSiguiente(self, gesture):
 		"""Mueve la ventana actual al escritorio siguiente"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			ventana = self.gestor.obtener_ventana_actual()
+			ventana = self._ventanaObjetivo()
 			if not ventana:
 				ui.message(_("No hay ventana enfocada"))
 				return
@@ -280,17 +1203,20 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_anclarVentana(self, gesture):
 		"""Ancla o desancla la ventana actual"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			ventana = self.gestor.obtener_ventana_actual()
+			ventana = self._ventanaObjetivo()
 			if not ventana:
 				ui.message(_("No hay ventana enfocada"))
 				return
 			
-			if ventana.esta_anclada():
+			if ventana.aplicacion_anclada:
+				# UnpinView no tiene efecto mientras la aplicación entera esté anclada
+				ui.message(_("La aplicación está anclada en todos los escritorios"))
+			elif ventana.vista_anclada():
 				ventana.desanclar()
 				ui.message(_("Ventana desanclada"))
 			else:
@@ -299,6 +1225,35 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
+	@scriptHandler.script(
+		description=_("Ancla o desancla todas las ventanas de la aplicación actual"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+p"
+	)
+	def script_anclarAplicacion(self, gesture):
+		"""Ancla o desancla la aplicación de la ventana actual (todas sus ventanas)"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			ventana = self._ventanaObjetivo()
+			if not ventana:
+				ui.message(_("No hay ventana enfocada"))
+				return
+			
+			aplicacion = ventana.nombre_aplicacion or ventana.ejecutable
+			if ventana.aplicacion_anclada:
+				self.gestor.desanclar_aplicacion(ventana.id_aplicacion)
+				ui.message(_("{aplicacion} desanclada").format(aplicacion=aplicacion))
+			else:
+				self.gestor.anclar_aplicacion(ventana.id_aplicacion)
+				ui.message(_("{aplicacion} anclada en todos los escritorios").format(aplicacion=aplicacion))
+		except OperacionNoSoportada:
+			ui.message(_("Esta ventana no permite anclar su aplicación"))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
 	@scriptHandler.script(
 		description=_("Anuncia información de la ventana actual"),
 		category=_("Escritorios Virtuales"),
@@ -306,12 +1261,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_infoVentana(self, gesture):
 		"""Anuncia información de la ventana actual"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			ventana = self.gestor.obtener_ventana_actual()
+			ventana = self._ventanaObjetivo()
 			if not ventana:
 				ui.message(_("No hay ventana enfocada"))
 				return
@@ -319,8 +1274,9 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			escritorio = ventana.escritorio
 			anclada = _("anclada") if ventana.esta_anclada() else _("no anclada")
 			
-			mensaje = _("Ventana: {titulo}. Escritorio {numero}. {anclada}").format(
+			mensaje = _("Ventana: {titulo}. Aplicación: {aplicacion}. Escritorio {numero}. {anclada}").format(
 				titulo=ventana.titulo,
+				aplicacion=ventana.nombre_aplicacion or ventana.id_aplicacion or _("desconocida"),
 				numero=escritorio.numero,
 				anclada=anclada
 			)
@@ -328,6 +1284,46 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
+	@scriptHandler.script(
+		description=_("Recorre las ventanas del escritorio actual de la más a la menos reciente"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+tab"
+	)
+	def script_ventanaReciente(self, gesture):
+		"""Activa la siguiente ventana reciente; las pulsaciones seguidas recorren la misma lista"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			idEscritorio = self.gestor.id_escritorio_actual()
+			ahora = time.monotonic()
+			# La ventana en primer plano nunca es destino: se pasa a la usada antes que ella
+			hwndActual = getattr(api.getForegroundObject(), "windowHandle", 0)
+			ciclo = self._cicloRecientes
+			if ciclo and ciclo[0] == idEscritorio and ahora - ciclo[3] < PAUSA_CICLO_RECIENTES:
+				_id, hwnds, posicion, _instante = ciclo
+			else:
+				# Orden en caché: activar ventanas no debe reordenar la lista mientras se recorre
+				hwnds = self.gestor.ventanas_recientes(idEscritorio)
+				posicion = -1
+			
+			for _paso in range(len(hwnds)):
+				posicion = (posicion + 1) % len(hwnds)
+				if hwnds[posicion] == hwndActual:
+					continue
+				ventana = self.gestor.resolver_ventana(hwnds[posicion])
+				if ventana is None or not ventana.se_muestra_en_alternador():
+					continue
+				ventana.activar()
+				self._cicloRecientes = (idEscritorio, hwnds, posicion, ahora)
+				ui.message(ventana.titulo or _("Sin título"))
+				return
+			self._cicloRecientes = None
+			ui.message(_("No hay otras ventanas en este escritorio"))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
 	@scriptHandler.script(
 		description=_("Ir a un escritorio específico (abre diálogo)"),
 		category=_("Escritorios Virtuales"),
@@ -335,12 +1331,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_irAEscritorio(self, gesture):
 		"""Abre diálogo para ir a un escritorio específico"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			escritorios = self.gestor.obtener_escritorios()
+			escritorios = self.gestor.obtener_indice_escritorios()
 			
 			# Crear diálogo con mejor accesibilidad
 			def mostrarDialogo():
@@ -357,12 +1353,14 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 					try:
 						numero = int(dlg.GetValue())
 						if 1 <= numero <= len(escritorios):
-							escritorios[numero - 1].ir()
-							wx.CallAfter(ui.message, _("Escritorio {numero}").format(numero=numero))
+							escritorio = self.gestor.ir_a_escritorio(numero)
+							wx.CallAfter(ui.message, _describirEscritorio(numero, escritorio.nombre_personalizado))
 						else:
 							wx.CallAfter(ui.message, _("Número de escritorio inválido"))
 					except ValueError:
 						wx.CallAfter(ui.message, _("Debes introducir un número"))
+					except Exception as e:
+						wx.CallAfter(ui.message, _("Error: {error}").format(error=str(e)))
 				
 				dlg.Destroy()
 			
@@ -370,6 +1368,82 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
+	@scriptHandler.script(
+		description=_("Busca una ventana por nombre en todos los escritorios y salta a ella (abre diálogo)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+f"
+	)
+	def script_buscarVentana(self, gesture):
+		"""Abre el diálogo de búsqueda de ventanas"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			# Solo se resuelven las ventanas que el índice aún no conoce
+			self.gestor.actualizar_indice_busqueda()
+			
+			def mostrarDialogo():
+				dlg = DialogoBuscarVentana(gui.mainFrame, self.gestor)
+				gui.mainFrame.prePopup()
+				resultado = dlg.ShowModal()
+				gui.mainFrame.postPopup()
+				hwnd = dlg.hwndElegido
+				dlg.Destroy()
+				
+				if resultado == wx.ID_OK and hwnd:
+					try:
+						self.gestor.enfocar_ventana(hwnd)
+					except Exception as e:
+						wx.CallAfter(ui.message, _("Error: {error}").format(error=str(e)))
+			
+			wx.CallAfter(mostrarDialogo)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Abre el alternador de escritorios y ventanas"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+l"
+	)
+	def script_alternadorVentanas(self, gesture):
+		"""Abre el alternador con una lista virtual de escritorios y ventanas"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			instantanea = self.gestor.obtener_instantanea()
+			# Títulos del escritorio expandido resueltos en paralelo; el resto, al mostrarse
+			actual = instantanea.escritorio(instantanea.id_actual)
+			if actual is not None:
+				self.gestor.precargar_titulos([ventana.vista for ventana in actual.ventanas])
+			
+			def mostrarDialogo():
+				dlg = DialogoAlternadorVentanas(gui.mainFrame, self.gestor, instantanea)
+				gui.mainFrame.prePopup()
+				resultado = dlg.ShowModal()
+				gui.mainFrame.postPopup()
+				eleccion = dlg.eleccion
+				dlg.Destroy()
+				
+				if resultado != wx.ID_OK or eleccion is None:
+					return
+				clave, ventana = eleccion
+				try:
+					if ventana is not None:
+						ventana.vista.enfocar()
+					elif clave != ID_ANCLADAS:
+						escritorio = instantanea.escritorio(clave)
+						self.gestor.cambiar_a_escritorio(escritorio.escritorio)
+						wx.CallAfter(ui.message, _describirEscritorio(escritorio.numero, escritorio.nombre))
+				except Exception as e:
+					wx.CallAfter(ui.message, _("Error: {error}").format(error=str(e)))
+			
+			wx.CallAfter(mostrarDialogo)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
 	@scriptHandler.script(
 		description=_("Elimina el escritorio actual"),
 		category=_("Escritorios Virtuales"),
@@ -377,14 +1451,12 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_eliminarEscritorioActual(self, gesture):
 		"""Elimina el escritorio actual"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			escritorios = self.gestor.obtener_escritorios()
-			
-			if len(escritorios) <= 1:
+			if len(self.gestor.obtener_indice_escritorios()) <= 1:
 				ui.message(_("No se puede eliminar el último escritorio"))
 				return
 			
@@ -402,18 +1474,15 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 				
 				if dlg.ShowModal() == wx.ID_YES:
 					try:
-						# Encontrar escritorio de respaldo (el primero que no sea el actual)
-						respaldo = None
-						for escritorio in escritorios:
-							if escritorio.id != actual.id:
-								respaldo = escritorio
-								break
-						
-						if respaldo:
-							actual.eliminar(respaldo=respaldo)
+						# El respaldo es el escritorio vecino, como al eliminar desde Windows
+						resultado = self.gestor.eliminar_escritorios([actual])
+						if resultado.correcto:
 							wx.CallAfter(ui.message, _("Escritorio {numero} eliminado").format(numero=numero_actual))
 						else:
-							wx.CallAfter(ui.message, _("Error: No se encontró escritorio de respaldo"))
+							wx.CallAfter(
+								ui.message,
+								_("Error al eliminar: {error}").format(error=resultado.fallos[0][1])
+							)
 					except Exception as e:
 						wx.CallAfter(ui.message, _("Error al eliminar: {error}").format(error=str(e)))
 				
@@ -429,53 +1498,43 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		gesture="kb:NVDA+control+shift+delete"
 	)
 	def script_eliminarEscritorioEspecifico(self, gesture):
-		"""Abre diálogo para eliminar un escritorio específico"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		"""Abre diálogo para eliminar uno o varios escritorios (por ejemplo 3, 2-4 o 2,5)"""
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			escritorios = self.gestor.obtener_escritorios()
+			total = len(self.gestor.obtener_indice_escritorios())
 			
-			if len(escritorios) <= 1:
+			if total <= 1:
 				ui.message(_("No se puede eliminar el último escritorio"))
 				return
 			
 			def mostrarDialogo():
-				# Diálogo para seleccionar escritorio
+				# Diálogo para seleccionar escritorios
 				dlg = wx.TextEntryDialog(
 					None,
-					_("Introduce el número del escritorio a eliminar (1-{max}):").format(max=len(escritorios)),
+					_("Escritorios a eliminar (1-{max}); admite rangos y listas, por ejemplo 2-4 o 2,5:").format(max=total),
 					_("Eliminar Escritorio")
 				)
 				
 				if dlg.ShowModal() == wx.ID_OK:
 					try:
-						numero = int(dlg.GetValue())
-						if 1 <= numero <= len(escritorios):
-							escritorio_eliminar = escritorios[numero - 1]
-							
+						numeros = _analizarNumeros(dlg.GetValue(), total)
+						if numeros:
 							# Confirmar eliminación
 							dlg2 = wx.MessageDialog(
 								None,
-								_("¿Estás seguro de que quieres eliminar el escritorio {numero}?").format(numero=numero),
+								_("¿Estás seguro de que quieres eliminar {escritorios}?").format(
+									escritorios=_describirNumeros(numeros)
+								),
 								_("Confirmar Eliminación"),
 								wx.YES_NO | wx.NO_DEFAULT | wx.ICON_QUESTION
 							)
 							
 							if dlg2.ShowModal() == wx.ID_YES:
-								# Encontrar escritorio de respaldo
-								respaldo = None
-								for escritorio in escritorios:
-									if escritorio.id != escritorio_eliminar.id:
-										respaldo = escritorio
-										break
-								
-								if respaldo:
-									escritorio_eliminar.eliminar(respaldo=respaldo)
-									wx.CallAfter(ui.message, _("Escritorio {numero} eliminado").format(numero=numero))
-								else:
-									wx.CallAfter(ui.message, _("Error: No se encontró escritorio de respaldo"))
+								resultado = self.gestor.eliminar_escritorios(numeros)
+								self._anunciarEliminacionLote(resultado)
 							
 							dlg2.Destroy()
 						else:
@@ -491,6 +1550,78 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
+	def _anunciarEliminacionLote(self, resultado):
+		"""Anuncia cuántos escritorios se eliminaron y cuántos no"""
+		for elemento, motivo in resultado.fallos:
+			log.debugWarning("Escritorios virtuales: no se eliminó %r: %s", elemento, motivo)
+		if resultado.correcto:
+			mensaje = _("{eliminados} escritorios eliminados").format(eliminados=len(resultado.completados))
+		else:
+			mensaje = _("{eliminados} escritorios eliminados, {fallos} no se pudieron eliminar").format(
+				eliminados=len(resultado.completados), fallos=len(resultado.fallos)
+			)
+		wx.CallAfter(ui.message, mensaje)
+	
+	@scriptHandler.script(
+		description=_("Elimina todos los escritorios que no tienen ventanas"),
+		category=_("Escritorios Virtuales")
+	)
+	def script_eliminarEscritoriosVacios(self, gesture):
+		"""Elimina de una vez los escritorios vacíos (siempre queda al menos uno)"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			resultado = self.gestor.eliminar_escritorios_vacios()
+			if not len(resultado):
+				ui.message(_("No hay escritorios vacíos"))
+				return
+			self._anunciarEliminacionLote(resultado)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Crea varios escritorios virtuales a la vez (abre diálogo)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+n"
+	)
+	def script_crearVariosEscritorios(self, gesture):
+		"""Pide cuántos escritorios crear y los crea en un solo lote"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		def mostrarDialogo():
+			dlg = wx.NumberEntryDialog(
+				gui.mainFrame,
+				_("Número de escritorios nuevos:"),
+				_("Cantidad:"),
+				_("Crear Escritorios"),
+				2, 1, MAXIMO_ESCRITORIOS_LOTE
+			)
+			gui.mainFrame.prePopup()
+			resultado = dlg.ShowModal()
+			gui.mainFrame.postPopup()
+			cantidad = dlg.GetValue()
+			dlg.Destroy()
+			
+			if resultado != wx.ID_OK or cantidad < 1:
+				return
+			try:
+				lote = self.gestor.crear_escritorios(cantidad)
+				if lote.correcto:
+					wx.CallAfter(ui.message, _("{creados} escritorios creados").format(creados=len(lote.completados)))
+				else:
+					wx.CallAfter(
+						ui.message,
+						_("Error al crear escritorios: {error}").format(error=lote.fallos[0][1])
+					)
+			except Exception as e:
+				wx.CallAfter(ui.message, _("Error al crear escritorios: {error}").format(error=str(e)))
+		
+		wx.CallAfter(mostrarDialogo)
+	
 	@scriptHandler.script(
 		description=_("Mueve la ventana actual a un escritorio específico (abre diálogo)"),
 		category=_("Escritorios Virtuales"),
@@ -498,17 +1629,17 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_moverVentanaAEscritorio(self, gesture):
 		"""Abre diálogo para mover ventana a escritorio específico"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			ventana = self.gestor.obtener_ventana_actual()
+			ventana = self._ventanaObjetivo()
 			if not ventana:
 				ui.message(_("No hay ventana enfocada"))
 				return
 			
-			escritorios = self.gestor.obtener_escritorios()
+			escritorios = self.gestor.obtener_indice_escritorios()
 			
 			def mostrarDialogo():
 				dlg = wx.TextEntryDialog(
@@ -521,8 +1652,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 					try:
 						numero = int(dlg.GetValue())
 						if 1 <= numero <= len(escritorios):
-							escritorio_destino = escritorios[numero - 1]
-							ventana.mover_a_escritorio(escritorio_destino)
+							self.gestor.mover_ventana_a_escritorio(ventana, numero)
 							wx.CallAfter(ui.message, _("Ventana movida al escritorio {numero}").format(numero=numero))
 						else:
 							wx.CallAfter(ui.message, _("Número de escritorio inválido"))
@@ -537,6 +1667,312 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		except Exception as e:
 			ui.message(_("Error: {error}").format(error=str(e)))
 	
+	def _pedirEscritorioDestino(self, titulo, alElegir):
+		"""Pide el número del escritorio destino y llama a alElegir(escritorio, numero)"""
+		escritorios = self.gestor.obtener_indice_escritorios()
+		
+		def mostrarDialogo():
+			dlg = wx.TextEntryDialog(
+				gui.mainFrame,
+				_("Introduce el número del escritorio destino (1-{max}):").format(max=len(escritorios)),
+				titulo
+			)
+			gui.mainFrame.prePopup()
+			resultado = dlg.ShowModal()
+			gui.mainFrame.postPopup()
+			valor = dlg.GetValue()
+			dlg.Destroy()
+			
+			if resultado != wx.ID_OK:
+				return
+			try:
+				numero = int(valor)
+			except ValueError:
+				wx.CallAfter(ui.message, _("Debes introducir un número"))
+				return
+			if not 1 <= numero <= len(escritorios):
+				wx.CallAfter(ui.message, _("Número de escritorio inválido"))
+				return
+			try:
+				alElegir(escritorios[numero - 1], numero)
+			except Exception as e:
+				wx.CallAfter(ui.message, _("Error: {error}").format(error=str(e)))
+		
+		wx.CallAfter(mostrarDialogo)
+	
+	def _anunciarMovimientoLote(self, resultado, numero):
+		"""Anuncia cuántas ventanas se movieron y cuántas fallaron"""
+		for elemento, motivo in resultado.fallos:
+			log.debugWarning("Escritorios virtuales: no se movió %r: %s", elemento, motivo)
+		if not len(resultado):
+			mensaje = _("No hay ventanas que mover")
+		elif resultado.correcto:
+			mensaje = _("{movidas} ventanas movidas al escritorio {numero}").format(
+				movidas=len(resultado.completados), numero=numero
+			)
+		else:
+			mensaje = _("{movidas} ventanas movidas al escritorio {numero}, {fallos} no se pudieron mover").format(
+				movidas=len(resultado.completados), numero=numero, fallos=len(resultado.fallos)
+			)
+		wx.CallAfter(ui.message, mensaje)
+	
+	@scriptHandler.script(
+		description=_("Mueve todas las ventanas de la aplicación actual a un escritorio (abre diálogo)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+m"
+	)
+	def script_moverAplicacionAEscritorio(self, gesture):
+		"""Mueve de una vez todas las ventanas de la aplicación enfocada"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			ventana = self._ventanaObjetivo()
+			if not ventana:
+				ui.message(_("No hay ventana enfocada"))
+				return
+			
+			def mover(destino, numero):
+				resultado = self.gestor.mover_ventanas_aplicacion(ventana, destino)
+				self._anunciarMovimientoLote(resultado, numero)
+			
+			self._pedirEscritorioDestino(_("Mover Aplicación a Escritorio"), mover)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Mueve todas las ventanas del escritorio actual a otro escritorio (abre diálogo)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+alt+m"
+	)
+	def script_moverVentanasEscritorio(self, gesture):
+		"""Vacía el escritorio actual llevando sus ventanas a otro"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			origen = self.gestor.obtener_escritorio_actual()
+			
+			def mover(destino, numero):
+				resultado = self.gestor.mover_ventanas_escritorio(origen, destino)
+				self._anunciarMovimientoLote(resultado, numero)
+			
+			self._pedirEscritorioDestino(_("Mover Ventanas del Escritorio"), mover)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Marca o desmarca la ventana actual para moverla junto con otras"),
+		category=_("Escritorios Virtuales")
+	)
+	def script_marcarVentana(self, gesture):
+		"""Añade o quita la ventana enfocada del conjunto de ventanas marcadas"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			ventana = self._ventanaObjetivo()
+			if not ventana or not ventana.hwnd:
+				ui.message(_("No hay ventana enfocada"))
+				return
+			
+			if ventana.hwnd in self._ventanasMarcadas:
+				self._ventanasMarcadas.remove(ventana.hwnd)
+				ui.message(_("Ventana desmarcada, {total} marcadas").format(total=len(self._ventanasMarcadas)))
+			else:
+				self._ventanasMarcadas.append(ventana.hwnd)
+				ui.message(_("Ventana marcada, {total} marcadas").format(total=len(self._ventanasMarcadas)))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Mueve las ventanas marcadas a un escritorio (abre diálogo)"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+k"
+	)
+	def script_moverVentanasMarcadas(self, gesture):
+		"""Mueve de una vez todas las ventanas marcadas y vacía la selección"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		if not self._ventanasMarcadas:
+			ui.message(_("No hay ventanas marcadas"))
+			return
+		
+		try:
+			def mover(destino, numero):
+				marcadas, self._ventanasMarcadas = self._ventanasMarcadas, []
+				resultado = self.gestor.mover_ventanas(marcadas, destino)
+				self._anunciarMovimientoLote(resultado, numero)
+			
+			self._pedirEscritorioDestino(_("Mover Ventanas Marcadas"), mover)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	def _desplazarEscritorioActual(self, desplazamiento):
+		"""Mueve el escritorio actual una posición a la izquierda o a la derecha"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			actual = self.gestor.obtener_escritorio_actual()
+			destino = actual.numero + desplazamiento
+			if not 1 <= destino <= len(self.gestor.obtener_indice_escritorios()):
+				tones.beep(220, 80)
+				return
+			self.gestor.mover_escritorio(actual, destino)
+			ui.message(_("Escritorio movido a la posición {numero}").format(numero=destino))
+		except OperacionNoSoportada:
+			ui.message(_("Esta versión de Windows no permite reordenar escritorios"))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Mueve el escritorio actual una posición a la izquierda"),
+		category=_("Escritorios Virtuales")
+	)
+	def script_moverEscritorioIzquierda(self, gesture):
+		"""Intercambia el escritorio actual con el anterior"""
+		self._desplazarEscritorioActual(-1)
+	
+	@scriptHandler.script(
+		description=_("Mueve el escritorio actual una posición a la derecha"),
+		category=_("Escritorios Virtuales")
+	)
+	def script_moverEscritorioDerecha(self, gesture):
+		"""Intercambia el escritorio actual con el siguiente"""
+		self._desplazarEscritorioActual(1)
+	
+	@scriptHandler.script(
+		description=_("Reordena los escritorios por nombre, por número de ventanas o en un orden indicado (abre diálogo)"),
+		category=_("Escritorios Virtuales")
+	)
+	def script_ordenarEscritorios(self, gesture):
+		"""Abre un diálogo para elegir el nuevo orden de los escritorios"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		if not self.gestor.version.soporta_reordenar():
+			ui.message(_("Esta versión de Windows no permite reordenar escritorios"))
+			return
+		
+		opciones = [
+			_("Por nombre"),
+			_("Por número de ventanas (de más a menos)"),
+			_("En el orden que yo indique"),
+		]
+		
+		def mostrarDialogo():
+			dlg = wx.SingleChoiceDialog(
+				gui.mainFrame, _("¿Cómo quieres ordenar los escritorios?"), _("Ordenar Escritorios"), opciones
+			)
+			gui.mainFrame.prePopup()
+			resultado = dlg.ShowModal()
+			gui.mainFrame.postPopup()
+			eleccion = dlg.GetSelection()
+			dlg.Destroy()
+			
+			if resultado != wx.ID_OK:
+				return
+			try:
+				if eleccion == 0:
+					movimientos = self.gestor.ordenar_escritorios_por_nombre()
+				elif eleccion == 1:
+					movimientos = self.gestor.ordenar_escritorios_por_ventanas()
+				else:
+					movimientos = self._pedirOrdenExplicito()
+					if movimientos is None:
+						return
+				if movimientos:
+					wx.CallAfter(
+						ui.message, _("Escritorios reordenados con {movimientos} movimientos").format(movimientos=movimientos)
+					)
+				else:
+					wx.CallAfter(ui.message, _("Los escritorios ya estaban en ese orden"))
+			except Exception as e:
+				wx.CallAfter(ui.message, _("Error: {error}").format(error=str(e)))
+		
+		wx.CallAfter(mostrarDialogo)
+	
+	def _pedirOrdenExplicito(self):
+		"""Pide los números en el orden deseado (por ejemplo 3,1,2) y reordena; None si se cancela"""
+		escritorios = self.gestor.obtener_indice_escritorios()
+		dlg = wx.TextEntryDialog(
+			gui.mainFrame,
+			_("Números de los escritorios en el nuevo orden, separados por comas (1-{max}). "
+			  "Los que no indiques quedan detrás:").format(max=len(escritorios)),
+			_("Ordenar Escritorios")
+		)
+		gui.mainFrame.prePopup()
+		resultado = dlg.ShowModal()
+		gui.mainFrame.postPopup()
+		valor = dlg.GetValue()
+		dlg.Destroy()
+		
+		if resultado != wx.ID_OK:
+			return None
+		try:
+			numeros = [int(parte) for parte in valor.replace(" ", "").split(",") if parte]
+		except ValueError:
+			wx.CallAfter(ui.message, _("Debes introducir un número"))
+			return None
+		if not numeros or any(not 1 <= numero <= len(escritorios) for numero in numeros):
+			wx.CallAfter(ui.message, _("Número de escritorio inválido"))
+			return None
+		return self.gestor.reordenar_escritorios([escritorios[numero - 1] for numero in numeros])
+	
+	@scriptHandler.script(
+		description=_("Guarda la disposición de escritorios y ventanas"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+shift+s"
+	)
+	def script_guardarDisposicion(self, gesture):
+		"""Guarda cuántos escritorios hay, sus nombres y dónde está cada ventana"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			guardada = self.gestor.guardar_disposicion()
+			ui.message(_("Disposición guardada: {escritorios} escritorios, {ventanas} ventanas").format(
+				escritorios=guardada.cantidad_escritorios, ventanas=len(guardada.ventanas)
+			))
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
+	@scriptHandler.script(
+		description=_("Restaura la disposición de escritorios y ventanas guardada"),
+		category=_("Escritorios Virtuales"),
+		gesture="kb:NVDA+control+alt+s"
+	)
+	def script_restaurarDisposicion(self, gesture):
+		"""Crea los escritorios que falten y devuelve cada ventana reconocida a su escritorio"""
+		if not self._asegurarGestor():
+			ui.message(_("Gestor de escritorios no disponible"))
+			return
+		
+		try:
+			resultado = self.gestor.restaurar_disposicion()
+			for elemento, motivo in resultado.fallos:
+				log.debugWarning("Escritorios virtuales: no se restauró %r: %s", elemento, motivo)
+			if resultado.correcto:
+				mensaje = _("Disposición restaurada: {colocadas} ventanas colocadas").format(
+					colocadas=len(resultado.completados)
+				)
+			else:
+				mensaje = _("Disposición restaurada: {colocadas} ventanas colocadas, {fallos} no se pudieron colocar").format(
+					colocadas=len(resultado.completados), fallos=len(resultado.fallos)
+				)
+			ui.message(mensaje)
+		except Exception as e:
+			ui.message(_("Error: {error}").format(error=str(e)))
+	
 	@scriptHandler.script(
 		description=_("Cuenta las ventanas en el escritorio actual"),
 		category=_("Escritorios Virtuales"),
@@ -544,20 +1980,19 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	)
 	def script_contarVentanas(self, gesture):
 		"""Cuenta las ventanas en el escritorio actual"""
-		if not LIBRERIA_DISPONIBLE or not self.gestor:
+		if not self._asegurarGestor():
 			ui.message(_("Gestor de escritorios no disponible"))
 			return
 		
 		try:
-			actual = self.gestor.obtener_escritorio_actual()
-			ventanas = actual.obtener_ventanas()
-			ventanas_especificas = [v for v in ventanas if not v.esta_anclada()]
-			ventanas_ancladas = [v for v in ventanas if v.esta_anclada()]
+			# Recuentos mantenidos por eventos; solo se enumera si no están disponibles
+			id_actual = self.gestor.id_escritorio_actual()
+			especificas, ancladas = self.gestor.contar_ventanas(id_actual)
 			
 			mensaje = _("Escritorio {numero}: {especificas} ventanas específicas, {ancladas} ancladas").format(
-				numero=actual.numero,
-				especificas=len(ventanas_especificas),
-				ancladas=len(ventanas_ancladas)
+				numero=self.gestor.numero_escritorio(id_actual),
+				especificas=especificas,
+				ancladas=ancladas
 			)
 			ui.message(mensaje)
 		except Exception as e:
@@ -27,6 +27,13 @@ Uso Básico:
     
     >>> # Anclar una ventana (mostrar en todos los escritorios)
     >>> ventana.anclar()
+    
+    >>> # Recibir los cambios de escritorio (en un hilo propio de la suscripción)
+    >>> from escritorios_virtuales import EscritorioCambiado, GestorEscritorios
+    >>> gestor = GestorEscritorios()
+    >>> gestor.iniciar_notificaciones()
+    >>> suscripcion = gestor.suscribir(print, tipos=[EscritorioCambiado])
+    >>> suscripcion.cancelar()
 
 Para más ejemplos, consulta el directorio ejemplos/.
 """
@@ -35,17 +42,44 @@ __version__ = "1.0.0"
 __author__ = "XeBoLaX"
 __license__ = "MIT"
 
-# Importar clases principales para acceso fácil
-from .nucleo import (
-    EscritorioVirtual,
-    VistaAplicacion,
-    GestorEscritorios,
+# Las excepciones, los lotes y las suscripciones no dependen de la capa COM y se importan de inmediato
+from .excepciones import (
     ExcepcionEVD,
     ErrorInicializacionCOM,
     VersionWindowsNoSoportada,
     OperacionNoSoportada,
+    EscritorioNoEncontrado,
+)
+from .lotes import ResultadoLote
+from .suscripciones import (
+    BusEventos,
+    Suscripcion,
+    EscritorioCambiado,
+    EscritorioCreado,
+    EscritorioEliminado,
+    EscritorioRenombrado,
+    VentanaMovida,
+    VentanaAnclada,
 )
 
+# Las clases principales cargan la capa COM (ctypes, perfiles de interfaces...);
+# se importan la primera vez que se usan para no encarecer la importación del paquete
+_PEREZOSOS = ('EscritorioVirtual', 'VistaAplicacion', 'GestorEscritorios')
+
+
+def __getattr__(nombre):
+    if nombre in _PEREZOSOS:
+        from . import nucleo
+        valor = getattr(nucleo, nombre)
+        globals()[nombre] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_PEREZOSOS))
+
+
 # Exportar símbolos públicos
 __all__ = [
     'EscritorioVirtual',
@@ -55,4 +89,14 @@ __all__ = [
     'ErrorInicializacionCOM',
     'VersionWindowsNoSoportada',
     'OperacionNoSoportada',
+    'EscritorioNoEncontrado',
+    'ResultadoLote',
+    'BusEventos',
+    'Suscripcion',
+    'EscritorioCambiado',
+    'EscritorioCreado',
+    'EscritorioEliminado',
+    'EscritorioRenombrado',
+    'VentanaMovida',
+    'VentanaAnclada',
 ]
@@ -0,0 +1,49 @@
+"""
+Aplicaciones ancladas en todos los escritorios (por AppUserModelID).
+Consultar IsAppIdPinned para cada ventana de un listado repetiría la misma llamada
+por cada ventana de una aplicación; el resultado se guarda por AUMID durante unos
+segundos y los anclajes hechos desde el complemento lo actualizan al momento.
+Cada ventana sigue necesitando su AUMID y, si su aplicación no está anclada, IsViewPinned.
+"""
+
+import time
+from typing import Callable, Dict, Set, Tuple
+
+
+class AplicacionesAncladas:
+    """Caché de IsAppIdPinned por AUMID con vigencia limitada"""
+    
+    def __init__(self, consultar: Callable[[str], bool], vigencia: float = 5.0):
+        self._consultar = consultar
+        self.vigencia = vigencia
+        self._estado: Dict[str, Tuple[bool, float]] = {}
+        # Consultas al shell evitadas y realizadas
+        self.aciertos = 0
+        self.fallos = 0
+    
+    def esta_anclada(self, id_aplicacion: str) -> bool:
+        """Indica si la aplicación está anclada (False si no tiene AUMID)"""
+        if not id_aplicacion:
+            return False
+        ahora = time.monotonic()
+        entrada = self._estado.get(id_aplicacion)
+        if entrada is not None and ahora - entrada[1] < self.vigencia:
+            self.aciertos += 1
+            return entrada[0]
+        self.fallos += 1
+        anclada = bool(self._consultar(id_aplicacion))
+        self._estado[id_aplicacion] = (anclada, ahora)
+        return anclada
+    
+    def anotar(self, id_aplicacion: str, anclada: bool):
+        """Reflejar un anclaje o desanclaje hecho desde el complemento"""
+        self._estado[id_aplicacion] = (anclada, time.monotonic())
+    
+    def invalidar(self):
+        """Descartar todo lo consultado"""
+        self._estado.clear()
+    
+    @property
+    def ancladas(self) -> Set[str]:
+        """AUMID que se sabe que están anclados"""
+        return {id_aplicacion for id_aplicacion, (anclada, _momento) in self._estado.items() if anclada}
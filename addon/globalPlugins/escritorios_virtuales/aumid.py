@@ -0,0 +1,175 @@
+"""
+Nombres visibles de aplicaciones a partir de su AppUserModelID (AUMID).
+Resolverlos en el shell es costoso, así que se guardan en una caché LRU acotada
+que persiste en disco entre sesiones. La caché se descarta cuando cambia la firma
+de aplicaciones instaladas (paquetes, programas y menú Inicio).
+"""
+
+import json
+import os
+import threading
+import time
+import winreg
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_ARCHIVO = 1
+NOMBRE_ARCHIVO = "nombresAplicaciones.json"
+
+# Claves cuya fecha de modificación cambia al instalar o desinstalar aplicaciones
+CLAVES_INSTALACION = (
+    (winreg.HKEY_CURRENT_USER,
+     r"Software\Classes\Local Settings\Software\Microsoft\Windows\CurrentVersion\AppModel\Repository\Packages"),
+    (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Uninstall"),
+    (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"),
+)
+
+# Carpetas del menú Inicio, de donde salen los AUMID de muchas aplicaciones Win32
+CARPETAS_INICIO = (
+    os.path.expandvars(r"%APPDATA%\Microsoft\Windows\Start Menu\Programs"),
+    os.path.expandvars(r"%PROGRAMDATA%\Microsoft\Windows\Start Menu\Programs"),
+)
+
+
+def firma_instalaciones() -> str:
+    """Huella de las aplicaciones instaladas (fechas de modificación de registro y menú Inicio)"""
+    partes = []
+    for raiz, ruta in CLAVES_INSTALACION:
+        try:
+            with winreg.OpenKey(raiz, ruta) as clave:
+                partes.append(str(winreg.QueryInfoKey(clave)[2]))
+        except OSError:
+            partes.append("-")
+    for carpeta in CARPETAS_INICIO:
+        try:
+            partes.append(str(os.stat(carpeta).st_mtime_ns))
+        except OSError:
+            partes.append("-")
+    return ":".join(partes)
+
+
+class NombresAplicaciones:
+    """Caché LRU persistente AUMID → nombre visible"""
+    
+    def __init__(
+        self,
+        directorio: Optional[str] = None,
+        resolver: Optional[Callable[[str], str]] = None,
+        capacidad: int = 512,
+        intervalo_firma: float = 30.0,
+    ):
+        if resolver is None:
+            from .com import obtener_nombre_aplicacion_shell
+            resolver = obtener_nombre_aplicacion_shell
+        self._resolver = resolver
+        self.capacidad = capacidad
+        self.intervalo_firma = intervalo_firma
+        self.ruta = os.path.join(directorio, NOMBRE_ARCHIVO) if directorio else None
+        self._nombres: "OrderedDict[str, str]" = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self._modificado = False
+        self._firma = firma_instalaciones()
+        self._ultima_comprobacion = time.monotonic()
+        # Aciertos y fallos de la caché
+        self.aciertos = 0
+        self.fallos = 0
+        self.cargar()
+    
+    def __len__(self) -> int:
+        return len(self._nombres)
+    
+    def __contains__(self, id_aplicacion: str) -> bool:
+        return id_aplicacion in self._nombres
+    
+    def _comprobar_instalaciones(self):
+        """Descartar la caché si se instalaron o desinstalaron aplicaciones"""
+        ahora = time.monotonic()
+        if ahora - self._ultima_comprobacion < self.intervalo_firma:
+            return
+        self._ultima_comprobacion = ahora
+        firma = firma_instalaciones()
+        if firma != self._firma:
+            logger.debug("Cambiaron las aplicaciones instaladas; se descartan los nombres en caché")
+            self._firma = firma
+            self._nombres.clear()
+            self._modificado = True
+    
+    def obtener(self, id_aplicacion: str) -> str:
+        """Nombre visible de la aplicación ("" si el shell no la conoce)"""
+        if not id_aplicacion:
+            return ""
+        with self._cerrojo:
+            self._comprobar_instalaciones()
+            nombre = self._nombres.get(id_aplicacion)
+            if nombre is not None:
+                self._nombres.move_to_end(id_aplicacion)
+                self.aciertos += 1
+                return nombre
+        
+        self.fallos += 1
+        try:
+            nombre = self._resolver(id_aplicacion)
+        except Exception as e:
+            logger.debug(f"No se pudo resolver el nombre de {id_aplicacion}: {e}")
+            nombre = ""
+        
+        with self._cerrojo:
+            self._nombres[id_aplicacion] = nombre
+            self._nombres.move_to_end(id_aplicacion)
+            while len(self._nombres) > self.capacidad:
+                self._nombres.popitem(last=False)
+            self._modificado = True
+        return nombre
+    
+    def invalidar(self):
+        """Descartar todos los nombres"""
+        with self._cerrojo:
+            self._nombres.clear()
+            self._modificado = True
+    
+    def cargar(self):
+        """Leer la caché del disco si corresponde a las aplicaciones instaladas"""
+        if not self.ruta or not os.path.isfile(self.ruta):
+            return
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError) as e:
+            logger.debug(f"Caché de nombres de aplicaciones ilegible: {e}")
+            return
+        if datos.get("version") != VERSION_ARCHIVO or datos.get("firma") != self._firma:
+            self._modificado = True
+            return
+        # Se guardan de menos a más reciente
+        for id_aplicacion, nombre in datos.get("nombres", [])[-self.capacidad:]:
+            self._nombres[id_aplicacion] = nombre
+    
+    def guardar(self) -> bool:
+        """Escribir la caché en disco si cambió (escritura atómica)"""
+        if not self.ruta or not self._modificado:
+            return False
+        with self._cerrojo:
+            datos = {
+                "version": VERSION_ARCHIVO,
+                "firma": self._firma,
+                "nombres": list(self._nombres.items()),
+            }
+            self._modificado = False
+        temporal = self.ruta + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(datos, archivo, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la caché de nombres de aplicaciones: {e}")
+            self._modificado = True
+            return False
+        return True
+    
+    def estadisticas(self) -> Tuple[int, int, int]:
+        """Entradas, aciertos y fallos de la caché"""
+        return len(self._nombres), self.aciertos, self.fallos
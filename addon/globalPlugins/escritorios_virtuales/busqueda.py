@@ -0,0 +1,164 @@
+"""
+Índice de búsqueda incremental de ventanas.
+Indexa título, AUMID y proceso de cada ventana por trigramas y prefijos de palabra,
+de modo que cada consulta solo revisa los candidatos y no todas las ventanas.
+"""
+
+import re
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_SEPARADORES = re.compile(r"[\W_]+")
+
+
+def normalizar(texto: str) -> str:
+    """Pasar a minúsculas y quitar tildes para comparar sin distinguirlas"""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _trigramas(texto: str) -> Set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _prefijos(texto: str) -> Set[str]:
+    """Prefijos de 1 y 2 caracteres de cada palabra (para consultas cortas)"""
+    prefijos = set()
+    for palabra in _SEPARADORES.split(texto):
+        if palabra:
+            prefijos.add(palabra[:1])
+            prefijos.add(palabra[:2])
+    return prefijos
+
+
+class EntradaBusqueda:
+    """Datos indexados de una ventana"""
+    
+    __slots__ = ("hwnd", "titulo", "id_aplicacion", "proceso", "id_escritorio", "texto")
+    
+    def __init__(self, hwnd: int, titulo: str, id_aplicacion: str, proceso: str, id_escritorio: str):
+        self.hwnd = hwnd
+        self.titulo = titulo
+        self.id_aplicacion = id_aplicacion
+        self.proceso = proceso
+        self.id_escritorio = id_escritorio
+        self.texto = normalizar(" ".join((titulo, id_aplicacion, proceso)))
+    
+    def __repr__(self):
+        return f"EntradaBusqueda(hwnd={self.hwnd}, titulo='{self.titulo}')"
+
+
+class IndiceBusqueda:
+    """Índice invertido de ventanas por trigramas y prefijos de palabra"""
+    
+    def __init__(self):
+        self._entradas: Dict[int, EntradaBusqueda] = {}
+        self._trigramas: Dict[str, Set[int]] = {}
+        self._prefijos: Dict[str, Set[int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entradas)
+    
+    def __contains__(self, hwnd: int) -> bool:
+        return hwnd in self._entradas
+    
+    def obtener(self, hwnd: int) -> Optional[EntradaBusqueda]:
+        """Obtener la entrada indexada de una ventana"""
+        return self._entradas.get(hwnd)
+    
+    def hwnds(self) -> List[int]:
+        """Ventanas presentes en el índice"""
+        return list(self._entradas)
+    
+    def _indexar(self, entrada: EntradaBusqueda):
+        for trigrama in _trigramas(entrada.texto):
+            self._trigramas.setdefault(trigrama, set()).add(entrada.hwnd)
+        for prefijo in _prefijos(entrada.texto):
+            self._prefijos.setdefault(prefijo, set()).add(entrada.hwnd)
+    
+    def _desindexar(self, entrada: EntradaBusqueda):
+        for tabla, claves in ((self._trigramas, _trigramas(entrada.texto)), (self._prefijos, _prefijos(entrada.texto))):
+            for clave in claves:
+                conjunto = tabla.get(clave)
+                if conjunto is not None:
+                    conjunto.discard(entrada.hwnd)
+                    if not conjunto:
+                        del tabla[clave]
+    
+    def agregar(self, hwnd: int, titulo: str, id_aplicacion: str = "", proceso: str = "", id_escritorio: str = ""):
+        """Añadir o reemplazar una ventana en el índice"""
+        self.eliminar(hwnd)
+        entrada = EntradaBusqueda(hwnd, titulo, id_aplicacion, proceso, id_escritorio)
+        self._entradas[hwnd] = entrada
+        self._indexar(entrada)
+    
+    def eliminar(self, hwnd: int):
+        """Quitar una ventana del índice (por ejemplo, al destruirse)"""
+        entrada = self._entradas.pop(hwnd, None)
+        if entrada is not None:
+            self._desindexar(entrada)
+    
+    def actualizar_titulo(self, hwnd: int, titulo: str):
+        """Reindexar una ventana tras un cambio de nombre"""
+        entrada = self._entradas.get(hwnd)
+        if entrada is None or entrada.titulo == titulo:
+            return
+        self.agregar(hwnd, titulo, entrada.id_aplicacion, entrada.proceso, entrada.id_escritorio)
+    
+    def actualizar_escritorio(self, hwnd: int, id_escritorio: str):
+        """Anotar el nuevo escritorio de una ventana (no afecta al texto indexado)"""
+        entrada = self._entradas.get(hwnd)
+        if entrada is not None:
+            entrada.id_escritorio = id_escritorio
+    
+    def reconciliar(
+        self,
+        hwnds_actuales: Iterable[int],
+        resolver: Callable[[int], Optional[Tuple[str, str, str, str]]],
+    ):
+        """Sincronizar con la lista real de ventanas resolviendo solo las nuevas"""
+        actuales = set(hwnds_actuales)
+        for hwnd in [h for h in self._entradas if h not in actuales]:
+            self.eliminar(hwnd)
+        for hwnd in actuales:
+            if hwnd not in self._entradas:
+                datos = resolver(hwnd)
+                if datos is not None:
+                    self.agregar(hwnd, *datos)
+    
+    def _candidatos(self, termino: str) -> Set[int]:
+        if len(termino) < 3:
+            return set(self._prefijos.get(termino, ()))
+        conjuntos = []
+        for trigrama in _trigramas(termino):
+            conjunto = self._trigramas.get(trigrama)
+            if not conjunto:
+                return set()
+            conjuntos.append(conjunto)
+        conjuntos.sort(key=len)
+        candidatos = set(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            candidatos &= conjunto
+        return candidatos
+    
+    def buscar(self, consulta: str, limite: Optional[int] = None) -> List[EntradaBusqueda]:
+        """Buscar ventanas cuyo texto contenga todos los términos de la consulta"""
+        terminos = [t for t in _SEPARADORES.split(normalizar(consulta)) if t]
+        if not terminos:
+            resultados = list(self._entradas.values())
+        else:
+            candidatos: Optional[Set[int]] = None
+            for termino in sorted(terminos, key=len, reverse=True):
+                encontrados = self._candidatos(termino)
+                candidatos = encontrados if candidatos is None else candidatos & encontrados
+                if not candidatos:
+                    return []
+            resultados = [
+                self._entradas[hwnd] for hwnd in candidatos
+                if all(termino in self._entradas[hwnd].texto for termino in terminos)
+            ]
+        
+        # Primero las ventanas cuyo título empieza por el primer término
+        primero = terminos[0] if terminos else ""
+        resultados.sort(key=lambda e: (not normalizar(e.titulo).startswith(primero), e.titulo.casefold()))
+        return resultados[:limite] if limite else resultados
@@ -0,0 +1,57 @@
+"""
+Caché acotada por clave con descarte del elemento usado hace más tiempo (LRU).
+La usan las consultas por hwnd que se repiten en cada cambio de foco; quien la
+alimenta es responsable de invalidar las entradas cuando llegan eventos de ventana.
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+
+class CacheLRU:
+    """Diccionario acotado que descarta primero la entrada menos usada"""
+    
+    def __init__(self, capacidad: int = 512):
+        self.capacidad = max(1, capacidad)
+        self._entradas: "OrderedDict[Hashable, Any]" = OrderedDict()
+        # Aciertos y fallos de la caché
+        self.aciertos = 0
+        self.fallos = 0
+    
+    def __len__(self) -> int:
+        return len(self._entradas)
+    
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._entradas
+    
+    def obtener(self, clave: Hashable, predeterminado: Any = None) -> Any:
+        """Valor en caché, o el predeterminado si no está"""
+        try:
+            valor = self._entradas[clave]
+        except KeyError:
+            self.fallos += 1
+            return predeterminado
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return valor
+    
+    def poner(self, clave: Hashable, valor: Any):
+        """Guardar un valor descartando el menos usado si se supera la capacidad"""
+        self._entradas[clave] = valor
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+    
+    def quitar(self, clave: Hashable) -> Any:
+        """Descartar una entrada (devuelve su valor o None)"""
+        return self._entradas.pop(clave, None)
+    
+    def conservar(self, claves: Iterable[Hashable]):
+        """Descartar las entradas cuyas claves no estén entre las indicadas"""
+        vivas = set(claves)
+        for clave in [clave for clave in self._entradas if clave not in vivas]:
+            del self._entradas[clave]
+    
+    def limpiar(self):
+        """Descartar todas las entradas"""
+        self._entradas.clear()
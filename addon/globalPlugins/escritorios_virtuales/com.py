@@ -5,6 +5,7 @@ Implementación sin dependencias externas (sin comtypes ni pywin32).
 
 import sys
 import ctypes
+import winreg
 from ctypes import (
     Structure, POINTER, pointer, c_void_p, c_ulong, c_ushort, c_ubyte,
     c_uint, c_int, c_ulonglong, c_wchar_p, c_bool, HRESULT, windll
@@ -13,6 +14,11 @@ from ctypes.wintypes import HWND, BOOL, UINT, DWORD, LPVOID, LPCWSTR, INT, RECT,
 from typing import Optional, List, Any
 import logging
 
+from .perfiles import (
+    PerfilInterfaces, TiposInterfaces, candidatos, guardar_perfil, leer_perfil_guardado,
+    perfil_para_compilacion, tipos_interfaces
+)
+
 logger = logging.getLogger(__name__)
 
 # Constantes COM
@@ -27,6 +33,15 @@ ole32 = windll.ole32
 user32 = windll.user32
 combase = windll.combase
 
+# Prototipos propios de HSTRING (el restype por defecto truncaría punteros de 64 bits)
+_WindowsCreateString = ctypes.WINFUNCTYPE(ctypes.c_long, c_wchar_p, c_uint, POINTER(c_void_p))(
+    ("WindowsCreateString", combase)
+)
+_WindowsGetStringRawBuffer = ctypes.WINFUNCTYPE(c_void_p, c_void_p, POINTER(c_uint))(
+    ("WindowsGetStringRawBuffer", combase)
+)
+_WindowsDeleteString = ctypes.WINFUNCTYPE(ctypes.c_long, c_void_p)(("WindowsDeleteString", combase))
+
 
 class GUID(Structure):
     """Estructura GUID de Windows"""
@@ -80,25 +95,14 @@ IID_IApplicationViewCollection = GUID("{1841C6D7-4F9D-42C0-AF41-8747538F10E5}")
 # IVirtualDesktopPinnedApps
 IID_IVirtualDesktopPinnedApps = GUID("{4CE81583-1E4C-4632-A621-07A53543148F}")
 
-# GUIDs de IVirtualDesktop por versión
-GUID_IVirtualDesktop_9000 = GUID("{FF72FFDD-BE7E-43FC-9C03-AD81681E88E4}")
-GUID_IVirtualDesktop_20231 = GUID("{62FDF88B-11CA-4AFB-8BD8-2296DFAE49E2}")
-GUID_IVirtualDesktop_21313 = GUID("{536D3495-B208-4CC9-AE26-DE8111275BF8}")
-GUID_IVirtualDesktop_22621 = GUID("{3F07F4BE-B107-441A-AF0F-39D82529072C}")
-GUID_IVirtualDesktop_22631 = GUID("{3F07F4BE-B107-441A-AF0F-39D82529072C}")
-GUID_IVirtualDesktop_26100 = GUID("{3F07F4BE-B107-441A-AF0F-39D82529072C}")
-
-# GUIDs de IVirtualDesktopManagerInternal por versión
-GUID_IVirtualDesktopManagerInternal_9000 = GUID("{F31574D6-B682-4CDC-BD56-1827860ABEC6}")
-GUID_IVirtualDesktopManagerInternal_20231 = GUID("{094AFE11-44F2-4BA0-976F-29A97E263EE0}")
-GUID_IVirtualDesktopManagerInternal_21313 = GUID("{B2F925B9-5A0F-4D2E-9F4D-2B1507593C10}")
-GUID_IVirtualDesktopManagerInternal_22621 = GUID("{A3175F2D-239C-4BD2-8AA0-EEBA8B0B138E}")
-GUID_IVirtualDesktopManagerInternal_22631 = GUID("{4970BA3D-FD4E-4647-BEA3-D89076EF4B9C}")
-GUID_IVirtualDesktopManagerInternal_26100 = GUID("{53F5CA0B-158F-4124-900C-057158060B27}")
+# IShellItem y carpeta conocida de aplicaciones (shell:AppsFolder)
+IID_IShellItem = GUID("{43826D1E-E718-42EE-BC55-A1E261C37BFE}")
+FOLDERID_AppsFolder = GUID("{1E87508D-89C2-42F0-8A7E-645A0F50CA58}")
+SIGDN_NORMALDISPLAY = 0
 
 
 class VersionWindows:
-    """Detecta la versión de Windows y selecciona GUIDs apropiados"""
+    """Detecta la versión de Windows y selecciona el perfil de interfaces en el registro"""
     
     def __init__(self):
         info_version = sys.getwindowsversion()
@@ -106,39 +110,49 @@ class VersionWindows:
         self.menor = info_version.minor
         self.compilacion = info_version.build
         
-        logger.info(f"Versión de Windows detectada: {self.mayor}.{self.menor}.{self.compilacion}")
+        self.ubr = self._leer_ubr()
         
-        # Determinar versión y GUIDs
-        if self.compilacion >= 26100:
-            self.nombre_version = "26100+"
-            self.guid_escritorio = GUID_IVirtualDesktop_26100
-            self.guid_gestor = GUID_IVirtualDesktopManagerInternal_26100
-        elif self.compilacion >= 22631:
-            self.nombre_version = "22631+"
-            self.guid_escritorio = GUID_IVirtualDesktop_22631
-            self.guid_gestor = GUID_IVirtualDesktopManagerInternal_22631
-        elif self.compilacion >= 22621:
-            self.nombre_version = "22621+"
-            self.guid_escritorio = GUID_IVirtualDesktop_22621
-            self.guid_gestor = GUID_IVirtualDesktopManagerInternal_22621
-        elif self.compilacion >= 21313:
-            self.nombre_version = "21313+"
-            self.guid_escritorio = GUID_IVirtualDesktop_21313
-            self.guid_gestor = GUID_IVirtualDesktopManagerInternal_21313
-        elif self.compilacion >= 20231:
-            self.nombre_version = "20231+"
-            self.guid_escritorio = GUID_IVirtualDesktop_20231
-            self.guid_gestor = GUID_IVirtualDesktopManagerInternal_20231
-        else:
-            self.nombre_version = "9000+"
-            self.guid_escritorio = GUID_IVirtualDesktop_9000
-            self.guid_gestor = GUID_IVirtualDesktopManagerInternal_9000
+        logger.info(f"Versión de Windows detectada: {self.mayor}.{self.menor}.{self.compilacion}.{self.ubr}")
         
-        logger.info(f"Usando perfil de versión: {self.nombre_version}")
+        # Perfil previsto por la compilación (búsqueda binaria); el sondeo puede cambiarlo
+        self.usar_perfil(perfil_para_compilacion(self.compilacion))
+    
+    @staticmethod
+    def _leer_ubr() -> int:
+        """Revisión de actualización (UBR) de la compilación, 0 si no se puede leer"""
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows NT\CurrentVersion") as clave:
+                return int(winreg.QueryValueEx(clave, "UBR")[0])
+        except (OSError, ValueError):
+            return 0
+    
+    def usar_perfil(self, perfil: PerfilInterfaces):
+        """Adoptar un perfil de interfaces"""
+        self.perfil = perfil
+        self.nombre_version = self.perfil.nombre
+        self.guid_escritorio = GUID(self.perfil.guid_escritorio)
+        self.guid_gestor = GUID(self.perfil.guid_gestor)
+        # Los métodos del gestor de Windows 11 21H2 reciben un HMONITOR
+        self.con_monitor = self.perfil.con_monitor
+        
+        # Interfaz y ranura de vtable de GetName / SetName (None si no hay nombres)
+        guid_nombre, self.ranura_obtener_nombre, guid_renombrar, self.ranura_renombrar = \
+            self.perfil.interfaces_nombres()
+        self.guid_escritorio_nombre: Optional[GUID] = GUID(guid_nombre) if guid_nombre else None
+        self.guid_gestor_nombre: Optional[GUID] = GUID(guid_renombrar) if guid_renombrar else None
+    
+    @property
+    def tipos(self) -> TiposInterfaces:
+        """Estructuras de vtable del perfil (se generan la primera vez)"""
+        return tipos_interfaces(self.perfil)
     
     def soporta_renombrar(self) -> bool:
-        """Renombrar escritorios soportado desde build 19041"""
-        return self.compilacion >= 19041
+        """Renombrar escritorios soportado desde build 19041 (el perfil declara SetName)"""
+        return self.ranura_renombrar is not None
+    
+    def soporta_reordenar(self) -> bool:
+        """Reordenar escritorios soportado desde Windows 11 (el perfil declara MoveDesktop)"""
+        return self.perfil.ranura(self.perfil.metodos_gestor, "MoveDesktop") is not None
     
     def soporta_fondo_pantalla(self) -> bool:
         """Fondo de pantalla por escritorio soportado desde build 21313"""
@@ -167,8 +181,8 @@ class HSTRING:
     
     def crear(self):
         """Crear HSTRING desde string"""
-        resultado = combase.WindowsCreateString(
-            c_wchar_p(self.valor),
+        resultado = _WindowsCreateString(
+            self.valor,
             len(self.valor),
             pointer(self.handle)
         )
@@ -182,7 +196,7 @@ class HSTRING:
             return ""
         
         longitud = c_uint()
-        buffer = combase.WindowsGetStringRawBuffer(self.handle, pointer(longitud))
+        buffer = _WindowsGetStringRawBuffer(self.handle, pointer(longitud))
         if buffer:
             return ctypes.wstring_at(buffer, longitud.value)
         return ""
@@ -190,19 +204,25 @@ class HSTRING:
     def eliminar(self):
         """Liberar HSTRING"""
         if self.handle:
-            combase.WindowsDeleteString(self.handle)
+            _WindowsDeleteString(self.handle)
             self.handle = c_void_p()
     
     def __del__(self):
         self.eliminar()
     
+    @staticmethod
+    def liberar_handle(handle: c_void_p):
+        """Liberar un HSTRING recibido de una llamada COM"""
+        if handle:
+            _WindowsDeleteString(handle)
+    
     @staticmethod
     def desde_handle(handle: c_void_p) -> str:
         """Convertir handle HSTRING a string"""
         if not handle:
             return ""
         longitud = c_uint()
-        buffer = combase.WindowsGetStringRawBuffer(handle, pointer(longitud))
+        buffer = _WindowsGetStringRawBuffer(handle, pointer(longitud))
         if buffer:
             return ctypes.wstring_at(buffer, longitud.value)
         return ""
@@ -296,7 +316,7 @@ IApplicationViewVtbl._fields_ = [
     ("GetViewState", c_void_p),
     ("SetViewState", c_void_p),
     ("GetNeediness", c_void_p),
-    ("GetLastActivationTimestamp", c_void_p),
+    ("GetLastActivationTimestamp", ctypes.WINFUNCTYPE(HRESULT, POINTER(IApplicationView), POINTER(c_ulonglong))),
     ("SetLastActivationTimestamp", c_void_p),
     ("GetVirtualDesktopId", ctypes.WINFUNCTYPE(HRESULT, POINTER(IApplicationView), POINTER(GUID))),
     ("SetVirtualDesktopId", c_void_p),
@@ -322,63 +342,6 @@ IApplicationViewVtbl._fields_ = [
 ]
 
 
-# IVirtualDesktop
-class IVirtualDesktopVtbl(Structure):
-    pass
-
-class IVirtualDesktop(Structure):
-    pass
-
-IVirtualDesktop._fields_ = [("lpVtbl", POINTER(IVirtualDesktopVtbl))]
-
-IVirtualDesktopVtbl._fields_ = [
-    ("QueryInterface", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktop), POINTER(GUID), POINTER(c_void_p))),
-    ("AddRef", ctypes.WINFUNCTYPE(c_ulong, POINTER(IVirtualDesktop))),
-    ("Release", ctypes.WINFUNCTYPE(c_ulong, POINTER(IVirtualDesktop))),
-    ("IsViewVisible", c_void_p),
-    ("GetID", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktop), POINTER(GUID))),
-]
-
-
-# IVirtualDesktopManagerInternal
-class IVirtualDesktopManagerInternalVtbl(Structure):
-    pass
-
-class IVirtualDesktopManagerInternal(Structure):
-    pass
-
-IVirtualDesktopManagerInternal._fields_ = [("lpVtbl", POINTER(IVirtualDesktopManagerInternalVtbl))]
-
-IVirtualDesktopManagerInternalVtbl._fields_ = [
-    ("QueryInterface", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(GUID), POINTER(c_void_p))),
-    ("AddRef", ctypes.WINFUNCTYPE(c_ulong, POINTER(IVirtualDesktopManagerInternal))),
-    ("Release", ctypes.WINFUNCTYPE(c_ulong, POINTER(IVirtualDesktopManagerInternal))),
-    ("GetCount", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(UINT))),
-    ("MoveViewToDesktop", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(IApplicationView), POINTER(IVirtualDesktop))),
-    ("CanViewMoveDesktops", c_void_p),
-    ("GetCurrentDesktop", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(POINTER(IVirtualDesktop)))),
-    ("GetDesktops", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(POINTER(IObjectArray)))),
-    ("GetAdjacentDesktop", c_void_p),
-    ("SwitchDesktop", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(IVirtualDesktop))),
-    ("SwitchDesktopAndMoveForegroundView", c_void_p),
-    ("CreateDesktopW", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(POINTER(IVirtualDesktop)))),
-    ("MoveDesktop", c_void_p),
-    ("RemoveDesktop", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(IVirtualDesktop), POINTER(IVirtualDesktop))),
-    ("FindDesktop", ctypes.WINFUNCTYPE(HRESULT, POINTER(IVirtualDesktopManagerInternal), POINTER(GUID), POINTER(POINTER(IVirtualDesktop)))),
-    ("GetDesktopSwitchIncludeExcludeViews", c_void_p),
-    ("SetName", c_void_p),
-    ("SetWallpaper", c_void_p),
-    ("SetWallpaperForAllDesktops", c_void_p),
-    ("CopyDesktopState", c_void_p),
-    ("CreateRemoteDesktop", c_void_p),
-    ("pDesktop", c_void_p),
-    ("SwitchRemoteDesktop", c_void_p),
-    ("SwitchDesktopWithAnimation", c_void_p),
-    ("GetLastActiveDesktop", c_void_p),
-    ("WaitForAnimationToComplete", c_void_p),
-]
-
-
 # IApplicationViewCollection
 class IApplicationViewCollectionVtbl(Structure):
     pass
@@ -424,13 +387,81 @@ IVirtualDesktopPinnedAppsVtbl._fields_ = [
 ]
 
 
+# IShellItem
+class IShellItemVtbl(Structure):
+    pass
+
+class IShellItem(Structure):
+    pass
+
+IShellItem._fields_ = [("lpVtbl", POINTER(IShellItemVtbl))]
+
+IShellItemVtbl._fields_ = [
+    ("QueryInterface", ctypes.WINFUNCTYPE(HRESULT, POINTER(IShellItem), POINTER(GUID), POINTER(c_void_p))),
+    ("AddRef", ctypes.WINFUNCTYPE(c_ulong, POINTER(IShellItem))),
+    ("Release", ctypes.WINFUNCTYPE(c_ulong, POINTER(IShellItem))),
+    ("BindToHandler", c_void_p),
+    ("GetParent", c_void_p),
+    ("GetDisplayName", ctypes.WINFUNCTYPE(HRESULT, POINTER(IShellItem), c_int, POINTER(c_void_p))),
+    ("GetAttributes", c_void_p),
+    ("Compare", c_void_p),
+]
+
+
 class GestorCOM:
     """Gestor de inicialización y creación de objetos COM"""
     
-    def __init__(self):
+    def __init__(self, directorio_datos: Optional[str] = None):
         self.inicializado = False
         self.version = VersionWindows()
         self._inicializar_com()
+        # Gestor interno obtenido al sondear, para no pedirlo dos veces
+        self._gestor_sondeado: Optional[c_void_p] = None
+        self._elegir_perfil(directorio_datos)
+    
+    def _elegir_perfil(self, directorio_datos: Optional[str]):
+        """Usar el perfil guardado para esta compilación o sondearlo y guardarlo"""
+        version = self.version
+        guardado = leer_perfil_guardado(directorio_datos, version.compilacion, version.ubr)
+        if guardado is not None:
+            version.usar_perfil(guardado)
+            logger.info(f"Usando perfil de versión guardado: {version.nombre_version}")
+            return
+        
+        perfil = self.sondear_perfil()
+        if perfil is None:
+            logger.warning(f"Ningún perfil respondió; se usa el previsto: {version.nombre_version}")
+            return
+        version.usar_perfil(perfil)
+        guardar_perfil(directorio_datos, version.compilacion, version.ubr, perfil)
+        logger.info(f"Usando perfil de versión sondeado: {version.nombre_version}")
+    
+    def sondear_perfil(self) -> Optional[PerfilInterfaces]:
+        """Probar los IID de cada perfil candidato hasta encontrar el que implementa el shell"""
+        proveedor_servicio = self.obtener_immersive_shell()
+        try:
+            for perfil in candidatos(self.version.compilacion):
+                try:
+                    gestor = self.consultar_servicio(
+                        proveedor_servicio, CLSID_VirtualDesktopManagerInternal, GUID(perfil.guid_gestor)
+                    )
+                except Exception:
+                    continue
+                if perfil.guid_gestor_nombres:
+                    # Los perfiles con interfaces de nombres aparte deben exponerlas también
+                    try:
+                        liberar_puntero(self.consultar_servicio(
+                            proveedor_servicio, CLSID_VirtualDesktopManagerInternal, GUID(perfil.guid_gestor_nombres)
+                        ))
+                    except Exception:
+                        liberar_puntero(gestor)
+                        continue
+                self._gestor_sondeado = gestor
+                return perfil
+        finally:
+            vtbl = proveedor_servicio.contents.lpVtbl.contents
+            vtbl.Release(proveedor_servicio)
+        return None
     
     def _inicializar_com(self):
         """Inicializar COM"""
@@ -485,8 +516,11 @@ class GestorCOM:
         ppv = self.crear_instancia(CLSID_ImmersiveShell, IID_IServiceProvider)
         return ctypes.cast(ppv, POINTER(IServiceProvider))
     
-    def obtener_gestor_escritorios_interno(self) -> POINTER(IVirtualDesktopManagerInternal):
-        """Obtener IVirtualDesktopManagerInternal"""
+    def obtener_gestor_escritorios_interno(self):
+        """Obtener IVirtualDesktopManagerInternal con la vtable del perfil de esta compilación"""
+        if self._gestor_sondeado is not None:
+            ppv, self._gestor_sondeado = self._gestor_sondeado, None
+            return ctypes.cast(ppv, POINTER(self.version.tipos.gestor))
         proveedor_servicio = self.obtener_immersive_shell()
         
         ppv = self.consultar_servicio(
@@ -499,7 +533,7 @@ class GestorCOM:
         vtbl = proveedor_servicio.contents.lpVtbl.contents
         vtbl.Release(proveedor_servicio)
         
-        return ctypes.cast(ppv, POINTER(IVirtualDesktopManagerInternal))
+        return ctypes.cast(ppv, POINTER(self.version.tipos.gestor))
     
     def obtener_coleccion_vistas_aplicacion(self) -> POINTER(IApplicationViewCollection):
         """Obtener IApplicationViewCollection"""
@@ -533,6 +567,21 @@ class GestorCOM:
         
         return ctypes.cast(ppv, POINTER(IVirtualDesktopPinnedApps))
     
+    def obtener_gestor_nombres(self) -> Optional[c_void_p]:
+        """Interfaz del gestor interno que expone SetName en esta compilación"""
+        if self.version.guid_gestor_nombre is None:
+            return None
+        proveedor_servicio = self.obtener_immersive_shell()
+        try:
+            return self.consultar_servicio(
+                proveedor_servicio,
+                CLSID_VirtualDesktopManagerInternal,
+                self.version.guid_gestor_nombre
+            )
+        finally:
+            vtbl = proveedor_servicio.contents.lpVtbl.contents
+            vtbl.Release(proveedor_servicio)
+    
     def liberar_interfaz(self, puntero_interfaz):
         """Liberar referencia a interfaz COM"""
         if puntero_interfaz:
@@ -551,6 +600,56 @@ class GestorCOM:
                 pass
 
 
+def llamar_ranura(interfaz, ranura: int, tipos_argumentos: tuple, *argumentos) -> int:
+    """
+    Llamar al método de la ranura indicada de la vtable de una interfaz.
+    Sirve para métodos cuya posición depende de la compilación de Windows.
+    Devuelve el HRESULT sin convertirlo en excepción.
+    """
+    puntero = ctypes.cast(interfaz, c_void_p)
+    vtbl = ctypes.cast(puntero, POINTER(POINTER(c_void_p))).contents
+    prototipo = ctypes.WINFUNCTYPE(ctypes.c_long, c_void_p, *tipos_argumentos)
+    return prototipo(vtbl[ranura])(puntero, *argumentos) & 0xFFFFFFFF
+
+
+def consultar_interfaz(interfaz, iid: GUID) -> Optional[c_void_p]:
+    """QueryInterface sobre cualquier interfaz; None si no la implementa"""
+    ppv = c_void_p()
+    resultado = llamar_ranura(interfaz, 0, (POINTER(GUID), POINTER(c_void_p)), pointer(iid), pointer(ppv))
+    return ppv if resultado == S_OK and ppv else None
+
+
+def liberar_puntero(puntero: c_void_p):
+    """Release sobre un puntero de interfaz sin tipo"""
+    if puntero:
+        llamar_ranura(puntero, 2, ())
+
+
+def obtener_nombre_aplicacion_shell(id_aplicacion: str) -> str:
+    """Nombre visible de una aplicación en shell:AppsFolder a partir de su AppUserModelID"""
+    if not id_aplicacion:
+        return ""
+    ppv = c_void_p()
+    resultado = windll.shell32.SHCreateItemInKnownFolder(
+        pointer(FOLDERID_AppsFolder), 0, c_wchar_p(id_aplicacion), pointer(IID_IShellItem), pointer(ppv)
+    )
+    if resultado != S_OK or not ppv:
+        return ""
+    
+    elemento = ctypes.cast(ppv, POINTER(IShellItem))
+    vtbl = elemento.contents.lpVtbl.contents
+    try:
+        nombre = c_void_p()
+        if vtbl.GetDisplayName(elemento, SIGDN_NORMALDISPLAY, pointer(nombre)) != S_OK or not nombre:
+            return ""
+        try:
+            return ctypes.wstring_at(nombre.value)
+        finally:
+            ole32.CoTaskMemFree(nombre)
+    finally:
+        vtbl.Release(elemento)
+
+
 def obtener_elementos_array_objetos(array: POINTER(IObjectArray), iid_elemento: GUID) -> List[c_void_p]:
     """Obtener elementos de un IObjectArray"""
     elementos = []
@@ -0,0 +1,154 @@
+"""
+Disposición de escritorios: cuántos hay, sus nombres y en cuál está cada ventana.
+Se guarda en un archivo JSON compacto y versionado; las ventanas se identifican por
+su aplicación (AUMID o ejecutable) y un patrón del título, de modo que tras reiniciar
+se reconocen aunque su hwnd haya cambiado. Restaurar empareja con diccionarios, así
+que el coste es lineal en el número de ventanas.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_ARCHIVO = 1
+NOMBRE_ARCHIVO = "disposicion.json"
+
+# Número de escritorio que representa a las ventanas ancladas
+ANCLADA = 0
+
+_NUMEROS = re.compile(r"\d+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def clave_aplicacion(id_aplicacion: str, ejecutable: str) -> str:
+    """Identificador estable de la aplicación de una ventana (AUMID o nombre del ejecutable)"""
+    return (id_aplicacion or ejecutable or "").casefold()
+
+
+def patron_titulo(titulo: str) -> str:
+    """Título normalizado: sin mayúsculas ni espacios repetidos y con los números como #"""
+    return _NUMEROS.sub("#", _ESPACIOS.sub(" ", titulo.strip()).casefold())
+
+
+class VentanaDisposicion(NamedTuple):
+    """Ventana de una disposición guardada"""
+    aplicacion: str
+    patron: str
+    # Número de escritorio (1-based) o ANCLADA
+    escritorio: int
+
+
+class Disposicion:
+    """Escritorios y ubicación de ventanas en un momento dado"""
+    
+    def __init__(self, nombres: List[str], ventanas: List[VentanaDisposicion]):
+        # Nombre personalizado de cada escritorio, en orden ("" si usa el predeterminado)
+        self.nombres = nombres
+        self.ventanas = ventanas
+    
+    @property
+    def cantidad_escritorios(self) -> int:
+        return len(self.nombres)
+    
+    def a_datos(self) -> dict:
+        """Forma serializable: las aplicaciones se guardan una vez y las ventanas las referencian"""
+        aplicaciones: Dict[str, int] = {}
+        ventanas = []
+        for ventana in self.ventanas:
+            posicion = aplicaciones.setdefault(ventana.aplicacion, len(aplicaciones))
+            ventanas.append([posicion, ventana.patron, ventana.escritorio])
+        return {
+            "version": VERSION_ARCHIVO,
+            "escritorios": self.nombres,
+            "aplicaciones": list(aplicaciones),
+            "ventanas": ventanas,
+        }
+    
+    @classmethod
+    def desde_datos(cls, datos: dict) -> 'Disposicion':
+        """Reconstruir una disposición validando los datos (ValueError si están incompletos o mal formados)"""
+        if not isinstance(datos, dict):
+            raise ValueError("La disposición no es un objeto JSON")
+        if datos.get("version") != VERSION_ARCHIVO:
+            raise ValueError(f"Versión de disposición no soportada: {datos.get('version')}")
+        nombres = datos.get("escritorios", [])
+        aplicaciones = datos.get("aplicaciones", [])
+        filas = datos.get("ventanas", [])
+        if not isinstance(nombres, list) or not all(isinstance(nombre, str) for nombre in nombres):
+            raise ValueError("Lista de escritorios no válida")
+        if not isinstance(aplicaciones, list) or not all(isinstance(aplicacion, str) for aplicacion in aplicaciones):
+            raise ValueError("Lista de aplicaciones no válida")
+        if not isinstance(filas, list):
+            raise ValueError("Lista de ventanas no válida")
+        ventanas = []
+        for fila in filas:
+            if not isinstance(fila, list) or len(fila) != 3:
+                raise ValueError(f"Ventana no válida: {fila!r}")
+            posicion, patron, escritorio = fila
+            if (
+                not isinstance(posicion, int) or not 0 <= posicion < len(aplicaciones)
+                or not isinstance(patron, str) or not isinstance(escritorio, int) or escritorio < ANCLADA
+            ):
+                raise ValueError(f"Ventana no válida: {fila!r}")
+            ventanas.append(VentanaDisposicion(aplicaciones[posicion], patron, escritorio))
+        return cls(list(nombres), ventanas)
+    
+    def guardar(self, ruta: str):
+        """Escribir la disposición en disco (escritura atómica)"""
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+            json.dump(self.a_datos(), archivo, ensure_ascii=False, separators=(",", ":"))
+        os.replace(ruta + ".tmp", ruta)
+    
+    @classmethod
+    def cargar(cls, ruta: str) -> 'Disposicion':
+        """Leer una disposición guardada (OSError o ValueError si no existe o no es válida)"""
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            return cls.desde_datos(json.load(archivo))
+
+
+class Emparejador:
+    """
+    Asigna a cada ventana actual el escritorio de una ventana guardada: primero todas
+    las parejas por aplicación y patrón de título, y después, para las que queden, por
+    aplicación sola. Cada ventana guardada se usa una vez, así que dos ventanas de la
+    misma aplicación vuelven a sus respectivos escritorios.
+    """
+    
+    def __init__(self, ventanas: List[VentanaDisposicion]):
+        self._ventanas = ventanas
+        self._usadas = [False] * len(ventanas)
+        self._por_titulo: Dict[Tuple[str, str], Deque[int]] = {}
+        self._por_aplicacion: Dict[str, Deque[int]] = {}
+        for i, ventana in enumerate(ventanas):
+            self._por_titulo.setdefault((ventana.aplicacion, ventana.patron), deque()).append(i)
+            self._por_aplicacion.setdefault(ventana.aplicacion, deque()).append(i)
+    
+    def _tomar(self, cola: Optional[Deque[int]]) -> Optional[int]:
+        while cola:
+            i = cola.popleft()
+            if not self._usadas[i]:
+                self._usadas[i] = True
+                return i
+        return None
+    
+    def asignar(self, ventanas: List[Tuple[str, str]]) -> List[Optional[int]]:
+        """
+        Número de escritorio guardado (o ANCLADA) para cada ventana (aplicación, título),
+        None si no tiene pareja. Las coincidencias exactas se resuelven antes que las de
+        solo aplicación para que una ventana sin pareja exacta no ocupe la de otra.
+        """
+        asignadas: List[Optional[int]] = [None] * len(ventanas)
+        for posicion, (aplicacion, titulo) in enumerate(ventanas):
+            asignadas[posicion] = self._tomar(self._por_titulo.get((aplicacion, patron_titulo(titulo))))
+        for posicion, (aplicacion, _titulo) in enumerate(ventanas):
+            if asignadas[posicion] is None:
+                asignadas[posicion] = self._tomar(self._por_aplicacion.get(aplicacion))
+        return [self._ventanas[i].escritorio if i is not None else None for i in asignadas]
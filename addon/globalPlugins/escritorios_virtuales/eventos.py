@@ -0,0 +1,230 @@
+"""
+Seguimiento incremental de ventanas mediante eventos de accesibilidad (WinEvents).
+SetWinEventHook avisa de altas, bajas, cambios de visibilidad, de nombre y de primer
+plano; los eventos se filtran a ventanas de nivel superior y se agrupan por hwnd
+durante un breve intervalo, de modo que una ráfaga se procesa una sola vez.
+"""
+
+import ctypes
+from ctypes.wintypes import BOOL, DWORD, HANDLE, HWND, LONG, UINT
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+EVENT_OBJECT_CLOAKED = 0x8017
+EVENT_OBJECT_UNCLOAKED = 0x8018
+
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_ROOT = 2
+
+# Rangos de eventos vigilados (cada rango es un gancho)
+RANGOS_EVENTOS = (
+    (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+    (EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE),
+    (EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE),
+    (EVENT_OBJECT_CLOAKED, EVENT_OBJECT_UNCLOAKED),
+)
+
+# Cambios pendientes de una ventana (se combinan mientras dura la agrupación)
+CAMBIO_ESTADO = 0x1
+CAMBIO_TITULO = 0x2
+CAMBIO_DESTRUIDA = 0x4
+
+# Clave de las ventanas ancladas en los recuentos por escritorio
+ANCLADAS = None
+
+user32 = ctypes.windll.user32
+
+WINEVENTPROC = ctypes.WINFUNCTYPE(None, HANDLE, DWORD, HWND, LONG, LONG, DWORD, DWORD)
+TIMERPROC = ctypes.WINFUNCTYPE(None, HWND, UINT, ctypes.c_size_t, DWORD)
+
+_SetWinEventHook = ctypes.WINFUNCTYPE(HANDLE, DWORD, DWORD, HANDLE, WINEVENTPROC, DWORD, DWORD, DWORD)(
+    ("SetWinEventHook", user32)
+)
+_UnhookWinEvent = ctypes.WINFUNCTYPE(BOOL, HANDLE)(("UnhookWinEvent", user32))
+_SetTimer = ctypes.WINFUNCTYPE(ctypes.c_size_t, HWND, ctypes.c_size_t, UINT, TIMERPROC)(("SetTimer", user32))
+_KillTimer = ctypes.WINFUNCTYPE(BOOL, HWND, ctypes.c_size_t)(("KillTimer", user32))
+_GetAncestor = ctypes.WINFUNCTYPE(HWND, HWND, UINT)(("GetAncestor", user32))
+_IsWindow = ctypes.WINFUNCTYPE(BOOL, HWND)(("IsWindow", user32))
+
+
+class EstadoVentanas:
+    """Escritorio de cada ventana visible, recuentos por escritorio y ventana en primer plano"""
+    
+    def __init__(self):
+        self._ventanas: Dict[int, Optional[str]] = {}
+        self._cuentas: Dict[Optional[str], int] = {}
+        self.primer_plano = 0
+        # Falso hasta la primera sincronización completa
+        self.sincronizado = False
+    
+    def __len__(self) -> int:
+        return len(self._ventanas)
+    
+    def __contains__(self, hwnd: int) -> bool:
+        return hwnd in self._ventanas
+    
+    def escritorio_de(self, hwnd: int) -> Optional[str]:
+        """ID del escritorio de una ventana (ANCLADAS si está anclada)"""
+        return self._ventanas.get(hwnd)
+    
+    def poner(self, hwnd: int, id_escritorio: Optional[str]):
+        """Registrar una ventana o su nuevo escritorio"""
+        if hwnd in self._ventanas:
+            if self._ventanas[hwnd] == id_escritorio:
+                return
+            self.quitar(hwnd)
+        self._ventanas[hwnd] = id_escritorio
+        self._cuentas[id_escritorio] = self._cuentas.get(id_escritorio, 0) + 1
+    
+    def quitar(self, hwnd: int):
+        """Olvidar una ventana cerrada u oculta"""
+        if hwnd not in self._ventanas:
+            return
+        id_escritorio = self._ventanas.pop(hwnd)
+        restantes = self._cuentas.get(id_escritorio, 1) - 1
+        if restantes > 0:
+            self._cuentas[id_escritorio] = restantes
+        else:
+            self._cuentas.pop(id_escritorio, None)
+    
+    def cantidad(self, id_escritorio: Optional[str]) -> int:
+        """Número de ventanas de un escritorio (sin contar las ancladas)"""
+        return self._cuentas.get(id_escritorio, 0)
+    
+    def ventanas(self, id_escritorio: Optional[str]) -> List[int]:
+        """Ventanas de un escritorio"""
+        return [hwnd for hwnd, id_ventana in self._ventanas.items() if id_ventana == id_escritorio]
+    
+    def reemplazar(self, ventanas: Dict[int, Optional[str]]):
+        """Sustituir todo el estado tras una sincronización completa"""
+        self._ventanas = {}
+        self._cuentas = {}
+        for hwnd, id_escritorio in ventanas.items():
+            self.poner(hwnd, id_escritorio)
+        self.sincronizado = True
+
+
+class MonitorEventosVentana:
+    """
+    Ganchos de WinEvents que agrupan los cambios de ventanas de nivel superior.
+    Los ganchos fuera de contexto se atienden en el bucle de mensajes del hilo que
+    los instala, así que debe iniciarse desde el hilo principal (el de los objetos COM).
+    """
+    
+    def __init__(
+        self,
+        al_procesar: Callable[[Dict[int, int]], None],
+        al_primer_plano: Optional[Callable[[int], None]] = None,
+        espera_ms: int = 50,
+    ):
+        self._al_procesar = al_procesar
+        self._al_primer_plano = al_primer_plano
+        self.espera_ms = espera_ms
+        self._ganchos: List[int] = []
+        self._temporizador = 0
+        self._pendientes: Dict[int, int] = {}
+        # Referencias a los callbacks para que ctypes no los libere
+        self._proc_evento = WINEVENTPROC(self._al_evento)
+        self._proc_temporizador = TIMERPROC(self._al_temporizador)
+        # Eventos recibidos y lotes procesados (para medir la agrupación)
+        self.eventos_recibidos = 0
+        self.lotes_procesados = 0
+    
+    @property
+    def activo(self) -> bool:
+        return bool(self._ganchos)
+    
+    def iniciar(self):
+        """Instalar los ganchos de eventos"""
+        if self._ganchos:
+            return
+        for minimo, maximo in RANGOS_EVENTOS:
+            gancho = _SetWinEventHook(
+                minimo, maximo, None, self._proc_evento, 0, 0,
+                WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+            )
+            if gancho:
+                self._ganchos.append(gancho)
+            else:
+                logger.warning(f"No se pudo instalar el gancho de eventos {minimo:#x}-{maximo:#x}")
+        if len(self._ganchos) != len(RANGOS_EVENTOS):
+            # Un seguimiento parcial daría recuentos erróneos
+            self.detener()
+            raise OSError("No se pudieron instalar los ganchos de eventos de ventana")
+    
+    def detener(self):
+        """Quitar los ganchos y descartar los cambios pendientes"""
+        for gancho in self._ganchos:
+            _UnhookWinEvent(gancho)
+        self._ganchos = []
+        if self._temporizador:
+            _KillTimer(None, self._temporizador)
+            self._temporizador = 0
+        self._pendientes.clear()
+    
+    def _al_evento(self, gancho, evento, hwnd, id_objeto, id_hijo, hilo, tiempo):
+        """Filtrar un evento y anotarlo como pendiente (debe ser muy barato)"""
+        if not hwnd or id_objeto != OBJID_WINDOW or id_hijo != CHILDID_SELF:
+            return
+        self.eventos_recibidos += 1
+        
+        if evento == EVENT_OBJECT_DESTROY:
+            # La ventana ya no existe: no se puede comprobar si era de nivel superior
+            cambio = CAMBIO_DESTRUIDA
+        else:
+            if _GetAncestor(hwnd, GA_ROOT) != hwnd:
+                return
+            if evento == EVENT_SYSTEM_FOREGROUND:
+                if self._al_primer_plano is not None:
+                    try:
+                        self._al_primer_plano(hwnd)
+                    except Exception as e:
+                        logger.debug(f"Error procesando primer plano: {e}")
+                return
+            cambio = CAMBIO_TITULO if evento == EVENT_OBJECT_NAMECHANGE else CAMBIO_ESTADO
+        
+        self._pendientes[hwnd] = self._pendientes.get(hwnd, 0) | cambio
+        if not self._temporizador:
+            self._temporizador = _SetTimer(None, 0, self.espera_ms, self._proc_temporizador)
+    
+    def _al_temporizador(self, hwnd, mensaje, id_temporizador, tiempo):
+        _KillTimer(None, id_temporizador)
+        self._temporizador = 0
+        self.procesar_pendientes()
+    
+    def procesar_pendientes(self):
+        """Entregar de una vez todos los cambios acumulados"""
+        if not self._pendientes:
+            return
+        pendientes, self._pendientes = self._pendientes, {}
+        self.lotes_procesados += 1
+        try:
+            self._al_procesar(pendientes)
+        except Exception as e:
+            logger.error(f"Error procesando eventos de ventana: {e}")
+
+
+def clasificar_pendientes(pendientes: Dict[int, int]) -> Tuple[Set[int], Set[int], Set[int]]:
+    """Separar los cambios agrupados en ventanas destruidas, por revisar y con título nuevo"""
+    destruidas, revisar, titulos = set(), set(), set()
+    for hwnd, cambios in pendientes.items():
+        if cambios & CAMBIO_DESTRUIDA and not _IsWindow(hwnd):
+            destruidas.add(hwnd)
+            continue
+        if cambios & (CAMBIO_ESTADO | CAMBIO_DESTRUIDA):
+            revisar.add(hwnd)
+        if cambios & CAMBIO_TITULO:
+            titulos.add(hwnd)
+    return destruidas, revisar, titulos
@@ -0,0 +1,29 @@
+"""
+Excepciones de la librería.
+Viven aparte de la capa COM para poder importarlas sin cargarla.
+"""
+
+
+class ExcepcionEVD(Exception):
+    """Excepción base para errores de Escritorios Virtuales"""
+    pass
+
+
+class ErrorInicializacionCOM(ExcepcionEVD):
+    """Error al inicializar COM"""
+    pass
+
+
+class VersionWindowsNoSoportada(ExcepcionEVD):
+    """Versión de Windows no soportada"""
+    pass
+
+
+class OperacionNoSoportada(ExcepcionEVD):
+    """Operación no soportada en esta versión"""
+    pass
+
+
+class EscritorioNoEncontrado(ExcepcionEVD):
+    """No existe un escritorio con el número o ID indicado"""
+    pass
@@ -0,0 +1,136 @@
+"""
+Historial de escritorios visitados, memoria de foco y ventanas recientes por escritorio.
+Mantiene listas acotadas ordenadas por uso (MRU) con consultas O(1).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+
+class HistorialEscritorios:
+    """Historial acotado de escritorios visitados, del más antiguo al más reciente"""
+    
+    def __init__(self, capacidad: int = 16):
+        self._capacidad = max(2, capacidad)
+        self._visitados: 'OrderedDict[str, None]' = OrderedDict()
+        # Se alimenta desde el hilo de notificaciones y desde el hilo principal
+        self._cerrojo = threading.Lock()
+    
+    def registrar(self, id_escritorio: str):
+        """Registrar una visita al escritorio (pasa a ser el más reciente)"""
+        if not id_escritorio:
+            return
+        with self._cerrojo:
+            if id_escritorio in self._visitados:
+                self._visitados.move_to_end(id_escritorio)
+            else:
+                self._visitados[id_escritorio] = None
+                if len(self._visitados) > self._capacidad:
+                    self._visitados.popitem(last=False)
+    
+    def actual(self) -> Optional[str]:
+        """GUID del escritorio visitado más recientemente"""
+        with self._cerrojo:
+            return next(reversed(self._visitados), None)
+    
+    def anterior(self) -> Optional[str]:
+        """GUID del escritorio visitado antes del actual"""
+        with self._cerrojo:
+            recientes = reversed(self._visitados)
+            next(recientes, None)
+            return next(recientes, None)
+    
+    def eliminar(self, id_escritorio: str):
+        """Quitar un escritorio del historial (por ejemplo, al eliminarlo)"""
+        with self._cerrojo:
+            self._visitados.pop(id_escritorio, None)
+    
+    def podar(self, ids_validos: Iterable[str]):
+        """Quitar del historial los escritorios que ya no existen"""
+        validos = set(ids_validos)
+        with self._cerrojo:
+            for id_escritorio in [i for i in self._visitados if i not in validos]:
+                del self._visitados[id_escritorio]
+    
+    def como_lista(self) -> List[str]:
+        """GUIDs del historial, del más reciente al más antiguo"""
+        with self._cerrojo:
+            return list(reversed(self._visitados))
+    
+    def __len__(self) -> int:
+        return len(self._visitados)
+
+
+class MemoriaFoco:
+    """Última ventana (hwnd) enfocada en cada escritorio, indexada por GUID"""
+    
+    def __init__(self):
+        self._ventanas: Dict[str, int] = {}
+    
+    def registrar(self, id_escritorio: str, hwnd: int):
+        """Anotar la ventana enfocada en un escritorio"""
+        if id_escritorio and hwnd:
+            self._ventanas[id_escritorio] = hwnd
+    
+    def obtener(self, id_escritorio: str) -> Optional[int]:
+        """Última ventana enfocada en el escritorio, si se conoce"""
+        return self._ventanas.get(id_escritorio)
+    
+    def olvidar(self, id_escritorio: str):
+        """Olvidar la ventana recordada para un escritorio"""
+        self._ventanas.pop(id_escritorio, None)
+    
+    def olvidar_ventana(self, hwnd: int):
+        """Olvidar una ventana en todos los escritorios (por ejemplo, al cerrarse)"""
+        for id_escritorio in [i for i, h in self._ventanas.items() if h == hwnd]:
+            del self._ventanas[id_escritorio]
+    
+    def podar(self, ids_validos: Iterable[str]):
+        """Olvidar los escritorios que ya no existen"""
+        validos = set(ids_validos)
+        for id_escritorio in [i for i in self._ventanas if i not in validos]:
+            del self._ventanas[id_escritorio]
+
+
+class VentanasRecientes:
+    """Ventanas (hwnd) de cada escritorio ordenadas por uso, acotadas por escritorio"""
+    
+    def __init__(self, capacidad: int = 64):
+        self._capacidad = max(2, capacidad)
+        self._escritorios: Dict[str, 'OrderedDict[int, None]'] = {}
+    
+    def conoce(self, id_escritorio: str) -> bool:
+        """Indica si el escritorio ya tiene un orden completo (sembrado desde una instantánea)"""
+        return id_escritorio in self._escritorios
+    
+    def registrar(self, id_escritorio: str, hwnd: int):
+        """Anotar que la ventana se acaba de usar en el escritorio"""
+        ventanas = self._escritorios.get(id_escritorio)
+        if ventanas is None or not hwnd:
+            # Sin sembrar, un orden con solo las ventanas enfocadas desde el arranque estaría incompleto
+            return
+        if hwnd in ventanas:
+            ventanas.move_to_end(hwnd)
+            return
+        ventanas[hwnd] = None
+        if len(ventanas) > self._capacidad:
+            ventanas.popitem(last=False)
+    
+    def sembrar(self, id_escritorio: str, hwnds: Iterable[int]):
+        """Sustituir el orden de un escritorio (hwnds de la más a la menos reciente)"""
+        recientes = [hwnd for hwnd in hwnds if hwnd][:self._capacidad]
+        self._escritorios[id_escritorio] = OrderedDict((hwnd, None) for hwnd in reversed(recientes))
+    
+    def obtener(self, id_escritorio: str) -> List[int]:
+        """Ventanas del escritorio, de la más a la menos reciente"""
+        return list(reversed(self._escritorios.get(id_escritorio, ())))
+    
+    def olvidar(self, id_escritorio: str):
+        """Olvidar el orden de un escritorio (por ejemplo, al eliminarlo)"""
+        self._escritorios.pop(id_escritorio, None)
+    
+    def olvidar_ventana(self, hwnd: int):
+        """Quitar una ventana de todos los escritorios (al cerrarse o moverse)"""
+        for ventanas in self._escritorios.values():
+            ventanas.pop(hwnd, None)
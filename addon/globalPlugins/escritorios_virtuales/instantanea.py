@@ -0,0 +1,211 @@
+"""
+Instantáneas del estado de escritorios y ventanas.
+Se construyen con una sola enumeración de vistas; los títulos se resuelven
+bajo demanda para que las listas grandes se puedan mostrar al instante.
+Cada instantánea lleva un número de generación y dos de ellas se pueden
+comparar con diccionarios por GUID y por hwnd (coste lineal).
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .orden import subsecuencia_creciente_maxima
+
+if TYPE_CHECKING:
+    from .nucleo import EscritorioVirtual, VistaAplicacion
+
+
+class VentanaInstantanea:
+    """Ventana capturada en una instantánea"""
+    
+    __slots__ = ("hwnd", "vista", "id_escritorio", "anclada", "activacion")
+    
+    def __init__(self, vista: 'VistaAplicacion', id_escritorio: str, anclada: bool, activacion: int = 0):
+        self.hwnd = vista.hwnd
+        self.vista = vista
+        self.id_escritorio = id_escritorio
+        self.anclada = anclada
+        # Marca de la última activación (0 si no se conoce); mayor es más reciente
+        self.activacion = activacion
+    
+    @property
+    def titulo(self) -> str:
+        """Título de la ventana (se obtiene la primera vez que se consulta)"""
+        return self.vista.titulo
+    
+    def __repr__(self):
+        return f"VentanaInstantanea(hwnd={self.hwnd}, escritorio={self.id_escritorio})"
+
+
+class EscritorioInstantanea:
+    """Escritorio capturado en una instantánea con sus ventanas en orden Z"""
+    
+    __slots__ = ("id", "numero", "nombre", "escritorio", "ventanas")
+    
+    def __init__(self, escritorio: 'EscritorioVirtual', numero: int, nombre: str = ""):
+        self.id = escritorio.id
+        self.numero = numero
+        # Nombre personalizado ("" si usa el predeterminado)
+        self.nombre = nombre
+        self.escritorio = escritorio
+        self.ventanas: List[VentanaInstantanea] = []
+    
+    def recientes(self, ancladas: Optional[List[VentanaInstantanea]] = None) -> List[VentanaInstantanea]:
+        """Ventanas de la más a la menos usada; sin marca de activación se conserva el orden Z"""
+        ventanas = self.ventanas + (ancladas or [])
+        return sorted(ventanas, key=lambda ventana: ventana.activacion, reverse=True)
+    
+    def __repr__(self):
+        return f"EscritorioInstantanea(numero={self.numero}, ventanas={len(self.ventanas)})"
+
+
+class Instantanea:
+    """Estado de todos los escritorios y ventanas en un momento dado"""
+    
+    def __init__(self, escritorios: List[EscritorioInstantanea], id_actual: str, generacion: int = 0):
+        self.escritorios = escritorios
+        self.id_actual = id_actual
+        # Número creciente asignado por el gestor al capturarla
+        self.generacion = generacion
+        # Ventanas ancladas: visibles en todos los escritorios
+        self.ancladas: List[VentanaInstantanea] = []
+        self._por_id: Dict[str, EscritorioInstantanea] = {e.id: e for e in escritorios}
+    
+    def escritorio(self, id_escritorio: str) -> Optional[EscritorioInstantanea]:
+        """Obtener un escritorio de la instantánea por su ID"""
+        return self._por_id.get(id_escritorio)
+    
+    def agregar_ventana(self, ventana: VentanaInstantanea):
+        """Colocar una ventana en su escritorio (o entre las ancladas)"""
+        if ventana.anclada:
+            self.ancladas.append(ventana)
+            return
+        escritorio = self._por_id.get(ventana.id_escritorio)
+        if escritorio is not None:
+            escritorio.ventanas.append(ventana)
+    
+    def quitar_ventana(self, ventana: VentanaInstantanea):
+        """Quitar una ventana de la instantánea (por ejemplo, tras cerrarla)"""
+        grupo = self.ancladas if ventana.anclada else getattr(self._por_id.get(ventana.id_escritorio), "ventanas", [])
+        if ventana in grupo:
+            grupo.remove(ventana)
+    
+    def mover_ventana(self, ventana: VentanaInstantanea, id_escritorio: str, anclada: bool = False):
+        """Reflejar en la instantánea que una ventana cambió de escritorio o de anclaje"""
+        self.quitar_ventana(ventana)
+        ventana.id_escritorio = id_escritorio
+        ventana.anclada = anclada
+        self.agregar_ventana(ventana)
+    
+    def destinos(self) -> List[Tuple[int, str]]:
+        """Número y nombre personalizado ("" si no tiene) de cada escritorio, para elegir un destino"""
+        return [(escritorio.numero, escritorio.nombre) for escritorio in self.escritorios]
+    
+    @property
+    def total_ventanas(self) -> int:
+        return sum(len(e.ventanas) for e in self.escritorios) + len(self.ancladas)
+    
+    def ubicaciones(self) -> Dict[int, Tuple[str, bool]]:
+        """Escritorio y anclaje de cada ventana, por hwnd"""
+        ubicaciones = {ventana.hwnd: (ventana.id_escritorio, True) for ventana in self.ancladas}
+        for escritorio in self.escritorios:
+            for ventana in escritorio.ventanas:
+                ubicaciones[ventana.hwnd] = (escritorio.id, False)
+        return ubicaciones
+    
+    def __repr__(self):
+        return f"Instantanea(generacion={self.generacion}, escritorios={len(self.escritorios)})"
+
+
+class DiferenciaInstantaneas:
+    """Cambios entre dos instantáneas"""
+    
+    __slots__ = (
+        "generacion_anterior", "generacion", "escritorios_agregados", "escritorios_eliminados",
+        "escritorios_reordenados", "escritorios_renombrados", "actual_anterior", "actual",
+        "ventanas_agregadas", "ventanas_eliminadas", "ventanas_movidas", "ventanas_ancladas",
+        "ventanas_desancladas",
+    )
+    
+    def __init__(self, generacion_anterior: int, generacion: int):
+        self.generacion_anterior = generacion_anterior
+        self.generacion = generacion
+        # IDs de escritorio
+        self.escritorios_agregados: List[str] = []
+        self.escritorios_eliminados: List[str] = []
+        # Escritorios que cambiaron de posición respecto a los demás que siguen existiendo
+        # (el mínimo: los que quedan fuera de la subsecuencia creciente más larga)
+        self.escritorios_reordenados: List[str] = []
+        # (ID, nombre anterior, nombre nuevo)
+        self.escritorios_renombrados: List[Tuple[str, str, str]] = []
+        self.actual_anterior = ""
+        self.actual = ""
+        # hwnd de ventanas
+        self.ventanas_agregadas: List[int] = []
+        self.ventanas_eliminadas: List[int] = []
+        # (hwnd, escritorio de origen, escritorio de destino)
+        self.ventanas_movidas: List[Tuple[int, str, str]] = []
+        self.ventanas_ancladas: List[int] = []
+        self.ventanas_desancladas: List[int] = []
+    
+    @property
+    def cambio_actual(self) -> bool:
+        return self.actual != self.actual_anterior
+    
+    @property
+    def vacia(self) -> bool:
+        """Indica si no hubo ningún cambio"""
+        return not (
+            self.cambio_actual or self.escritorios_agregados or self.escritorios_eliminados
+            or self.escritorios_reordenados or self.escritorios_renombrados or self.ventanas_agregadas
+            or self.ventanas_eliminadas or self.ventanas_movidas or self.ventanas_ancladas
+            or self.ventanas_desancladas
+        )
+    
+    def __repr__(self):
+        return (
+            f"DiferenciaInstantaneas({self.generacion_anterior}->{self.generacion}, "
+            f"escritorios=+{len(self.escritorios_agregados)}/-{len(self.escritorios_eliminados)}, "
+            f"ventanas=+{len(self.ventanas_agregadas)}/-{len(self.ventanas_eliminadas)}"
+            f"/~{len(self.ventanas_movidas)})"
+        )
+
+
+def diferenciar(anterior: Instantanea, nueva: Instantanea) -> DiferenciaInstantaneas:
+    """Comparar dos instantáneas en tiempo lineal"""
+    diferencia = DiferenciaInstantaneas(anterior.generacion, nueva.generacion)
+    diferencia.actual_anterior = anterior.id_actual
+    diferencia.actual = nueva.id_actual
+    
+    # Escritorios por GUID
+    antes = {escritorio.id: escritorio for escritorio in anterior.escritorios}
+    despues = {escritorio.id: escritorio for escritorio in nueva.escritorios}
+    diferencia.escritorios_agregados = [id_escritorio for id_escritorio in despues if id_escritorio not in antes]
+    diferencia.escritorios_eliminados = [id_escritorio for id_escritorio in antes if id_escritorio not in despues]
+    # Las altas y bajas desplazan números; solo cuenta el orden relativo de los que siguen
+    rango = {id_escritorio: i for i, id_escritorio in enumerate(e for e in antes if e in despues)}
+    comunes = [id_escritorio for id_escritorio in despues if id_escritorio in rango]
+    estables = subsecuencia_creciente_maxima([rango[id_escritorio] for id_escritorio in comunes])
+    diferencia.escritorios_reordenados = [
+        id_escritorio for i, id_escritorio in enumerate(comunes) if i not in estables
+    ]
+    diferencia.escritorios_renombrados = [
+        (id_escritorio, antes[id_escritorio].nombre, escritorio.nombre)
+        for id_escritorio, escritorio in despues.items()
+        if id_escritorio in antes and antes[id_escritorio].nombre != escritorio.nombre
+    ]
+    
+    # Ventanas por hwnd
+    ubicaciones_antes = anterior.ubicaciones()
+    ubicaciones_despues = nueva.ubicaciones()
+    for hwnd, (id_escritorio, anclada) in ubicaciones_despues.items():
+        previa = ubicaciones_antes.get(hwnd)
+        if previa is None:
+            diferencia.ventanas_agregadas.append(hwnd)
+            continue
+        id_previo, anclada_previa = previa
+        if anclada != anclada_previa:
+            (diferencia.ventanas_ancladas if anclada else diferencia.ventanas_desancladas).append(hwnd)
+        elif not anclada and id_escritorio != id_previo:
+            diferencia.ventanas_movidas.append((hwnd, id_previo, id_escritorio))
+    diferencia.ventanas_eliminadas = [hwnd for hwnd in ubicaciones_antes if hwnd not in ubicaciones_despues]
+    return diferencia
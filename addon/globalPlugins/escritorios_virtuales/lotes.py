@@ -0,0 +1,37 @@
+"""
+Resultados de las operaciones por lotes (mover varias ventanas, crear o eliminar
+varios escritorios). Un fallo en un elemento no detiene el lote: se anota con su
+motivo y la operación continúa con el resto.
+"""
+
+from typing import Any, List, Tuple
+
+
+class ResultadoLote:
+    """Elementos completados y fallidos de una operación por lotes"""
+    
+    __slots__ = ("completados", "fallos")
+    
+    def __init__(self):
+        self.completados: List[Any] = []
+        # Pares (elemento, motivo del fallo)
+        self.fallos: List[Tuple[Any, str]] = []
+    
+    def anotar(self, elemento: Any):
+        """Registrar un elemento procesado correctamente"""
+        self.completados.append(elemento)
+    
+    def anotar_fallo(self, elemento: Any, motivo: str):
+        """Registrar un elemento que no se pudo procesar"""
+        self.fallos.append((elemento, motivo))
+    
+    @property
+    def correcto(self) -> bool:
+        """Indica si todos los elementos se procesaron sin fallos"""
+        return not self.fallos
+    
+    def __len__(self) -> int:
+        return len(self.completados) + len(self.fallos)
+    
+    def __repr__(self):
+        return f"ResultadoLote(completados={len(self.completados)}, fallos={len(self.fallos)})"
@@ -0,0 +1,157 @@
+"""
+Notificaciones del shell sobre cambios de escritorios virtuales.
+Explorer publica en el registro el escritorio actual, el orden de los escritorios
+y sus nombres; se vigila esa clave con RegNotifyChangeKeyValue desde un hilo propio.
+"""
+
+import ctypes
+import threading
+import uuid
+import winreg
+from ctypes.wintypes import BOOL, DWORD, HANDLE, LONG, LPCWSTR, LPVOID
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Claves del registro donde Explorer guarda el estado de los escritorios
+RUTA_ESCRITORIOS = r"Software\Microsoft\Windows\CurrentVersion\Explorer\VirtualDesktops"
+RUTA_SESION = r"Software\Microsoft\Windows\CurrentVersion\Explorer\SessionInfo\{sesion}\VirtualDesktops"
+
+REG_NOTIFY_CHANGE_NAME = 0x1
+REG_NOTIFY_CHANGE_LAST_SET = 0x4
+WAIT_OBJECT_0 = 0x0
+WAIT_FAILED = 0xFFFFFFFF
+INFINITE = 0xFFFFFFFF
+
+kernel32 = ctypes.windll.kernel32
+advapi32 = ctypes.windll.advapi32
+
+# Prototipos propios para no alterar los argtypes compartidos de windll
+_RegNotifyChangeKeyValue = ctypes.WINFUNCTYPE(LONG, HANDLE, BOOL, DWORD, HANDLE, BOOL)(
+    ("RegNotifyChangeKeyValue", advapi32)
+)
+_CreateEventW = ctypes.WINFUNCTYPE(HANDLE, LPVOID, BOOL, BOOL, LPCWSTR)(("CreateEventW", kernel32))
+_SetEvent = ctypes.WINFUNCTYPE(BOOL, HANDLE)(("SetEvent", kernel32))
+_CloseHandle = ctypes.WINFUNCTYPE(BOOL, HANDLE)(("CloseHandle", kernel32))
+_WaitForMultipleObjects = ctypes.WINFUNCTYPE(DWORD, DWORD, ctypes.POINTER(HANDLE), BOOL, DWORD)(
+    ("WaitForMultipleObjects", kernel32)
+)
+_ProcessIdToSessionId = ctypes.WINFUNCTYPE(BOOL, DWORD, ctypes.POINTER(DWORD))(
+    ("ProcessIdToSessionId", kernel32)
+)
+
+
+class EstadoEscritorios(NamedTuple):
+    """Estado de los escritorios según el registro"""
+    actual: str
+    ids: Tuple[str, ...]
+    nombres: Dict[str, str]
+
+
+def guid_desde_bytes(datos: bytes) -> str:
+    """Convertir 16 bytes de GUID al formato de GUID.__str__ ({XXXXXXXX-...})"""
+    return "{" + str(uuid.UUID(bytes_le=bytes(datos))).upper() + "}"
+
+
+def _ruta_sesion() -> Optional[str]:
+    """Ruta de la clave por sesión (Windows 10 guarda ahí el escritorio actual)"""
+    sesion = DWORD()
+    if not _ProcessIdToSessionId(kernel32.GetCurrentProcessId(), ctypes.byref(sesion)):
+        return None
+    return RUTA_SESION.format(sesion=sesion.value)
+
+
+def _leer_binario(ruta: str, valor: str) -> bytes:
+    try:
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, ruta) as clave:
+            datos, tipo = winreg.QueryValueEx(clave, valor)
+    except OSError:
+        return b""
+    return datos if tipo == winreg.REG_BINARY and datos else b""
+
+
+def leer_estado() -> EstadoEscritorios:
+    """Leer del registro el escritorio actual, el orden y los nombres"""
+    datos_ids = _leer_binario(RUTA_ESCRITORIOS, "VirtualDesktopIDs")
+    ids = tuple(guid_desde_bytes(datos_ids[i:i + 16]) for i in range(0, len(datos_ids) - 15, 16))
+    
+    datos_actual = _leer_binario(RUTA_ESCRITORIOS, "CurrentVirtualDesktop")
+    if not datos_actual:
+        ruta_sesion = _ruta_sesion()
+        if ruta_sesion:
+            datos_actual = _leer_binario(ruta_sesion, "CurrentVirtualDesktop")
+    actual = guid_desde_bytes(datos_actual[:16]) if len(datos_actual) >= 16 else ""
+    
+    nombres = {}
+    for id_escritorio in ids:
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, rf"{RUTA_ESCRITORIOS}\Desktops\{id_escritorio}") as clave:
+                nombre, _tipo = winreg.QueryValueEx(clave, "Name")
+        except OSError:
+            continue
+        if nombre:
+            nombres[id_escritorio] = nombre
+    
+    return EstadoEscritorios(actual, ids, nombres)
+
+
+class VigilanteEscritorios(threading.Thread):
+    """Hilo que avisa cuando cambia el estado de los escritorios en el registro"""
+    
+    FILTRO = REG_NOTIFY_CHANGE_NAME | REG_NOTIFY_CHANGE_LAST_SET
+    
+    def __init__(self, al_cambiar: Callable[[EstadoEscritorios, EstadoEscritorios], None]):
+        super().__init__(name="VigilanteEscritorios", daemon=True)
+        self._al_cambiar = al_cambiar
+        self._evento_parada = _CreateEventW(None, True, False, None)
+        self.estado = leer_estado()
+    
+    def run(self):
+        rutas = [RUTA_ESCRITORIOS]
+        ruta_sesion = _ruta_sesion()
+        if ruta_sesion:
+            rutas.append(ruta_sesion)
+        
+        claves = []
+        for ruta in rutas:
+            try:
+                claves.append(winreg.OpenKey(winreg.HKEY_CURRENT_USER, ruta, 0, winreg.KEY_NOTIFY | winreg.KEY_READ))
+            except OSError:
+                logger.debug(f"Clave no disponible para notificaciones: {ruta}")
+        if not claves:
+            logger.warning("No hay claves de escritorios virtuales que vigilar")
+            return
+        
+        eventos = [_CreateEventW(None, False, False, None) for _clave in claves]
+        esperas = (HANDLE * (len(eventos) + 1))(self._evento_parada, *eventos)
+        try:
+            while True:
+                for clave, evento in zip(claves, eventos):
+                    _RegNotifyChangeKeyValue(clave.handle, True, self.FILTRO, evento, True)
+                
+                resultado = _WaitForMultipleObjects(len(esperas), esperas, False, INFINITE)
+                if resultado == WAIT_OBJECT_0 or resultado == WAIT_FAILED:
+                    break
+                
+                nuevo = leer_estado()
+                if nuevo == self.estado:
+                    continue
+                anterior, self.estado = self.estado, nuevo
+                try:
+                    self._al_cambiar(anterior, nuevo)
+                except Exception as e:
+                    logger.error(f"Error procesando notificación de escritorios: {e}")
+        finally:
+            for clave in claves:
+                clave.Close()
+            for evento in eventos:
+                _CloseHandle(evento)
+    
+    def detener(self):
+        """Detener el hilo y liberar recursos"""
+        _SetEvent(self._evento_parada)
+        if self.is_alive():
+            self.join(1.0)
+        if not self.is_alive():
+            _CloseHandle(self._evento_parada)
@@ -4,48 +4,58 @@ Proporciona clases de alto nivel para trabajar con escritorios y ventanas.
 """
 
 import ctypes
-from ctypes import pointer, c_void_p, POINTER
+import os
+import threading
+from ctypes import pointer, c_ulonglong, c_void_p, POINTER
 from ctypes.wintypes import HWND, BOOL, UINT
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, Union
 import logging
 
 from .com import (
-    GestorCOM, VersionWindows, GUID, S_OK,
-    IVirtualDesktop, IApplicationView, IObjectArray,
-    obtener_elementos_array_objetos, user32
+    GestorCOM, VersionWindows, GUID, S_OK, HSTRING,
+    IApplicationView, IObjectArray,
+    obtener_elementos_array_objetos, llamar_ranura, consultar_interfaz, liberar_puntero, user32
+)
+from .historial import HistorialEscritorios, MemoriaFoco, VentanasRecientes
+from .notificaciones import VigilanteEscritorios, EstadoEscritorios
+from .busqueda import IndiceBusqueda
+from .instantanea import (
+    DiferenciaInstantaneas, Instantanea, EscritorioInstantanea, VentanaInstantanea, diferenciar
+)
+from . import procesos
+from .titulos import VIGENCIA_SIN_EVENTOS, CacheTitulos
+from .aumid import NombresAplicaciones
+from .eventos import ANCLADAS, EstadoVentanas, MonitorEventosVentana, clasificar_pendientes
+from .lotes import ResultadoLote
+from .cache import CacheLRU
+from .ancladas import AplicacionesAncladas
+from .orden import completar_orden, planificar_movimientos
+from . import disposicion
+from .suscripciones import (
+    CAPACIDAD_COLA, BusEventos, Evento, Suscripcion, EscritorioCambiado, EscritorioCreado, EscritorioEliminado,
+    EscritorioRenombrado, VentanaAnclada, VentanaMovida
+)
+from .reglas import ANCLAR, MotorReglas, Regla, cargar_reglas, guardar_reglas, validar_regla
+from .excepciones import (
+    ExcepcionEVD, ErrorInicializacionCOM, OperacionNoSoportada, EscritorioNoEncontrado
 )
 
 logger = logging.getLogger(__name__)
 
+GA_ROOT = 2
+WM_CLOSE = 0x0010
 
-class ExcepcionEVD(Exception):
-    """Excepción base para errores de Escritorios Virtuales"""
-    pass
-
-
-class ErrorInicializacionCOM(ExcepcionEVD):
-    """Error al inicializar COM"""
-    pass
-
-
-class VersionWindowsNoSoportada(ExcepcionEVD):
-    """Versión de Windows no soportada"""
-    pass
-
-
-class OperacionNoSoportada(ExcepcionEVD):
-    """Operación no soportada en esta versión"""
-    pass
+# Escritorio de una ventana que no se pudo consultar (ANCLADAS indica una ventana anclada)
+DESCONOCIDO = ""
 
 
 class EscritorioVirtual:
     """Representa un escritorio virtual de Windows"""
     
     def __init__(self, puntero_escritorio: c_void_p, gestor: 'GestorEscritorios'):
-        self._escritorio = ctypes.cast(puntero_escritorio, POINTER(IVirtualDesktop))
+        self._escritorio = ctypes.cast(puntero_escritorio, POINTER(gestor.version.tipos.escritorio))
         self._gestor = gestor
         self._id = None
-        self._numero = None
     
     @property
     def id(self) -> str:
@@ -62,56 +72,38 @@ class EscritorioVirtual:
     
     @property
     def numero(self) -> int:
-        """Obtener número del escritorio (1-based)"""
-        if self._numero is None:
-            escritorios = self._gestor.obtener_escritorios()
-            mi_id = self.id
-            for i, escritorio in enumerate(escritorios, 1):
-                if escritorio.id == mi_id:
-                    self._numero = i
-                    break
-            if self._numero is None:
-                raise ExcepcionEVD("Escritorio no encontrado en la lista")
-        return self._numero
+        """Obtener número del escritorio (1-based) desde el índice en caché"""
+        numero = self._gestor.numero_escritorio(self.id)
+        if numero is None:
+            raise EscritorioNoEncontrado("Escritorio no encontrado en la lista")
+        return numero
+    
+    @property
+    def nombre_personalizado(self) -> str:
+        """Nombre puesto por el usuario ("" si el escritorio usa el predeterminado)"""
+        return self._gestor.nombre_escritorio(self)
     
     @property
     def nombre(self) -> str:
-        """Obtener nombre del escritorio (si está soportado)"""
-        if not self._gestor.version.soporta_renombrar():
-            return f"Escritorio {self.numero}"
-        
-        # En versiones que soportan nombres, el nombre está en la interfaz
-        # Por simplicidad, retornamos el número por ahora
-        return f"Escritorio {self.numero}"
+        """Obtener nombre del escritorio (el personalizado o "Escritorio N")"""
+        return self.nombre_personalizado or f"Escritorio {self.numero}"
     
     def renombrar(self, nuevo_nombre: str):
-        """Renombrar escritorio"""
-        if not self._gestor.version.soporta_renombrar():
-            raise OperacionNoSoportada("Renombrar no soportado en esta versión de Windows")
-        
-        # La implementación completa requeriría IVirtualDesktopManagerInternal2
-        # Por ahora lanzamos excepción
-        raise OperacionNoSoportada("Funcionalidad de renombrar no implementada aún")
+        """Renombrar escritorio (un nombre vacío restaura el predeterminado)"""
+        self._gestor.renombrar_escritorio(self, nuevo_nombre)
     
     def ir(self):
         """Cambiar a este escritorio"""
-        # Llamar AllowSetForegroundWindow para mejor comportamiento de foco
-        user32.AllowSetForegroundWindow(-1)  # ASFW_ANY
-        
-        vtbl = self._gestor.gestor_interno.contents.lpVtbl.contents
-        resultado = vtbl.SwitchDesktop(self._gestor.gestor_interno, self._escritorio)
-        
-        if resultado != S_OK:
-            raise ExcepcionEVD(f"Error al cambiar de escritorio: {resultado:#x}")
+        self._gestor.cambiar_a_escritorio(self)
     
     def eliminar(self, respaldo: Optional['EscritorioVirtual'] = None):
         """Eliminar este escritorio"""
         if respaldo is None:
-            # Usar el primer escritorio como respaldo
-            escritorios = self._gestor.obtener_escritorios()
+            # Usar el escritorio vecino como respaldo, como hace Windows
+            escritorios = self._gestor.obtener_indice_escritorios()
             if len(escritorios) <= 1:
                 raise ExcepcionEVD("No se puede eliminar el último escritorio")
-            respaldo = escritorios[0] if escritorios[0].id != self.id else escritorios[1]
+            respaldo = self._gestor.elegir_respaldo(escritorios, self.numero - 1, {self.id})
         
         vtbl = self._gestor.gestor_interno.contents.lpVtbl.contents
         resultado = vtbl.RemoveDesktop(
@@ -122,6 +114,8 @@ class EscritorioVirtual:
         
         if resultado != S_OK:
             raise ExcepcionEVD(f"Error al eliminar escritorio: {resultado:#x}")
+        
+        self._gestor.quitar_del_indice(self.id, respaldo.id)
     
     def obtener_ventanas(self) -> List['VistaAplicacion']:
         """Obtener ventanas en este escritorio"""
@@ -170,9 +164,10 @@ class VistaAplicacion:
         self._vista = ctypes.cast(puntero_vista, POINTER(IApplicationView))
         self._gestor = gestor
         self._hwnd = None
-        self._titulo = None
         self._id_aplicacion = None
         self._id_escritorio = None
+        self._vista_anclada: Optional[bool] = None
+        self._pid = None
     
     @property
     def hwnd(self) -> int:
@@ -189,20 +184,11 @@ class VistaAplicacion:
     
     @property
     def titulo(self) -> str:
-        """Título de ventana"""
-        if self._titulo is None:
-            hwnd = self.hwnd
-            if hwnd:
-                longitud = user32.GetWindowTextLengthW(hwnd)
-                if longitud > 0:
-                    buffer = ctypes.create_unicode_buffer(longitud + 1)
-                    user32.GetWindowTextW(hwnd, buffer, longitud + 1)
-                    self._titulo = buffer.value
-                else:
-                    self._titulo = ""
-            else:
-                self._titulo = ""
-        return self._titulo
+        """Título de ventana (caché compartida, protegida contra ventanas colgadas)"""
+        hwnd = self.hwnd
+        if not hwnd:
+            return ""
+        return self._gestor.titulos.obtener(hwnd)
     
     @property
     def id_aplicacion(self) -> str:
@@ -220,6 +206,41 @@ class VistaAplicacion:
                 self._id_aplicacion = ""
         return self._id_aplicacion
     
+    @property
+    def pid(self) -> int:
+        """ID del proceso propietario de la ventana"""
+        if self._pid is None:
+            self._pid = procesos.obtener_pid(self.hwnd) if self.hwnd else 0
+        return self._pid
+    
+    @property
+    def proceso(self) -> Optional[procesos.InfoProceso]:
+        """Información del proceso propietario (en caché por PID)"""
+        return self._gestor.procesos.obtener(self.pid)
+    
+    @property
+    def ejecutable(self) -> str:
+        """Nombre del ejecutable propietario (por ejemplo, notepad.exe)"""
+        proceso = self.proceso
+        return proceso.ejecutable if proceso else ""
+    
+    @property
+    def nombre_aplicacion(self) -> str:
+        """Nombre descriptivo de la aplicación (el del shell para su AUMID o la descripción del ejecutable)"""
+        nombre = self._gestor.nombres_aplicaciones.obtener(self.id_aplicacion)
+        if nombre:
+            return nombre
+        proceso = self.proceso
+        return proceso.nombre_aplicacion if proceso else ""
+    
+    @property
+    def marca_activacion(self) -> int:
+        """Marca de la última activación de la ventana (mayor es más reciente; 0 si no se conoce)"""
+        marca = c_ulonglong()
+        vtbl = self._vista.contents.lpVtbl.contents
+        resultado = vtbl.GetLastActivationTimestamp(self._vista, pointer(marca))
+        return marca.value if resultado == S_OK else 0
+    
     @property
     def id_escritorio(self) -> str:
         """ID del escritorio donde está la ventana"""
@@ -240,13 +261,11 @@ class VistaAplicacion:
         if not id_escritorio:
             raise ExcepcionEVD("La ventana no tiene ID de escritorio")
         
-        # Buscar el escritorio con este ID
-        escritorios = self._gestor.obtener_escritorios()
-        for escritorio in escritorios:
-            if escritorio.id == id_escritorio:
-                return escritorio
-        
-        raise ExcepcionEVD(f"Escritorio con ID {id_escritorio} no encontrado")
+        # Buscar el escritorio con este ID en el índice
+        numero = self._gestor.numero_escritorio(id_escritorio)
+        if numero is None:
+            raise EscritorioNoEncontrado(f"Escritorio con ID {id_escritorio} no encontrado")
+        return self._gestor.obtener_escritorio_por_numero(numero)
     
     def mover_a_escritorio(self, escritorio: EscritorioVirtual):
         """Mover ventana a otro escritorio"""
@@ -262,6 +281,7 @@ class VistaAplicacion:
         
         # Invalidar cache
         self._id_escritorio = None
+        self._gestor._anotar_escritorio_ventana(self.hwnd, escritorio.id)
     
     def anclar(self):
         """Anclar ventana (mostrar en todos los escritorios)"""
@@ -270,6 +290,9 @@ class VistaAplicacion:
         
         if resultado != S_OK:
             raise ExcepcionEVD(f"Error al anclar ventana: {resultado:#x}")
+        
+        self._vista_anclada = True
+        self._gestor._anotar_escritorio_ventana(self.hwnd, ANCLADAS)
     
     def desanclar(self):
         """Desanclar ventana"""
@@ -278,34 +301,56 @@ class VistaAplicacion:
         
         if resultado != S_OK:
             raise ExcepcionEVD(f"Error al desanclar ventana: {resultado:#x}")
+        
+        # Al desanclarse la ventana pasa a un escritorio concreto, salvo que su aplicación siga anclada
+        self._vista_anclada = False
+        self._id_escritorio = None
+        self._gestor._anotar_escritorio_ventana(
+            self.hwnd, ANCLADAS if self.aplicacion_anclada else self.id_escritorio
+        )
+    
+    @property
+    def aplicacion_anclada(self) -> bool:
+        """Indica si está anclada toda la aplicación de la ventana (consulta en caché por AUMID)"""
+        return self._gestor.aplicacion_anclada(self.id_aplicacion)
     
     def esta_anclada(self) -> bool:
-        """Verificar si la ventana está anclada"""
-        esta_anclada = BOOL()
-        vtbl = self._gestor.aplicaciones_ancladas.contents.lpVtbl.contents
-        resultado = vtbl.IsViewPinned(
-            self._gestor.aplicaciones_ancladas,
-            self._vista,
-            pointer(esta_anclada)
-        )
-        
-        if resultado == S_OK:
-            return bool(esta_anclada.value)
-        return False
+        """Verificar si la ventana aparece en todos los escritorios (anclada ella o su aplicación)"""
+        # IsAppIdPinned se consulta una vez por aplicación; IsViewPinned solo si la aplicación no está anclada
+        return self.aplicacion_anclada or self.vista_anclada()
+    
+    def vista_anclada(self) -> bool:
+        """Verificar si está anclada esta ventana en concreto (IsViewPinned, una vez por objeto)"""
+        if self._vista_anclada is None:
+            esta_anclada = BOOL()
+            vtbl = self._gestor.aplicaciones_ancladas.contents.lpVtbl.contents
+            resultado = vtbl.IsViewPinned(
+                self._gestor.aplicaciones_ancladas,
+                self._vista,
+                pointer(esta_anclada)
+            )
+            self._vista_anclada = resultado == S_OK and bool(esta_anclada.value)
+        return self._vista_anclada
     
     def enfocar(self):
         """Enfocar ventana"""
-        # Obtener el escritorio de la ventana
-        escritorio_ventana = self.escritorio
-        escritorio_actual = self._gestor.obtener_escritorio_actual()
-        
-        # Si la ventana está en otro escritorio, cambiar primero
-        if escritorio_ventana.id != escritorio_actual.id:
-            escritorio_ventana.ir()
-            # Esperar un momento para que el cambio se complete
-            import time
-            time.sleep(0.3)
+        # Las ventanas ancladas están en todos los escritorios
+        if not self.esta_anclada():
+            # Obtener el escritorio de la ventana
+            escritorio_ventana = self.escritorio
+            escritorio_actual = self._gestor.obtener_escritorio_actual()
+            
+            # Si la ventana está en otro escritorio, cambiar primero
+            if escritorio_ventana.id != escritorio_actual.id:
+                self._gestor.cambiar_a_escritorio(escritorio_ventana, restaurar_foco=False)
+                # Esperar un momento para que el cambio se complete
+                import time
+                time.sleep(0.3)
         
+        self.activar()
+    
+    def activar(self):
+        """Activar la ventana con SwitchTo sin comprobar su escritorio"""
         # Usar SwitchTo en lugar de SetFocus para evitar problemas de permisos
         vtbl = self._vista.contents.lpVtbl.contents
         resultado = vtbl.SwitchTo(self._vista)
@@ -313,6 +358,11 @@ class VistaAplicacion:
         if resultado != S_OK:
             raise ExcepcionEVD(f"Error al enfocar ventana: {resultado:#x}")
     
+    def cerrar(self):
+        """Pedir a la ventana que se cierre (WM_CLOSE), como al pulsar Alt+F4"""
+        if not self.hwnd or not user32.PostMessageW(self.hwnd, WM_CLOSE, 0, 0):
+            raise ExcepcionEVD("Error al cerrar ventana")
+    
     def se_muestra_en_alternador(self) -> bool:
         """Verificar si se muestra en alt-tab"""
         mostrado = UINT()
@@ -339,16 +389,80 @@ class VistaAplicacion:
 class GestorEscritorios:
     """Gestor principal para escritorios virtuales"""
     
-    def __init__(self):
+    def __init__(self, directorio_datos: Optional[str] = None):
         try:
-            self.gestor_com = GestorCOM()
+            # Carpeta de los archivos persistentes (perfil, nombres de aplicaciones, disposición)
+            self.directorio_datos = directorio_datos
+            self.gestor_com = GestorCOM(directorio_datos)
             self.version = self.gestor_com.version
+            # HMONITOR nulo (todos los monitores) en los perfiles cuyo gestor lo requiere
+            self._args_monitor = (None,) if self.version.con_monitor else ()
             
             # Inicializar interfaces COM
             self.gestor_interno = self.gestor_com.obtener_gestor_escritorios_interno()
             self.coleccion_vistas = self.gestor_com.obtener_coleccion_vistas_aplicacion()
             self.aplicaciones_ancladas = self.gestor_com.obtener_aplicaciones_ancladas()
             
+            # Índice de escritorios en caché (orden actual y posición por ID)
+            self._indice: Optional[List[EscritorioVirtual]] = None
+            self._posiciones: Dict[str, int] = {}
+            # Orden de IDs del índice, para reconocer en las notificaciones los cambios propios
+            self._orden_indice: Tuple[str, ...] = ()
+            # Se marca desde el hilo de notificaciones; el índice se reconstruye en el hilo principal
+            self._indice_obsoleto = False
+            
+            # Historial de escritorios visitados y notificaciones del shell
+            self.historial = HistorialEscritorios()
+            self.memoria_foco = MemoriaFoco()
+            # Ventanas de cada escritorio por orden de uso
+            self.recientes = VentanasRecientes()
+            self._id_actual: Optional[str] = None
+            # Destino de un SwitchDesktop propio en curso: el vigilante puede verlo antes que nosotros
+            self._cambio_esperado: Optional[str] = None
+            self._cerrojo_actual = threading.Lock()
+            self._vigilante: Optional[VigilanteEscritorios] = None
+            
+            # Títulos de ventana en caché e índice de búsqueda de todos los escritorios
+            self.titulos = CacheTitulos()
+            # Información de procesos por PID (nombre del ejecutable y de la aplicación)
+            self.procesos = procesos.CacheProcesos()
+            # Nombres visibles por AUMID, persistidos en directorio_datos si se indica
+            self.nombres_aplicaciones = NombresAplicaciones(directorio_datos)
+            self.indice_busqueda = IndiceBusqueda()
+            self._busqueda_sincronizada = False
+            
+            # Suscriptores a los cambios de escritorios y ventanas
+            self.eventos = BusEventos()
+            
+            # Generación de la última instantánea capturada
+            self._generacion = 0
+            
+            # Estado de ventanas mantenido con eventos (WinEvents)
+            self.estado_ventanas = EstadoVentanas()
+            self._monitor: Optional[MonitorEventosVentana] = None
+            # Escritorio de las ventanas que no están en el estado (diálogos, ventanas sin botón
+            # en la barra de tareas); solo se usa con eventos activos, que la invalidan
+            self._ubicaciones = CacheLRU(512)
+            # Vistas ya resueltas por hwnd para las órdenes sobre una ventana concreta
+            self._vistas = CacheLRU(256)
+            
+            # Aplicaciones ancladas por AUMID, en caché para los listados
+            self.anclaje_aplicaciones = AplicacionesAncladas(self._consultar_aplicacion_anclada)
+            
+            # Reglas de colocación automática, evaluadas una vez por ventana nueva
+            try:
+                self.reglas = MotorReglas(cargar_reglas(directorio_datos))
+            except Exception as e:
+                # Unas reglas dañadas no deben impedir que el complemento arranque
+                logger.warning(f"Reglas de colocación descartadas: {e}")
+                self.reglas = MotorReglas()
+            self._ventanas_evaluadas: Set[int] = set()
+            
+            # Nombres de escritorio leídos por COM o puestos desde aquí; con notificaciones
+            # activas se descartan al cambiar los nombres y se usan los del registro
+            self._nombres: Dict[str, str] = {}
+            self._gestor_nombres: Optional[c_void_p] = None
+            
             logger.info("GestorEscritorios inicializado exitosamente")
             
         except Exception as e:
@@ -358,12 +472,16 @@ class GestorEscritorios:
     def obtener_escritorios(self) -> List[EscritorioVirtual]:
         """Obtener lista de todos los escritorios virtuales"""
         escritorios = []
+        self._indice_obsoleto = False
+        if not self.notificaciones_activas:
+            # Sin notificaciones no se sabe si se renombró algún escritorio desde Windows
+            self._nombres = {}
         
         try:
             # Obtener array de escritorios
             puntero_array = POINTER(IObjectArray)()
             vtbl = self.gestor_interno.contents.lpVtbl.contents
-            resultado = vtbl.GetDesktops(self.gestor_interno, pointer(puntero_array))
+            resultado = vtbl.GetDesktops(self.gestor_interno, *self._args_monitor, pointer(puntero_array))
             
             if resultado != S_OK:
                 raise ExcepcionEVD(f"Error al obtener escritorios: {resultado:#x}")
@@ -383,13 +501,498 @@ class GestorEscritorios:
             logger.error(f"Error obteniendo escritorios: {e}")
             raise
         
-        return escritorios
+        self._actualizar_indice(escritorios)
+        return list(escritorios)
+    
+    def _actualizar_indice(self, escritorios: List[EscritorioVirtual]):
+        """Reemplazar el índice en caché por una enumeración nueva"""
+        self._indice = escritorios
+        self._reindexar()
+        self.historial.podar(self._posiciones)
+        self.memoria_foco.podar(self._posiciones)
+    
+    def _reindexar(self):
+        """Recalcular las posiciones tras modificar el índice en caché"""
+        self._posiciones = {escritorio.id: i for i, escritorio in enumerate(self._indice)}
+        self._orden_indice = tuple(self._posiciones)
+    
+    def invalidar_indice(self):
+        """Descartar el índice de escritorios; se reconstruirá en el próximo uso"""
+        self._indice_obsoleto = True
+    
+    def _indice_valido(self) -> bool:
+        """Comprobar que el índice sigue vigente"""
+        if self._indice is None or self._indice_obsoleto:
+            return False
+        if self.notificaciones_activas:
+            # El vigilante marca el índice como obsoleto ante cualquier cambio
+            return True
+        # Sin notificaciones basta una sola llamada (GetCount) para detectar altas y bajas
+        return len(self._indice) == self.obtener_cantidad_escritorios()
+    
+    def obtener_indice_escritorios(self) -> List[EscritorioVirtual]:
+        """Obtener la lista de escritorios desde la caché, enumerando solo si hace falta"""
+        if not self._indice_valido():
+            self.obtener_escritorios()
+        return list(self._indice)
+    
+    def numero_escritorio(self, id_escritorio: str) -> Optional[int]:
+        """Obtener el número (1-based) de un escritorio a partir de su ID"""
+        if not self._indice_valido():
+            self.obtener_escritorios()
+        posicion = self._posiciones.get(id_escritorio)
+        if posicion is None:
+            # Puede que el escritorio sea nuevo y el índice no lo conozca aún
+            self.obtener_escritorios()
+            posicion = self._posiciones.get(id_escritorio)
+        return posicion + 1 if posicion is not None else None
+    
+    def obtener_escritorio_por_numero(self, numero: int) -> EscritorioVirtual:
+        """Obtener un escritorio por su número (1-based) usando el índice en caché"""
+        escritorios = self.obtener_indice_escritorios()
+        if not 1 <= numero <= len(escritorios):
+            raise EscritorioNoEncontrado(f"No existe el escritorio {numero}")
+        return escritorios[numero - 1]
+    
+    def quitar_del_indice(self, id_escritorio: str, id_respaldo: Optional[str] = None):
+        """Actualizar el índice tras eliminar un escritorio sin volver a enumerar"""
+        self.historial.eliminar(id_escritorio)
+        self.memoria_foco.olvidar(id_escritorio)
+        self.recientes.olvidar(id_escritorio)
+        if not self.notificaciones_activas:
+            self.eventos.publicar(EscritorioEliminado(id_escritorio))
+        if id_respaldo is not None:
+            # Las ventanas del escritorio eliminado pasan al de respaldo
+            self._ubicaciones.limpiar()
+            for hwnd in self.estado_ventanas.ventanas(id_escritorio):
+                self._anotar_escritorio_ventana(hwnd, id_respaldo)
+            if self._id_actual == id_escritorio:
+                self._registrar_escritorio_actual(id_respaldo, propio=True)
+        if self._indice is None or id_escritorio not in self._posiciones:
+            self.invalidar_indice()
+            return
+        del self._indice[self._posiciones[id_escritorio]]
+        self._reindexar()
+    
+    @property
+    def notificaciones_activas(self) -> bool:
+        """Indica si se reciben notificaciones del shell sobre los escritorios"""
+        return self._vigilante is not None and self._vigilante.is_alive()
+    
+    def iniciar_notificaciones(self):
+        """Empezar a recibir notificaciones del shell (cambios de escritorio, altas y bajas)"""
+        if self.notificaciones_activas:
+            return
+        self._vigilante = VigilanteEscritorios(self._al_cambiar_estado_shell)
+        if self._vigilante.estado.actual:
+            self._registrar_escritorio_actual(self._vigilante.estado.actual)
+        self._vigilante.start()
+    
+    def detener_notificaciones(self):
+        """Dejar de recibir notificaciones del shell"""
+        if self._vigilante is not None:
+            self._vigilante.detener()
+            self._vigilante = None
+    
+    def _al_cambiar_estado_shell(self, anterior: EstadoEscritorios, nuevo: EstadoEscritorios):
+        """Procesar una notificación del shell (se ejecuta en el hilo del vigilante)"""
+        if nuevo.ids != anterior.ids:
+            # Los cambios hechos por el propio gestor ya están reflejados en el índice
+            if nuevo.ids != self._orden_indice:
+                self.invalidar_indice()
+            self.historial.podar(nuevo.ids)
+            if self.eventos:
+                previos, actuales = set(anterior.ids), set(nuevo.ids)
+                for id_escritorio in nuevo.ids:
+                    if id_escritorio not in previos:
+                        self.eventos.publicar(EscritorioCreado(id_escritorio))
+                for id_escritorio in anterior.ids:
+                    if id_escritorio not in actuales:
+                        self.eventos.publicar(EscritorioEliminado(id_escritorio))
+        if nuevo.nombres != anterior.nombres:
+            self._nombres = {}
+            if self.eventos:
+                for id_escritorio in nuevo.ids:
+                    nombre = nuevo.nombres.get(id_escritorio, "")
+                    if nombre != anterior.nombres.get(id_escritorio, ""):
+                        self.eventos.publicar(EscritorioRenombrado(id_escritorio, nombre))
+        if nuevo.actual and nuevo.actual != anterior.actual:
+            self._registrar_escritorio_actual(nuevo.actual)
+    
+    def nombre_escritorio(self, escritorio: EscritorioVirtual) -> str:
+        """Nombre personalizado de un escritorio, sin llamadas COM si hay notificaciones activas"""
+        id_escritorio = escritorio.id
+        nombre = self._nombres.get(id_escritorio)
+        if nombre is not None:
+            return nombre
+        if self.notificaciones_activas:
+            return self._vigilante.estado.nombres.get(id_escritorio, "")
+        nombre = self._leer_nombre(escritorio)
+        self._nombres[id_escritorio] = nombre
+        return nombre
+    
+    def _leer_nombre(self, escritorio: EscritorioVirtual) -> str:
+        """GetName en la interfaz y ranura propias de esta compilación"""
+        version = self.version
+        if version.ranura_obtener_nombre is None:
+            return ""
+        interfaz = escritorio._escritorio
+        propia = None
+        if str(version.guid_escritorio_nombre) != str(version.guid_escritorio):
+            propia = consultar_interfaz(interfaz, version.guid_escritorio_nombre)
+            if propia is None:
+                return ""
+            interfaz = propia
+        try:
+            handle = c_void_p()
+            resultado = llamar_ranura(interfaz, version.ranura_obtener_nombre, (POINTER(c_void_p),), pointer(handle))
+            if resultado != S_OK:
+                return ""
+            try:
+                return HSTRING.desde_handle(handle)
+            finally:
+                HSTRING.liberar_handle(handle)
+        finally:
+            liberar_puntero(propia)
+    
+    def renombrar_escritorio(self, escritorio: EscritorioVirtual, nombre: str):
+        """Cambiar el nombre de un escritorio (SetName)"""
+        if self.version.ranura_renombrar is None:
+            raise OperacionNoSoportada("Renombrar no soportado en esta versión de Windows")
+        if self._gestor_nombres is None:
+            self._gestor_nombres = self.gestor_com.obtener_gestor_nombres()
+        
+        cadena = HSTRING(nombre)
+        try:
+            resultado = llamar_ranura(
+                self._gestor_nombres, self.version.ranura_renombrar, (c_void_p, c_void_p),
+                ctypes.cast(escritorio._escritorio, c_void_p), cadena.handle
+            )
+        finally:
+            cadena.eliminar()
+        if resultado != S_OK:
+            raise ExcepcionEVD(f"Error al renombrar escritorio: {resultado:#x}")
+        self._nombres[escritorio.id] = nombre
+        if not self.notificaciones_activas:
+            # Con notificaciones el cambio llega del registro
+            self.eventos.publicar(EscritorioRenombrado(escritorio.id, nombre))
+    
+    def _registrar_escritorio_actual(self, id_escritorio: str, propio: bool = False):
+        """Anotar el escritorio actual, alimentar el historial y avisar a los suscriptores"""
+        # El hilo principal y el del vigilante compiten por registrar el mismo cambio
+        with self._cerrojo_actual:
+            if id_escritorio == self._cambio_esperado:
+                self._cambio_esperado = None
+                propio = True
+            if id_escritorio == self._id_actual:
+                return
+            anterior, self._id_actual = self._id_actual, id_escritorio
+            self.historial.registrar(id_escritorio)
+            if anterior:
+                self.eventos.publicar(EscritorioCambiado(anterior, id_escritorio, propio))
+    
+    def sincronizar_escritorio_actual(self) -> str:
+        """Consultar el escritorio actual con una sola llamada y registrarlo en el historial"""
+        id_escritorio = self.obtener_escritorio_actual().id
+        self._registrar_escritorio_actual(id_escritorio)
+        return id_escritorio
+    
+    def id_escritorio_actual(self) -> str:
+        """GUID del escritorio actual, sin llamadas COM si hay notificaciones activas"""
+        if self.notificaciones_activas and self._id_actual:
+            return self._id_actual
+        return self.sincronizar_escritorio_actual()
+    
+    def obtener_escritorio_anterior(self) -> Optional[EscritorioVirtual]:
+        """Obtener el escritorio visitado antes del actual según el historial"""
+        id_anterior = self.historial.anterior()
+        if id_anterior is None:
+            return None
+        numero = self.numero_escritorio(id_anterior)
+        if numero is None:
+            self.historial.eliminar(id_anterior)
+            return None
+        return self.obtener_escritorio_por_numero(numero)
+    
+    def volver_a_escritorio_anterior(self) -> Optional[EscritorioVirtual]:
+        """Cambiar al escritorio visitado anteriormente (alternar entre dos escritorios)"""
+        if not self.notificaciones_activas:
+            # Sin notificaciones el usuario pudo cambiar de escritorio fuera del complemento
+            self.sincronizar_escritorio_actual()
+        escritorio = self.obtener_escritorio_anterior()
+        if escritorio is not None:
+            self.cambiar_a_escritorio(escritorio)
+        return escritorio
+    
+    def cambiar_a_escritorio(self, escritorio: EscritorioVirtual, restaurar_foco: bool = True):
+        """Cambiar al escritorio indicado con una sola llamada a SwitchDesktop"""
+        if restaurar_foco:
+            self._recordar_foco_actual()
+        
+        # Llamar AllowSetForegroundWindow para mejor comportamiento de foco
+        user32.AllowSetForegroundWindow(-1)  # ASFW_ANY
+        
+        # Anotar el destino antes de cambiar, para que el vigilante reconozca el cambio como propio
+        with self._cerrojo_actual:
+            self._cambio_esperado = escritorio.id
+        resultado = None
+        try:
+            vtbl = self.gestor_interno.contents.lpVtbl.contents
+            resultado = vtbl.SwitchDesktop(self.gestor_interno, *self._args_monitor, escritorio._escritorio)
+        finally:
+            if resultado != S_OK:
+                with self._cerrojo_actual:
+                    self._cambio_esperado = None
+        
+        if resultado != S_OK:
+            raise ExcepcionEVD(f"Error al cambiar de escritorio: {resultado:#x}")
+        
+        self._registrar_escritorio_actual(escritorio.id, propio=True)
+        if restaurar_foco:
+            self.restaurar_foco(escritorio.id)
+    
+    def registrar_foco(self, hwnd: int, id_escritorio: Optional[str] = None):
+        """Anotar la ventana enfocada (por ejemplo, desde eventos de foco) para su escritorio"""
+        hwnd = user32.GetAncestor(hwnd, GA_ROOT) or hwnd
+        # Las ventanas ancladas o desconocidas se anotan en el escritorio actual
+        id_escritorio = id_escritorio or self._id_actual
+        if id_escritorio:
+            self.memoria_foco.registrar(id_escritorio, hwnd)
+            self.recientes.registrar(id_escritorio, hwnd)
+    
+    def escritorio_de_ventana(self, hwnd: int) -> Optional[str]:
+        """
+        ID del escritorio de una ventana: ANCLADAS si está anclada y DESCONOCIDO si no se
+        pudo consultar. Con eventos activos sale del estado o de la caché sin llamadas COM;
+        si no, cuesta un GetViewForHwnd y nunca enumera las vistas.
+        """
+        hwnd = user32.GetAncestor(hwnd, GA_ROOT) or hwnd
+        en_cache = self.eventos_ventana_activos and self.estado_ventanas.sincronizado
+        if en_cache:
+            if hwnd in self.estado_ventanas:
+                return self.estado_ventanas.escritorio_de(hwnd)
+            if hwnd in self._ubicaciones:
+                return self._ubicaciones.obtener(hwnd)
+        
+        ventana = self.obtener_ventana_por_hwnd(hwnd)
+        if ventana is None:
+            return DESCONOCIDO
+        try:
+            id_escritorio = ANCLADAS if ventana.esta_anclada() else ventana.id_escritorio
+        except Exception as e:
+            logger.debug(f"No se pudo consultar el escritorio de la ventana: {e}")
+            return DESCONOCIDO
+        if en_cache:
+            self._ubicaciones.poner(hwnd, id_escritorio)
+        return id_escritorio
+    
+    def comprobar_escritorio_primer_plano(self, hwnd: int) -> Optional[str]:
+        """
+        Escritorio de la nueva ventana en primer plano. Sin notificaciones del shell, además,
+        deduce un cambio de escritorio hecho desde Windows comparándolo con el actual en caché.
+        """
+        id_escritorio = self.escritorio_de_ventana(hwnd)
+        # Las ventanas ancladas están en todos los escritorios: no indican nada
+        if id_escritorio and not self.notificaciones_activas and self._id_actual:
+            if id_escritorio != self._id_actual:
+                self._registrar_escritorio_actual(id_escritorio)
+        return id_escritorio
+    
+    def _recordar_foco_actual(self):
+        """Anotar la ventana enfocada del escritorio que se abandona (GetViewInFocus)"""
+        ventana = self.obtener_ventana_actual()
+        if ventana is None or not ventana.hwnd:
+            return
+        try:
+            self.memoria_foco.registrar(self._id_actual or ventana.id_escritorio, ventana.hwnd)
+        except Exception as e:
+            logger.debug(f"No se pudo recordar el foco: {e}")
+    
+    def restaurar_foco(self, id_escritorio: str) -> bool:
+        """Activar la última ventana enfocada en el escritorio indicado, si sigue allí"""
+        hwnd = self.memoria_foco.obtener(id_escritorio)
+        if not hwnd:
+            return False
+        if not user32.IsWindow(hwnd):
+            self.memoria_foco.olvidar_ventana(hwnd)
+            return False
+        
+        ventana = self.obtener_ventana_por_hwnd(hwnd)
+        try:
+            # La ventana pudo moverse a otro escritorio; SwitchTo nos llevaría allí
+            if ventana is None or (ventana.id_escritorio != id_escritorio and not ventana.esta_anclada()):
+                self.memoria_foco.olvidar(id_escritorio)
+                return False
+            ventana.activar()
+        except ExcepcionEVD as e:
+            logger.debug(f"No se pudo restaurar el foco: {e}")
+            return False
+        return True
+    
+    def ir_a_escritorio(self, numero: int) -> EscritorioVirtual:
+        """Cambiar al escritorio con el número indicado (1-based)"""
+        escritorio = self.obtener_escritorio_por_numero(numero)
+        try:
+            self.cambiar_a_escritorio(escritorio)
+        except ExcepcionEVD:
+            # El índice pudo quedar obsoleto (escritorio eliminado fuera del complemento)
+            self.invalidar_indice()
+            escritorio = self.obtener_escritorio_por_numero(numero)
+            self.cambiar_a_escritorio(escritorio)
+        return escritorio
+    
+    def mover_ventana_a_escritorio(self, ventana: 'VistaAplicacion', numero: int) -> EscritorioVirtual:
+        """Mover una ventana al escritorio con el número indicado (1-based)"""
+        escritorio = self.obtener_escritorio_por_numero(numero)
+        try:
+            ventana.mover_a_escritorio(escritorio)
+        except ExcepcionEVD:
+            self.invalidar_indice()
+            escritorio = self.obtener_escritorio_por_numero(numero)
+            ventana.mover_a_escritorio(escritorio)
+        return escritorio
+    
+    def mover_ventanas(
+        self, ventanas: Iterable[Union[VistaAplicacion, int]], destino: EscritorioVirtual
+    ) -> ResultadoLote:
+        """Mover un conjunto de ventanas (vistas o hwnd) a un escritorio en una sola pasada"""
+        resultado = ResultadoLote()
+        vistas = []
+        for ventana in ventanas:
+            if isinstance(ventana, int):
+                vista = self.obtener_ventana_por_hwnd(ventana)
+                if vista is None:
+                    self.notificar_ventana_destruida(ventana)
+                    resultado.anotar_fallo(ventana, "La ventana ya no existe")
+                    continue
+                ventana = vista
+            if ventana.esta_anclada():
+                # Una ventana anclada está en todos los escritorios: no hay nada que mover
+                resultado.anotar_fallo(ventana, "La ventana está anclada")
+                continue
+            vistas.append(ventana)
+        self._mover_vistas(vistas, destino, resultado)
+        return resultado
+    
+    def _mover_vistas(self, vistas: List[VistaAplicacion], destino: EscritorioVirtual, resultado: ResultadoLote):
+        """Mover vistas ya resueltas y no ancladas; las que ya están en el destino cuentan como movidas"""
+        id_destino = destino.id
+        for vista in vistas:
+            try:
+                if vista.id_escritorio != id_destino:
+                    vista.mover_a_escritorio(destino)
+                resultado.anotar(vista)
+            except Exception as e:
+                resultado.anotar_fallo(vista, str(e))
+    
+    @staticmethod
+    def _clave_aplicacion(ventana: VistaAplicacion) -> str:
+        """Clave que agrupa las ventanas de una misma aplicación (AUMID o ruta del ejecutable)"""
+        if ventana.id_aplicacion:
+            return ventana.id_aplicacion.lower()
+        proceso = ventana.proceso
+        return proceso.ruta.lower() if proceso else ""
+    
+    def mover_ventanas_aplicacion(self, ventana: VistaAplicacion, destino: EscritorioVirtual) -> ResultadoLote:
+        """Mover al escritorio indicado todas las ventanas de la aplicación de una ventana"""
+        clave = self._clave_aplicacion(ventana)
+        if not clave:
+            raise ExcepcionEVD("No se pudo identificar la aplicación de la ventana")
+        vistas = []
+        for otra in self.obtener_ventanas():
+            try:
+                if self._clave_aplicacion(otra) == clave and not otra.esta_anclada():
+                    vistas.append(otra)
+            except Exception as e:
+                logger.debug(f"Ventana omitida al agrupar por aplicación: {e}")
+        resultado = ResultadoLote()
+        self._mover_vistas(vistas, destino, resultado)
+        return resultado
+    
+    def mover_ventanas_escritorio(self, origen: EscritorioVirtual, destino: EscritorioVirtual) -> ResultadoLote:
+        """Mover todas las ventanas propias de un escritorio a otro (las ancladas no se tocan)"""
+        resultado = ResultadoLote()
+        id_origen = origen.id
+        if id_origen == destino.id:
+            return resultado
+        
+        vistas = []
+        if self.eventos_ventana_activos and self.estado_ventanas.sincronizado:
+            # El estado por eventos ya sabe qué ventanas hay en el origen: basta resolverlas
+            for hwnd in self.estado_ventanas.ventanas(id_origen):
+                vista = self.obtener_ventana_por_hwnd(hwnd)
+                if vista is None:
+                    self.notificar_ventana_destruida(hwnd)
+                    continue
+                vistas.append(vista)
+        else:
+            for ventana in self.obtener_ventanas():
+                try:
+                    if ventana.id_escritorio == id_origen and not ventana.esta_anclada():
+                        vistas.append(ventana)
+                except Exception as e:
+                    logger.debug(f"Ventana omitida al vaciar el escritorio: {e}")
+        
+        self._mover_vistas(vistas, destino, resultado)
+        return resultado
+    
+    def _consultar_aplicacion_anclada(self, id_aplicacion: str) -> bool:
+        anclada = BOOL()
+        vtbl = self.aplicaciones_ancladas.contents.lpVtbl.contents
+        resultado = vtbl.IsAppIdPinned(self.aplicaciones_ancladas, id_aplicacion, pointer(anclada))
+        return resultado == S_OK and bool(anclada.value)
+    
+    def aplicacion_anclada(self, id_aplicacion: str) -> bool:
+        """Indica si una aplicación (AUMID) está anclada en todos los escritorios"""
+        return self.anclaje_aplicaciones.esta_anclada(id_aplicacion)
+    
+    def anclar_aplicacion(self, id_aplicacion: str):
+        """Mostrar todas las ventanas de una aplicación en todos los escritorios"""
+        if not id_aplicacion:
+            raise OperacionNoSoportada("La ventana no tiene identificador de aplicación")
+        vtbl = self.aplicaciones_ancladas.contents.lpVtbl.contents
+        resultado = vtbl.PinAppID(self.aplicaciones_ancladas, id_aplicacion)
+        if resultado != S_OK:
+            raise ExcepcionEVD(f"Error al anclar la aplicación: {resultado:#x}")
+        self.anclaje_aplicaciones.anotar(id_aplicacion, True)
+        self._resincronizar_tras_anclaje()
+    
+    def desanclar_aplicacion(self, id_aplicacion: str):
+        """Devolver las ventanas de una aplicación a su escritorio"""
+        if not id_aplicacion:
+            raise OperacionNoSoportada("La ventana no tiene identificador de aplicación")
+        vtbl = self.aplicaciones_ancladas.contents.lpVtbl.contents
+        resultado = vtbl.UnpinAppID(self.aplicaciones_ancladas, id_aplicacion)
+        if resultado != S_OK:
+            raise ExcepcionEVD(f"Error al desanclar la aplicación: {resultado:#x}")
+        self.anclaje_aplicaciones.anotar(id_aplicacion, False)
+        self._resincronizar_tras_anclaje()
+    
+    def _resincronizar_tras_anclaje(self):
+        """Anclar una aplicación no genera eventos por ventana: rehacer los recuentos"""
+        self._ubicaciones.limpiar()
+        if self.eventos_ventana_activos:
+            self.resincronizar_ventanas()
+            self._busqueda_sincronizada = False
+    
+    def suscribir(
+        self,
+        al_recibir: Callable[[Evento], None],
+        tipos: Optional[Iterable[Type]] = None,
+        capacidad: int = CAPACIDAD_COLA,
+    ) -> Suscripcion:
+        """
+        Recibir en un hilo propio los cambios de escritorios y ventanas.
+        Los movimientos hechos desde Windows solo se detectan con los eventos de ventana
+        activos, y las altas, bajas y nombres de escritorios, con las notificaciones.
+        """
+        return self.eventos.suscribir(al_recibir, tipos, capacidad)
     
     def obtener_escritorio_actual(self) -> EscritorioVirtual:
         """Obtener escritorio actual"""
-        puntero_escritorio = POINTER(IVirtualDesktop)()
+        puntero_escritorio = POINTER(self.version.tipos.escritorio)()
         vtbl = self.gestor_interno.contents.lpVtbl.contents
-        resultado = vtbl.GetCurrentDesktop(self.gestor_interno, pointer(puntero_escritorio))
+        resultado = vtbl.GetCurrentDesktop(self.gestor_interno, *self._args_monitor, pointer(puntero_escritorio))
         
         if resultado != S_OK:
             raise ExcepcionEVD(f"Error al obtener escritorio actual: {resultado:#x}")
@@ -398,14 +1001,284 @@ class GestorEscritorios:
     
     def crear_escritorio(self) -> EscritorioVirtual:
         """Crear nuevo escritorio virtual"""
-        puntero_escritorio = POINTER(IVirtualDesktop)()
+        puntero_escritorio = POINTER(self.version.tipos.escritorio)()
         vtbl = self.gestor_interno.contents.lpVtbl.contents
-        resultado = vtbl.CreateDesktopW(self.gestor_interno, pointer(puntero_escritorio))
+        resultado = vtbl.CreateDesktopW(self.gestor_interno, *self._args_monitor, pointer(puntero_escritorio))
         
         if resultado != S_OK:
             raise ExcepcionEVD(f"Error al crear escritorio: {resultado:#x}")
         
-        return EscritorioVirtual(ctypes.cast(puntero_escritorio, c_void_p), self)
+        escritorio = EscritorioVirtual(ctypes.cast(puntero_escritorio, c_void_p), self)
+        
+        # Los escritorios nuevos se añaden al final: actualizar el índice sin enumerar
+        if self._indice is not None:
+            self._indice.append(escritorio)
+            self._reindexar()
+        if not self.notificaciones_activas:
+            self.eventos.publicar(EscritorioCreado(escritorio.id))
+        
+        return escritorio
+    
+    def crear_escritorios(self, cantidad: int) -> ResultadoLote:
+        """Crear varios escritorios; si alguno falla se eliminan los ya creados en el lote"""
+        resultado = ResultadoLote()
+        for _ in range(cantidad):
+            try:
+                resultado.anotar(self.crear_escritorio())
+            except Exception as e:
+                resultado.anotar_fallo(len(resultado.completados) + 1, str(e))
+                break
+        
+        if resultado.fallos and resultado.completados:
+            # Los escritorios recién creados están vacíos: deshacerlos no mueve ninguna ventana
+            deshecho = self.eliminar_escritorios(resultado.completados)
+            if not deshecho.correcto:
+                logger.warning(f"No se pudieron deshacer {len(deshecho.fallos)} escritorios creados")
+            eliminados = {escritorio.id for escritorio in deshecho.completados}
+            resultado.completados = [e for e in resultado.completados if e.id not in eliminados]
+        return resultado
+    
+    @staticmethod
+    def elegir_respaldo(
+        escritorios: List[EscritorioVirtual], posicion: int, eliminados: Set[str]
+    ) -> Optional[EscritorioVirtual]:
+        """
+        Escritorio que recibe las ventanas del que está en la posición indicada: el vecino
+        más cercano que no se vaya a eliminar (a la izquierda si hay empate, como hace Windows).
+        Al no elegir nunca otro escritorio del lote, cada ventana migra una sola vez.
+        """
+        candidatos = [i for i, escritorio in enumerate(escritorios) if escritorio.id not in eliminados]
+        if not candidatos:
+            return None
+        return escritorios[min(candidatos, key=lambda i: (abs(i - posicion), i > posicion))]
+    
+    def eliminar_escritorios(self, escritorios: Iterable[Union[EscritorioVirtual, int]]) -> ResultadoLote:
+        """
+        Eliminar varios escritorios (objetos o números 1-based) sobre una sola instantánea
+        del índice. Si se piden todos, se conserva el que tiene más ventanas. Un fallo no
+        detiene el lote: el escritorio queda intacto y los demás usan respaldos que sobreviven.
+        """
+        indice = self.obtener_indice_escritorios()
+        posiciones = {escritorio.id: i for i, escritorio in enumerate(indice)}
+        resultado = ResultadoLote()
+        
+        objetivo: Dict[str, EscritorioVirtual] = {}
+        for escritorio in escritorios:
+            if isinstance(escritorio, int):
+                if not 1 <= escritorio <= len(indice):
+                    resultado.anotar_fallo(escritorio, f"No existe el escritorio {escritorio}")
+                    continue
+                escritorio = indice[escritorio - 1]
+            if escritorio.id not in posiciones:
+                resultado.anotar_fallo(escritorio, "Escritorio no encontrado en la lista")
+                continue
+            objetivo[escritorio.id] = indice[posiciones[escritorio.id]]
+        
+        if objetivo and len(objetivo) == len(indice):
+            estado = self.obtener_estado_ventanas()
+            conservado = max(indice, key=lambda escritorio: estado.cantidad(escritorio.id))
+            del objetivo[conservado.id]
+            resultado.anotar_fallo(conservado, "No se puede eliminar el último escritorio")
+        
+        eliminados = set(objetivo)
+        for id_escritorio in sorted(objetivo, key=posiciones.get):
+            escritorio = objetivo[id_escritorio]
+            respaldo = self.elegir_respaldo(indice, posiciones[id_escritorio], eliminados)
+            try:
+                escritorio.eliminar(respaldo=respaldo)
+                resultado.anotar(escritorio)
+            except Exception as e:
+                resultado.anotar_fallo(escritorio, str(e))
+        
+        if any(isinstance(elemento, EscritorioVirtual) for elemento, _motivo in resultado.fallos):
+            # Un RemoveDesktop fallido puede deberse a un índice desfasado
+            self.invalidar_indice()
+        return resultado
+    
+    def eliminar_rango_escritorios(self, desde: int, hasta: int) -> ResultadoLote:
+        """Eliminar los escritorios numerados de desde a hasta (1-based, ambos incluidos)"""
+        return self.eliminar_escritorios(range(desde, hasta + 1))
+    
+    def eliminar_escritorios_vacios(self) -> ResultadoLote:
+        """Eliminar los escritorios sin ventanas propias; si todos lo están se conserva el actual"""
+        indice = self.obtener_indice_escritorios()
+        estado = self.obtener_estado_ventanas()
+        vacios = [escritorio for escritorio in indice if not estado.cantidad(escritorio.id)]
+        if len(vacios) == len(indice):
+            id_actual = self.id_escritorio_actual()
+            vacios = [escritorio for escritorio in vacios if escritorio.id != id_actual]
+        return self.eliminar_escritorios(vacios)
+    
+    def reordenar_escritorios(self, orden: Iterable[Union[EscritorioVirtual, str]]) -> int:
+        """
+        Llevar los escritorios al orden indicado (objetos o IDs) con el mínimo de llamadas a
+        MoveDesktop. Los escritorios no indicados quedan detrás en su orden actual. El índice
+        se actualiza con cada movimiento, sin volver a enumerar. Devuelve los movimientos hechos.
+        """
+        if not self.version.soporta_reordenar():
+            raise OperacionNoSoportada("Esta versión de Windows no permite reordenar escritorios")
+        
+        indice = self.obtener_indice_escritorios()
+        por_id = {escritorio.id: escritorio for escritorio in indice}
+        actual = [escritorio.id for escritorio in indice]
+        objetivo = completar_orden(
+            actual, [e.id if isinstance(e, EscritorioVirtual) else e for e in orden]
+        )
+        movimientos = planificar_movimientos(actual, objetivo)
+        
+        vtbl = self.gestor_interno.contents.lpVtbl.contents
+        for id_escritorio, posicion in movimientos:
+            try:
+                resultado = vtbl.MoveDesktop(
+                    self.gestor_interno, por_id[id_escritorio]._escritorio, *self._args_monitor, posicion
+                )
+                if resultado != S_OK:
+                    raise ExcepcionEVD(f"Error al mover escritorio: {resultado:#x}")
+            except Exception:
+                # Los movimientos anteriores ya se hicieron; el índice se reconstruirá
+                self.invalidar_indice()
+                raise
+            self._mover_en_indice(id_escritorio, posicion)
+        return len(movimientos)
+    
+    def _mover_en_indice(self, id_escritorio: str, posicion: int):
+        """Reflejar un MoveDesktop en el índice en caché"""
+        if self._indice is None or id_escritorio not in self._posiciones:
+            self.invalidar_indice()
+            return
+        escritorio = self._indice.pop(self._posiciones[id_escritorio])
+        self._indice.insert(posicion, escritorio)
+        self._reindexar()
+    
+    def mover_escritorio(self, escritorio: EscritorioVirtual, numero: int) -> int:
+        """Mover un escritorio a la posición indicada (1-based)"""
+        indice = self.obtener_indice_escritorios()
+        if not 1 <= numero <= len(indice):
+            raise EscritorioNoEncontrado(f"No existe la posición {numero}")
+        resto = [e for e in indice if e.id != escritorio.id]
+        return self.reordenar_escritorios(resto[:numero - 1] + [escritorio] + resto[numero - 1:])
+    
+    def ordenar_escritorios_por_nombre(self) -> int:
+        """Ordenar alfabéticamente; los escritorios sin nombre quedan al final en su orden"""
+        indice = self.obtener_indice_escritorios()
+        nombres = {escritorio.id: self.nombre_escritorio(escritorio).casefold() for escritorio in indice}
+        return self.reordenar_escritorios(
+            sorted(indice, key=lambda escritorio: (not nombres[escritorio.id], nombres[escritorio.id]))
+        )
+    
+    def ordenar_escritorios_por_ventanas(self, descendente: bool = True) -> int:
+        """Ordenar por número de ventanas propias (los empates conservan su orden)"""
+        indice = self.obtener_indice_escritorios()
+        estado = self.obtener_estado_ventanas()
+        return self.reordenar_escritorios(
+            sorted(indice, key=lambda escritorio: estado.cantidad(escritorio.id), reverse=descendente)
+        )
+    
+    def _ruta_disposicion(self, ruta: Optional[str]) -> str:
+        if ruta:
+            return ruta
+        if not self.directorio_datos:
+            raise ExcepcionEVD("No hay directorio de datos para la disposición")
+        return os.path.join(self.directorio_datos, disposicion.NOMBRE_ARCHIVO)
+    
+    def capturar_disposicion(self) -> disposicion.Disposicion:
+        """Escritorios, nombres y escritorio de cada ventana, con una sola enumeración"""
+        instantanea = self.obtener_instantanea()
+        grupos = [(escritorio.numero, escritorio.ventanas) for escritorio in instantanea.escritorios]
+        grupos.append((disposicion.ANCLADA, instantanea.ancladas))
+        self.precargar_titulos([ventana.vista for _numero, ventanas in grupos for ventana in ventanas])
+        
+        ventanas = []
+        for numero, grupo in grupos:
+            for ventana in grupo:
+                vista = ventana.vista
+                aplicacion = disposicion.clave_aplicacion(vista.id_aplicacion, vista.ejecutable)
+                if aplicacion:
+                    ventanas.append(
+                        disposicion.VentanaDisposicion(aplicacion, disposicion.patron_titulo(vista.titulo), numero)
+                    )
+        return disposicion.Disposicion([escritorio.nombre for escritorio in instantanea.escritorios], ventanas)
+    
+    def guardar_disposicion(self, ruta: Optional[str] = None) -> disposicion.Disposicion:
+        """Capturar la disposición actual y guardarla en disco"""
+        actual = self.capturar_disposicion()
+        actual.guardar(self._ruta_disposicion(ruta))
+        return actual
+    
+    def cargar_disposicion(self, ruta: Optional[str] = None) -> disposicion.Disposicion:
+        """Leer la disposición guardada"""
+        try:
+            return disposicion.Disposicion.cargar(self._ruta_disposicion(ruta))
+        except (OSError, ValueError) as e:
+            raise ExcepcionEVD(f"No se pudo leer la disposición guardada: {e}")
+    
+    def restaurar_disposicion(self, guardada: Optional[disposicion.Disposicion] = None) -> ResultadoLote:
+        """
+        Crear los escritorios que falten, restaurar sus nombres y devolver cada ventana
+        reconocida a su escritorio (o anclarla). Las ventanas se emparejan con diccionarios
+        y se mueven agrupadas por escritorio destino.
+        """
+        if guardada is None:
+            guardada = self.cargar_disposicion()
+        
+        faltan = guardada.cantidad_escritorios - len(self.obtener_indice_escritorios())
+        if faltan > 0:
+            creados = self.crear_escritorios(faltan)
+            if not creados.correcto:
+                raise ExcepcionEVD(f"No se pudieron crear los escritorios: {creados.fallos[0][1]}")
+        indice = self.obtener_indice_escritorios()
+        
+        if self.version.soporta_renombrar():
+            for escritorio, nombre in zip(indice, guardada.nombres):
+                if nombre and self.nombre_escritorio(escritorio) != nombre:
+                    try:
+                        self.renombrar_escritorio(escritorio, nombre)
+                    except Exception as e:
+                        logger.debug(f"No se pudo restaurar el nombre {nombre!r}: {e}")
+        
+        emparejador = disposicion.Emparejador(guardada.ventanas)
+        ventanas = self.obtener_ventanas()
+        self.precargar_titulos(ventanas)
+        candidatas = []
+        for ventana in ventanas:
+            try:
+                candidatas.append((
+                    ventana,
+                    (disposicion.clave_aplicacion(ventana.id_aplicacion, ventana.ejecutable), ventana.titulo),
+                ))
+            except Exception as e:
+                logger.debug(f"Ventana omitida al restaurar la disposición: {e}")
+        grupos: Dict[int, List[VistaAplicacion]] = {}
+        numeros = emparejador.asignar([clave for _ventana, clave in candidatas])
+        for (ventana, _clave), numero in zip(candidatas, numeros):
+            if numero is not None and numero <= len(indice):
+                grupos.setdefault(numero, []).append(ventana)
+        
+        resultado = ResultadoLote()
+        for numero, vistas in grupos.items():
+            if numero == disposicion.ANCLADA:
+                for vista in vistas:
+                    try:
+                        if not vista.esta_anclada():
+                            vista.anclar()
+                        resultado.anotar(vista)
+                    except Exception as e:
+                        resultado.anotar_fallo(vista, str(e))
+                continue
+            movibles = []
+            for vista in vistas:
+                try:
+                    # Desanclar la ventana no la saca de todos los escritorios si lo está su aplicación
+                    if vista.aplicacion_anclada:
+                        resultado.anotar_fallo(vista, "La aplicación está anclada en todos los escritorios")
+                        continue
+                    if vista.vista_anclada():
+                        vista.desanclar()
+                    movibles.append(vista)
+                except Exception as e:
+                    resultado.anotar_fallo(vista, str(e))
+            self._mover_vistas(movibles, indice[numero - 1], resultado)
+        return resultado
     
     def obtener_ventanas(self, escritorio: Optional[EscritorioVirtual] = None) -> List[VistaAplicacion]:
         """Obtener ventanas (todas o de un escritorio específico)"""
@@ -445,6 +1318,10 @@ class GestorEscritorios:
             # Liberar array
             self.gestor_com.liberar_interfaz(puntero_array)
             
+            # Una enumeración completa descarta los títulos de ventanas que ya no existen
+            if escritorio is None:
+                self.titulos.podar(ventana.hwnd for ventana in ventanas)
+            
         except Exception as e:
             logger.error(f"Error obteniendo ventanas: {e}")
             raise
@@ -465,21 +1342,319 @@ class GestorEscritorios:
         
         return None
     
+    def obtener_ventana_por_hwnd(self, hwnd: int) -> Optional[VistaAplicacion]:
+        """Obtener la vista de aplicación de una ventana a partir de su hwnd (GetViewForHwnd)"""
+        puntero_vista = POINTER(IApplicationView)()
+        vtbl = self.coleccion_vistas.contents.lpVtbl.contents
+        resultado = vtbl.GetViewForHwnd(self.coleccion_vistas, hwnd, pointer(puntero_vista))
+        
+        if resultado == S_OK and puntero_vista:
+            return VistaAplicacion(ctypes.cast(puntero_vista, c_void_p), self)
+        return None
+    
+    def resolver_ventana(self, hwnd: int) -> Optional[VistaAplicacion]:
+        """
+        Vista de la ventana de nivel superior que contiene hwnd (por ejemplo, la del objeto
+        del navegador), en caché por hwnd; se descarta al destruirse o cambiar la ventana.
+        """
+        hwnd = user32.GetAncestor(hwnd, GA_ROOT) or hwnd
+        vista = self._vistas.obtener(hwnd)
+        if vista is not None:
+            if not user32.IsWindow(hwnd):
+                self.notificar_ventana_destruida(hwnd)
+                return None
+            if not self.eventos_ventana_activos:
+                # Sin eventos no se sabe si Windows la movió de escritorio
+                vista._id_escritorio = None
+            return vista
+        vista = self.obtener_ventana_por_hwnd(hwnd)
+        if vista is not None:
+            self._vistas.poner(hwnd, vista)
+        return vista
+    
+    def obtener_instantanea(self) -> Instantanea:
+        """Capturar escritorios y ventanas con una sola enumeración de vistas y ordenar las recientes"""
+        escritorios = self.obtener_indice_escritorios()
+        instantanea = Instantanea(
+            [
+                EscritorioInstantanea(escritorio, numero, self.nombre_escritorio(escritorio))
+                for numero, escritorio in enumerate(escritorios, 1)
+            ],
+            self.id_escritorio_actual(),
+            self._generacion + 1
+        )
+        self._generacion += 1
+        for ventana in self.obtener_ventanas():
+            try:
+                instantanea.agregar_ventana(
+                    VentanaInstantanea(
+                        ventana, ventana.id_escritorio, ventana.esta_anclada(), ventana.marca_activacion
+                    )
+                )
+            except Exception as e:
+                logger.debug(f"Ventana omitida en la instantánea: {e}")
+        # Las marcas de activación son el orden real: sustituyen al anotado por eventos de foco
+        for escritorio in instantanea.escritorios:
+            self.recientes.sembrar(
+                escritorio.id, (ventana.hwnd for ventana in escritorio.recientes(instantanea.ancladas))
+            )
+        return instantanea
+    
+    def ventanas_recientes(self, id_escritorio: Optional[str] = None) -> List[int]:
+        """
+        Ventanas de un escritorio (el actual por omisión) de la más a la menos reciente.
+        El orden se calcula con una instantánea la primera vez y luego lo mantienen los
+        cambios de primer plano, sin volver a consultar el orden Z.
+        """
+        id_escritorio = id_escritorio or self.id_escritorio_actual()
+        if not self.recientes.conoce(id_escritorio):
+            self.obtener_instantanea()
+        return self.recientes.obtener(id_escritorio)
+    
+    def cambios_desde(self, anterior: Instantanea) -> Tuple[Instantanea, DiferenciaInstantaneas]:
+        """Capturar una instantánea nueva y compararla con una anterior"""
+        nueva = self.obtener_instantanea()
+        return nueva, diferenciar(anterior, nueva)
+    
+    def actualizar_indice_busqueda(self) -> IndiceBusqueda:
+        """Reconciliar el índice de búsqueda con las ventanas actuales resolviendo solo las nuevas"""
+        # Con eventos activos el índice ya está al día tras la primera reconciliación
+        if self.eventos_ventana_activos and self._busqueda_sincronizada:
+            return self.indice_busqueda
+        ventanas = {ventana.hwnd: ventana for ventana in self.obtener_ventanas() if ventana.hwnd}
+        # Los títulos de las ventanas nuevas se resuelven en paralelo
+        self.titulos.resolver_lote(hwnd for hwnd in ventanas if hwnd not in self.indice_busqueda)
+        
+        def resolver(hwnd: int):
+            ventana = ventanas[hwnd]
+            return (ventana.titulo, ventana.id_aplicacion, ventana.ejecutable, ventana.id_escritorio)
+        
+        self.indice_busqueda.reconciliar(ventanas, resolver)
+        # Las ventanas ya indexadas solo necesitan su escritorio actual
+        for hwnd, ventana in ventanas.items():
+            self.indice_busqueda.actualizar_escritorio(hwnd, ventana.id_escritorio)
+        self._busqueda_sincronizada = True
+        return self.indice_busqueda
+    
+    @property
+    def eventos_ventana_activos(self) -> bool:
+        """Indica si el estado de ventanas se mantiene con eventos"""
+        return self._monitor is not None and self._monitor.activo
+    
+    def iniciar_eventos_ventana(self):
+        """Instalar los ganchos de eventos de ventana (desde el hilo principal)"""
+        if self.eventos_ventana_activos:
+            return
+        self._monitor = MonitorEventosVentana(self._procesar_eventos_ventana, self._al_primer_plano)
+        self._monitor.iniciar()
+        if self.eventos_ventana_activos:
+            # Los cambios de nombre invalidan los títulos: ya no necesitan caducar
+            self.titulos.vigencia = None
+        self.resincronizar_ventanas()
+    
+    def detener_eventos_ventana(self):
+        """Quitar los ganchos de eventos de ventana"""
+        if self._monitor is not None:
+            self._monitor.detener()
+            self._monitor = None
+        self.titulos.vigencia = VIGENCIA_SIN_EVENTOS
+        self.estado_ventanas.sincronizado = False
+        self._ubicaciones.limpiar()
+        self._busqueda_sincronizada = False
+    
+    def resincronizar_ventanas(self) -> EstadoVentanas:
+        """Reconstruir el estado de ventanas con una enumeración completa"""
+        ventanas = {}
+        for ventana in self.obtener_ventanas():
+            if not ventana.hwnd:
+                continue
+            try:
+                ventanas[ventana.hwnd] = ANCLADAS if ventana.esta_anclada() else ventana.id_escritorio
+            except Exception as e:
+                logger.debug(f"Ventana omitida al sincronizar: {e}")
+        self.estado_ventanas.reemplazar(ventanas)
+        # Las reglas solo se aplican a las ventanas que aparezcan a partir de ahora
+        self._ventanas_evaluadas = set(ventanas)
+        return self.estado_ventanas
+    
+    def obtener_estado_ventanas(self) -> EstadoVentanas:
+        """Estado de ventanas al día: el mantenido por eventos o uno recién enumerado"""
+        if self.eventos_ventana_activos and self.estado_ventanas.sincronizado:
+            return self.estado_ventanas
+        return self.resincronizar_ventanas()
+    
+    def contar_ventanas(self, id_escritorio: str) -> Tuple[int, int]:
+        """Ventanas propias de un escritorio y ventanas ancladas, sin enumerar si hay eventos"""
+        estado = self.obtener_estado_ventanas()
+        return estado.cantidad(id_escritorio), estado.cantidad(ANCLADAS)
+    
+    def _anotar_escritorio_ventana(self, hwnd: int, id_escritorio: Optional[str]):
+        """Reflejar en el estado un cambio de escritorio hecho por el propio gestor"""
+        if not hwnd:
+            return
+        self._ubicaciones.quitar(hwnd)
+        self._vistas.quitar(hwnd)
+        # En el escritorio de destino se anotará cuando se use
+        self.recientes.olvidar_ventana(hwnd)
+        if hwnd in self.estado_ventanas:
+            self._publicar_ubicacion(hwnd, self.estado_ventanas.escritorio_de(hwnd), id_escritorio)
+            self.estado_ventanas.poner(hwnd, id_escritorio)
+            self.indice_busqueda.actualizar_escritorio(hwnd, id_escritorio or "")
+        else:
+            # Sin estado por eventos no se sabe de dónde venía
+            self._publicar_ubicacion(hwnd, "", id_escritorio)
+    
+    def _publicar_ubicacion(self, hwnd: int, anterior: Optional[str], nuevo: Optional[str]):
+        """Publicar el movimiento o el cambio de anclaje de una ventana"""
+        if anterior == nuevo or not self.eventos:
+            return
+        if anterior is ANCLADAS or nuevo is ANCLADAS:
+            self.eventos.publicar(VentanaAnclada(hwnd, nuevo is ANCLADAS))
+        else:
+            self.eventos.publicar(VentanaMovida(hwnd, anterior, nuevo))
+    
+    def _al_primer_plano(self, hwnd: int):
+        self.estado_ventanas.primer_plano = hwnd
+        self.registrar_foco(hwnd, self.comprobar_escritorio_primer_plano(hwnd))
+    
+    def _procesar_eventos_ventana(self, pendientes: Dict[int, int]):
+        """Aplicar un lote de eventos agrupados (hilo principal)"""
+        destruidas, revisar, titulos = clasificar_pendientes(pendientes)
+        for hwnd in destruidas:
+            self.notificar_ventana_destruida(hwnd)
+        for hwnd in revisar:
+            # Mostrada, ocultada o movida: su escritorio se vuelve a consultar cuando haga falta
+            self._ubicaciones.quitar(hwnd)
+            self._vistas.quitar(hwnd)
+            ventana = self.obtener_ventana_por_hwnd(hwnd)
+            if ventana is None or not ventana.se_muestra_en_alternador():
+                self.estado_ventanas.quitar(hwnd)
+                self.indice_busqueda.eliminar(hwnd)
+                continue
+            id_escritorio = ANCLADAS if ventana.esta_anclada() else ventana.id_escritorio
+            if hwnd in self.estado_ventanas:
+                # Movimientos y anclajes hechos desde Windows (vista de tareas, otros programas)
+                self._publicar_ubicacion(hwnd, self.estado_ventanas.escritorio_de(hwnd), id_escritorio)
+            self.estado_ventanas.poner(hwnd, id_escritorio)
+            if hwnd in self.indice_busqueda:
+                self.indice_busqueda.actualizar_escritorio(hwnd, id_escritorio or "")
+            else:
+                self.notificar_ventana_creada(hwnd)
+            if self.reglas and hwnd not in self._ventanas_evaluadas:
+                self._aplicar_reglas(ventana)
+        for hwnd in titulos - destruidas:
+            self.notificar_cambio_titulo(hwnd)
+            if self.reglas and hwnd not in self._ventanas_evaluadas and hwnd in self.estado_ventanas:
+                # Muchas ventanas aparecen sin título y lo reciben después
+                ventana = self.obtener_ventana_por_hwnd(hwnd)
+                if ventana is not None:
+                    self._aplicar_reglas(ventana)
+    
+    def _aplicar_reglas(self, ventana: VistaAplicacion):
+        """Colocar una ventana nueva según la primera regla que le corresponda"""
+        titulo = ventana.titulo
+        regla = self.reglas.evaluar(titulo, ventana.id_aplicacion, ventana.ejecutable)
+        if regla is None and not titulo:
+            # Sin título todavía: se vuelve a evaluar cuando lo reciba
+            return
+        self._ventanas_evaluadas.add(ventana.hwnd)
+        if regla is None:
+            return
+        try:
+            if regla.escritorio == ANCLAR:
+                if not ventana.esta_anclada():
+                    ventana.anclar()
+            elif not ventana.esta_anclada():
+                escritorio = self.obtener_escritorio_por_numero(regla.escritorio)
+                if ventana.id_escritorio != escritorio.id:
+                    ventana.mover_a_escritorio(escritorio)
+        except Exception as e:
+            logger.debug(f"No se pudo aplicar la regla {regla}: {e}")
+    
+    def establecer_reglas(self, reglas: List[Regla]):
+        """Sustituir las reglas de colocación y guardarlas (sin cambios no se recompila nada)"""
+        reglas = list(reglas)
+        if reglas == self.reglas.reglas:
+            # Conserva los contadores de aciertos que muestra el panel de opciones
+            return
+        for regla in reglas:
+            motivo = validar_regla(regla)
+            if motivo:
+                raise ExcepcionEVD(motivo)
+        # Compilar antes de guardar: un archivo que no se pueda cargar impediría iniciar el gestor
+        motor = MotorReglas(reglas)
+        if self.directorio_datos:
+            guardar_reglas(self.directorio_datos, reglas)
+        self.reglas = motor
+    
+    def notificar_ventana_creada(self, hwnd: int):
+        """Añadir al índice de búsqueda una ventana recién creada o mostrada"""
+        if hwnd in self.indice_busqueda:
+            return
+        ventana = self.obtener_ventana_por_hwnd(hwnd)
+        if ventana is None or not ventana.se_muestra_en_alternador():
+            return
+        self.indice_busqueda.agregar(
+            hwnd, ventana.titulo, ventana.id_aplicacion, ventana.ejecutable, ventana.id_escritorio
+        )
+    
+    def notificar_ventana_destruida(self, hwnd: int):
+        """Olvidar una ventana destruida"""
+        self.estado_ventanas.quitar(hwnd)
+        self._ubicaciones.quitar(hwnd)
+        self._vistas.quitar(hwnd)
+        self.titulos.invalidar(hwnd)
+        self.indice_busqueda.eliminar(hwnd)
+        self.memoria_foco.olvidar_ventana(hwnd)
+        self.recientes.olvidar_ventana(hwnd)
+        self._ventanas_evaluadas.discard(hwnd)
+    
+    def notificar_cambio_titulo(self, hwnd: int):
+        """Invalidar el título en caché y reindexarlo tras un cambio de nombre"""
+        self.titulos.invalidar(hwnd)
+        if hwnd in self.indice_busqueda:
+            self.indice_busqueda.actualizar_titulo(hwnd, self.titulos.obtener(hwnd))
+    
+    def precargar_titulos(self, ventanas: List[VistaAplicacion]):
+        """Resolver en paralelo los títulos de un lote de ventanas"""
+        self.titulos.resolver_lote(ventana.hwnd for ventana in ventanas if ventana.hwnd)
+    
+    def enfocar_ventana(self, hwnd: int) -> VistaAplicacion:
+        """Cambiar al escritorio de una ventana y enfocarla"""
+        ventana = self.obtener_ventana_por_hwnd(hwnd)
+        if ventana is None:
+            self.notificar_ventana_destruida(hwnd)
+            raise ExcepcionEVD("La ventana ya no existe")
+        ventana.enfocar()
+        return ventana
+    
     def obtener_cantidad_escritorios(self) -> int:
         """Obtener número de escritorios"""
         cantidad = UINT()
         vtbl = self.gestor_interno.contents.lpVtbl.contents
-        resultado = vtbl.GetCount(self.gestor_interno, pointer(cantidad))
+        resultado = vtbl.GetCount(self.gestor_interno, *self._args_monitor, pointer(cantidad))
         
         if resultado == S_OK:
             return cantidad.value
         return 0
     
+    def cerrar(self):
+        """Detener notificaciones, ganchos de eventos e hilos auxiliares"""
+        self.eventos.cerrar()
+        self.detener_notificaciones()
+        self.detener_eventos_ventana()
+        self.titulos.cerrar()
+        self.procesos.cerrar()
+        self.nombres_aplicaciones.guardar()
+    
     def __del__(self):
         """Cleanup al destruir"""
         try:
+            self.cerrar()
             if hasattr(self, 'gestor_interno'):
                 self.gestor_com.liberar_interfaz(self.gestor_interno)
+            if getattr(self, '_gestor_nombres', None):
+                liberar_puntero(self._gestor_nombres)
             if hasattr(self, 'coleccion_vistas'):
                 self.gestor_com.liberar_interfaz(self.coleccion_vistas)
             if hasattr(self, 'aplicaciones_ancladas'):
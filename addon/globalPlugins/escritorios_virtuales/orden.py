@@ -0,0 +1,64 @@
+"""
+Planificación del reordenamiento de escritorios.
+MoveDesktop mueve un escritorio a una posición; para llegar a un orden objetivo
+basta mover los escritorios que no forman parte de la subsecuencia creciente más
+larga (los demás ya están en su orden relativo), que es el mínimo de movimientos.
+"""
+
+from bisect import bisect_left
+from typing import Hashable, List, Sequence, Set, Tuple
+
+
+def subsecuencia_creciente_maxima(valores: Sequence[int]) -> Set[int]:
+    """Posiciones de una subsecuencia estrictamente creciente de longitud máxima (O(n log n))"""
+    colas: List[int] = []        # Menor valor final de cada longitud
+    posiciones_colas: List[int] = []
+    anteriores = [-1] * len(valores)
+    for i, valor in enumerate(valores):
+        longitud = bisect_left(colas, valor)
+        if longitud == len(colas):
+            colas.append(valor)
+            posiciones_colas.append(i)
+        else:
+            colas[longitud] = valor
+            posiciones_colas[longitud] = i
+        anteriores[i] = posiciones_colas[longitud - 1] if longitud else -1
+    
+    resultado = set()
+    i = posiciones_colas[-1] if posiciones_colas else -1
+    while i != -1:
+        resultado.add(i)
+        i = anteriores[i]
+    return resultado
+
+
+def planificar_movimientos(actual: Sequence[Hashable], objetivo: Sequence[Hashable]) -> List[Tuple[Hashable, int]]:
+    """
+    Movimientos (elemento, posición final) que convierten el orden actual en el objetivo.
+    Cada posición se refiere a la lista tal como queda tras los movimientos anteriores.
+    """
+    if len(actual) != len(objetivo) or set(actual) != set(objetivo) or len(set(objetivo)) != len(objetivo):
+        raise ValueError("El orden objetivo debe contener exactamente los mismos elementos")
+    
+    rango = {elemento: i for i, elemento in enumerate(objetivo)}
+    estables = {actual[i] for i in subsecuencia_creciente_maxima([rango[e] for e in actual])}
+    
+    lista = list(actual)
+    movimientos = []
+    for i, elemento in enumerate(objetivo):
+        if elemento in estables:
+            continue
+        # Justo detrás del elemento que le precede en el objetivo, que ya está bien colocado
+        lista.remove(elemento)
+        posicion = lista.index(objetivo[i - 1]) + 1 if i else 0
+        lista.insert(posicion, elemento)
+        movimientos.append((elemento, posicion))
+    return movimientos
+
+
+def completar_orden(actual: Sequence[Hashable], primeros: Sequence[Hashable]) -> List[Hashable]:
+    """Orden con los elementos indicados al principio y el resto en su orden actual"""
+    existentes = set(actual)
+    indicados = list(dict.fromkeys(e for e in primeros if e in existentes))
+    vistos = set(indicados)
+    return indicados + [e for e in actual if e not in vistos]
@@ -0,0 +1,259 @@
+"""
+Registro declarativo de interfaces de escritorios virtuales por compilación de Windows.
+Cada perfil indica los IID y el orden de los métodos de la vtable (sin IUnknown) a
+partir de una compilación; el perfil aplicable se busca con bisect. Las estructuras
+de vtable se generan solo para el perfil que se usa, la primera vez que se piden.
+Para admitir una compilación nueva basta con añadir una entrada a REGISTRO.
+"""
+
+import bisect
+import ctypes
+import json
+import os
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_ARCHIVO = 1
+NOMBRE_ARCHIVO = "perfilInterfaces.json"
+
+# Métodos del gestor que reciben un HMONITOR tras el puntero de la interfaz
+METODOS_CON_MONITOR = ("GetCount", "GetCurrentDesktop", "GetDesktops", "SwitchDesktop", "CreateDesktopW")
+
+# Ranuras de IUnknown antes de los métodos propios
+RANURAS_IUNKNOWN = 3
+
+
+class PerfilInterfaces(NamedTuple):
+    """IID y orden de métodos de las interfaces de escritorios desde una compilación"""
+    compilacion: int
+    nombre: str
+    guid_escritorio: str
+    metodos_escritorio: Tuple[str, ...]
+    guid_gestor: str
+    metodos_gestor: Tuple[str, ...]
+    # Los métodos de METODOS_CON_MONITOR reciben un HMONITOR (Windows 11 21H2)
+    con_monitor: bool = False
+    # Interfaces derivadas con los nombres de escritorio (Windows 10)
+    guid_escritorio_nombres: Optional[str] = None
+    metodos_escritorio_nombres: Tuple[str, ...] = ()
+    guid_gestor_nombres: Optional[str] = None
+    metodos_gestor_nombres: Tuple[str, ...] = ()
+    
+    def ranura(self, metodos: Tuple[str, ...], metodo: str) -> Optional[int]:
+        """Posición del método en la vtable (None si la interfaz no lo tiene)"""
+        if metodo not in metodos:
+            return None
+        return RANURAS_IUNKNOWN + metodos.index(metodo)
+    
+    def interfaces_nombres(self) -> Tuple[Optional[str], Optional[int], Optional[str], Optional[int]]:
+        """IID y ranura de GetName (escritorio) y de SetName (gestor)"""
+        if self.guid_escritorio_nombres:
+            obtener = (self.guid_escritorio_nombres, self.ranura(self.metodos_escritorio_nombres, "GetName"))
+        else:
+            obtener = (self.guid_escritorio, self.ranura(self.metodos_escritorio, "GetName"))
+        if self.guid_gestor_nombres:
+            renombrar = (self.guid_gestor_nombres, self.ranura(self.metodos_gestor_nombres, "SetName"))
+        else:
+            renombrar = (self.guid_gestor, self.ranura(self.metodos_gestor, "SetName"))
+        if obtener[1] is None:
+            obtener = (None, None)
+        if renombrar[1] is None:
+            renombrar = (None, None)
+        return obtener + renombrar
+
+
+_ESCRITORIO_10 = ("IsViewVisible", "GetID")
+_ESCRITORIO_21H2 = ("IsViewVisible", "GetID", "GetMonitor", "GetName", "GetWallpaperPath")
+_ESCRITORIO_22H2 = ("IsViewVisible", "GetID", "GetName", "GetWallpaperPath", "IsRemote")
+
+_GESTOR_10 = (
+    "GetCount", "MoveViewToDesktop", "CanViewMoveDesktops", "GetCurrentDesktop", "GetDesktops",
+    "GetAdjacentDesktop", "SwitchDesktop", "CreateDesktopW", "RemoveDesktop", "FindDesktop",
+)
+_GESTOR_21H2 = (
+    "GetCount", "MoveViewToDesktop", "CanViewMoveDesktops", "GetCurrentDesktop", "GetAllCurrentDesktops",
+    "GetDesktops", "GetAdjacentDesktop", "SwitchDesktop", "CreateDesktopW", "MoveDesktop", "RemoveDesktop",
+    "FindDesktop", "GetDesktopSwitchIncludeExcludeViews", "SetName", "SetWallpaper",
+    "SetWallpaperForAllDesktops", "CopyDesktopState", "GetDesktopIsPerMonitor", "SetDesktopIsPerMonitor",
+)
+_GESTOR_22H2 = (
+    "GetCount", "MoveViewToDesktop", "CanViewMoveDesktops", "GetCurrentDesktop", "GetDesktops",
+    "GetAdjacentDesktop", "SwitchDesktop", "CreateDesktopW", "MoveDesktop", "RemoveDesktop", "FindDesktop",
+    "GetDesktopSwitchIncludeExcludeViews", "SetName", "SetWallpaper", "SetWallpaperForAllDesktops",
+    "CopyDesktopState", "CreateRemoteDesktop", "SwitchRemoteDesktop", "SwitchDesktopWithAnimation",
+    "GetLastActiveDesktop", "WaitForAnimationToComplete",
+)
+_GESTOR_23H2 = (
+    "GetCount", "MoveViewToDesktop", "CanViewMoveDesktops", "GetCurrentDesktop", "GetDesktops",
+    "GetAdjacentDesktop", "SwitchDesktop", "SwitchDesktopAndMoveForegroundView", "CreateDesktopW",
+    "MoveDesktop", "RemoveDesktop", "FindDesktop", "GetDesktopSwitchIncludeExcludeViews", "SetName",
+    "SetWallpaper", "SetWallpaperForAllDesktops", "CopyDesktopState", "CreateRemoteDesktop",
+    "SwitchRemoteDesktop", "SwitchDesktopWithAnimation", "GetLastActiveDesktop", "WaitForAnimationToComplete",
+)
+
+# Perfiles ordenados por compilación inicial
+REGISTRO = (
+    PerfilInterfaces(
+        9000, "9000+",
+        "{FF72FFDD-BE7E-43FC-9C03-AD81681E88E4}", _ESCRITORIO_10,
+        "{F31574D6-B682-4CDC-BD56-1827860ABEC6}", _GESTOR_10,
+    ),
+    PerfilInterfaces(
+        19041, "19041+",
+        "{FF72FFDD-BE7E-43FC-9C03-AD81681E88E4}", _ESCRITORIO_10,
+        "{F31574D6-B682-4CDC-BD56-1827860ABEC6}", _GESTOR_10,
+        guid_escritorio_nombres="{31EBDE3F-6EC3-4CBD-B9FB-0EF6D09B41F4}",
+        metodos_escritorio_nombres=_ESCRITORIO_10 + ("GetName",),
+        guid_gestor_nombres="{0F3A72B0-4566-487E-9A33-4ED302F6D6CE}",
+        metodos_gestor_nombres=_GESTOR_10 + ("Unknown1", "SetName"),
+    ),
+    PerfilInterfaces(
+        20231, "20231+",
+        "{62FDF88B-11CA-4AFB-8BD8-2296DFAE49E2}", _ESCRITORIO_21H2,
+        "{094AFE11-44F2-4BA0-976F-29A97E263EE0}", _GESTOR_21H2,
+        con_monitor=True,
+    ),
+    PerfilInterfaces(
+        21313, "21313+",
+        "{536D3495-B208-4CC9-AE26-DE8111275BF8}", _ESCRITORIO_21H2,
+        "{B2F925B9-5A0F-4D2E-9F4D-2B1507593C10}", _GESTOR_21H2,
+        con_monitor=True,
+    ),
+    PerfilInterfaces(
+        22621, "22621+",
+        "{3F07F4BE-B107-441A-AF0F-39D82529072C}", _ESCRITORIO_22H2,
+        "{A3175F2D-239C-4BD2-8AA0-EEBA8B0B138E}", _GESTOR_22H2,
+    ),
+    PerfilInterfaces(
+        22631, "22631+",
+        "{3F07F4BE-B107-441A-AF0F-39D82529072C}", _ESCRITORIO_22H2,
+        "{4970BA3D-FD4E-4647-BEA3-D89076EF4B9C}", _GESTOR_23H2,
+    ),
+    PerfilInterfaces(
+        26100, "26100+",
+        "{3F07F4BE-B107-441A-AF0F-39D82529072C}", _ESCRITORIO_22H2,
+        "{53F5CA0B-158F-4124-900C-057158060B27}", _GESTOR_23H2,
+    ),
+)
+
+_COMPILACIONES = [perfil.compilacion for perfil in REGISTRO]
+
+
+def perfil_para_compilacion(compilacion: int) -> PerfilInterfaces:
+    """Perfil de la compilación más alta que no supera la indicada"""
+    indice = bisect.bisect_right(_COMPILACIONES, compilacion) - 1
+    return REGISTRO[max(indice, 0)]
+
+
+def perfil_por_clave(compilacion: int) -> Optional[PerfilInterfaces]:
+    """Perfil cuya compilación inicial es exactamente la indicada"""
+    indice = bisect.bisect_left(_COMPILACIONES, compilacion)
+    if indice < len(REGISTRO) and REGISTRO[indice].compilacion == compilacion:
+        return REGISTRO[indice]
+    return None
+
+
+def candidatos(compilacion: int) -> List[PerfilInterfaces]:
+    """Perfiles en orden de sondeo: el previsto por la compilación y después los más cercanos"""
+    prevista = perfil_para_compilacion(compilacion)
+    resto = sorted(
+        (perfil for perfil in REGISTRO if perfil is not prevista),
+        key=lambda perfil: abs(perfil.compilacion - prevista.compilacion)
+    )
+    return [prevista] + resto
+
+
+def leer_perfil_guardado(directorio: Optional[str], compilacion: int, ubr: int) -> Optional[PerfilInterfaces]:
+    """Perfil sondeado en un arranque anterior con la misma compilación y UBR"""
+    if not directorio:
+        return None
+    try:
+        with open(os.path.join(directorio, NOMBRE_ARCHIVO), "r", encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    if (datos.get("version"), datos.get("compilacion"), datos.get("ubr")) != (VERSION_ARCHIVO, compilacion, ubr):
+        return None
+    return perfil_por_clave(datos.get("perfil", -1))
+
+
+def guardar_perfil(directorio: Optional[str], compilacion: int, ubr: int, perfil: PerfilInterfaces):
+    """Recordar el perfil que funciona en esta compilación y UBR"""
+    if not directorio:
+        return
+    datos = {"version": VERSION_ARCHIVO, "compilacion": compilacion, "ubr": ubr, "perfil": perfil.compilacion}
+    ruta = os.path.join(directorio, NOMBRE_ARCHIVO)
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo)
+        os.replace(ruta + ".tmp", ruta)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar el perfil de interfaces: {e}")
+
+
+class TiposInterfaces(NamedTuple):
+    """Estructuras ctypes generadas para un perfil"""
+    escritorio: type
+    gestor: type
+
+
+def _crear_interfaz(nombre: str, metodos: Tuple[str, ...], firmas_para) -> type:
+    """Generar la estructura de una interfaz y su vtable; firmas_para(interfaz) da los argumentos"""
+    from .com import GUID
+    
+    vtbl = type(f"{nombre}Vtbl", (ctypes.Structure,), {})
+    interfaz = type(nombre, (ctypes.Structure,), {"_fields_": [("lpVtbl", ctypes.POINTER(vtbl))]})
+    este = ctypes.POINTER(interfaz)
+    firmas = firmas_para(interfaz)
+    campos = [
+        ("QueryInterface", ctypes.WINFUNCTYPE(ctypes.HRESULT, este, ctypes.POINTER(GUID), ctypes.POINTER(ctypes.c_void_p))),
+        ("AddRef", ctypes.WINFUNCTYPE(ctypes.c_ulong, este)),
+        ("Release", ctypes.WINFUNCTYPE(ctypes.c_ulong, este)),
+    ]
+    for metodo in metodos:
+        argumentos = firmas.get(metodo)
+        if argumentos is None:
+            # Métodos que no se usan: solo ocupan su ranura
+            campos.append((metodo, ctypes.c_void_p))
+        else:
+            campos.append((metodo, ctypes.WINFUNCTYPE(ctypes.HRESULT, este, *argumentos)))
+    vtbl._fields_ = campos
+    return interfaz
+
+
+@lru_cache(maxsize=None)
+def tipos_interfaces(perfil: PerfilInterfaces) -> TiposInterfaces:
+    """Estructuras del escritorio y del gestor para un perfil (se generan una sola vez)"""
+    from .com import GUID, IApplicationView, IObjectArray
+    from ctypes.wintypes import INT, UINT
+    
+    P = ctypes.POINTER
+    escritorio = _crear_interfaz(
+        "IVirtualDesktop", perfil.metodos_escritorio,
+        lambda _interfaz: {"GetID": (P(GUID),), "GetName": (P(ctypes.c_void_p),)}
+    )
+    monitor = (ctypes.c_void_p,) if perfil.con_monitor else ()
+    
+    def firmas_gestor(_interfaz):
+        firmas = {
+            "GetCount": (P(UINT),),
+            "MoveViewToDesktop": (P(IApplicationView), P(escritorio)),
+            "GetCurrentDesktop": (P(P(escritorio)),),
+            "GetDesktops": (P(P(IObjectArray)),),
+            "SwitchDesktop": (P(escritorio),),
+            "CreateDesktopW": (P(P(escritorio)),),
+            "MoveDesktop": (P(escritorio),) + monitor + (INT,),
+            "RemoveDesktop": (P(escritorio), P(escritorio)),
+            "FindDesktop": (P(GUID), P(P(escritorio))),
+            "SetName": (P(escritorio), ctypes.c_void_p),
+        }
+        for metodo in METODOS_CON_MONITOR:
+            firmas[metodo] = monitor + firmas[metodo]
+        return firmas
+    
+    gestor = _crear_interfaz("IVirtualDesktopManagerInternal", perfil.metodos_gestor, firmas_gestor)
+    return TiposInterfaces(escritorio, gestor)
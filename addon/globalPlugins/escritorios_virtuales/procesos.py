@@ -0,0 +1,171 @@
+"""
+Información del proceso propietario de una ventana.
+Los datos se guardan por PID junto con un handle del proceso; cuando el proceso
+termina el handle queda señalado y la entrada se descarta, de modo que un PID
+reutilizado nunca devuelve datos de otro programa. Los procesos que no se pueden
+abrir (protegidos o elevados) se recuerdan unos segundos para no reintentarlo en
+cada consulta.
+"""
+
+import ctypes
+import os
+import threading
+import time
+from ctypes.wintypes import BOOL, DWORD, HANDLE, HWND, LPCWSTR, LPVOID, LPWSTR, UINT
+from typing import Dict, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+SYNCHRONIZE = 0x00100000
+WAIT_OBJECT_0 = 0x0
+
+# Segundos durante los que no se reintenta abrir un proceso que falló (el PID se puede reutilizar)
+VIGENCIA_FALLO = 5.0
+
+kernel32 = ctypes.windll.kernel32
+user32 = ctypes.windll.user32
+version = ctypes.windll.version
+
+_GetWindowThreadProcessId = ctypes.WINFUNCTYPE(DWORD, HWND, ctypes.POINTER(DWORD))(
+    ("GetWindowThreadProcessId", user32)
+)
+_OpenProcess = ctypes.WINFUNCTYPE(HANDLE, DWORD, BOOL, DWORD)(("OpenProcess", kernel32))
+_QueryFullProcessImageNameW = ctypes.WINFUNCTYPE(BOOL, HANDLE, DWORD, LPWSTR, ctypes.POINTER(DWORD))(
+    ("QueryFullProcessImageNameW", kernel32)
+)
+_WaitForSingleObject = ctypes.WINFUNCTYPE(DWORD, HANDLE, DWORD)(("WaitForSingleObject", kernel32))
+_CloseHandle = ctypes.WINFUNCTYPE(BOOL, HANDLE)(("CloseHandle", kernel32))
+_GetFileVersionInfoSizeW = ctypes.WINFUNCTYPE(DWORD, LPCWSTR, ctypes.POINTER(DWORD))(
+    ("GetFileVersionInfoSizeW", version)
+)
+_GetFileVersionInfoW = ctypes.WINFUNCTYPE(BOOL, LPCWSTR, DWORD, DWORD, LPVOID)(("GetFileVersionInfoW", version))
+_VerQueryValueW = ctypes.WINFUNCTYPE(BOOL, LPVOID, LPCWSTR, ctypes.POINTER(LPVOID), ctypes.POINTER(UINT))(
+    ("VerQueryValueW", version)
+)
+
+
+class InfoProceso(NamedTuple):
+    """Datos de un proceso"""
+    pid: int
+    ruta: str
+    ejecutable: str
+    nombre_aplicacion: str
+
+
+def obtener_pid(hwnd: int) -> int:
+    """ID del proceso propietario de la ventana (0 si no se puede obtener)"""
+    pid = DWORD()
+    _GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+    return pid.value
+
+
+def _ruta_desde_handle(proceso: int) -> str:
+    longitud = DWORD(1024)
+    buffer = ctypes.create_unicode_buffer(longitud.value)
+    if _QueryFullProcessImageNameW(proceso, 0, buffer, ctypes.byref(longitud)):
+        return buffer.value
+    return ""
+
+
+def descripcion_archivo(ruta: str) -> str:
+    """FileDescription del recurso de versión de un ejecutable (por ejemplo, Bloc de notas)"""
+    if not ruta:
+        return ""
+    tamano = _GetFileVersionInfoSizeW(ruta, None)
+    if not tamano:
+        return ""
+    datos = ctypes.create_string_buffer(tamano)
+    if not _GetFileVersionInfoW(ruta, 0, tamano, datos):
+        return ""
+    
+    puntero = LPVOID()
+    longitud = UINT()
+    if not _VerQueryValueW(datos, r"\VarFileInfo\Translation", ctypes.byref(puntero), ctypes.byref(longitud)):
+        return ""
+    traducciones = ctypes.cast(puntero, ctypes.POINTER(ctypes.c_uint16))
+    # Primera traducción declarada y, si no tiene descripción, inglés de EE. UU. en Unicode
+    candidatas = []
+    if longitud.value >= 4:
+        candidatas.append(f"{traducciones[0]:04x}{traducciones[1]:04x}")
+    candidatas.append("040904b0")
+    
+    for codigo in candidatas:
+        if _VerQueryValueW(
+            datos, rf"\StringFileInfo\{codigo}\FileDescription", ctypes.byref(puntero), ctypes.byref(longitud)
+        ) and longitud.value > 1:
+            return ctypes.wstring_at(puntero, longitud.value - 1).strip()
+    return ""
+
+
+class CacheProcesos:
+    """Información de procesos por PID, descartada cuando el proceso termina"""
+    
+    def __init__(self, capacidad: int = 512):
+        self.capacidad = capacidad
+        self._procesos: Dict[int, Tuple[InfoProceso, int]] = {}
+        # PID → instante en que no se pudo abrir
+        self._fallidos: Dict[int, float] = {}
+        self._cerrojo = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._procesos)
+    
+    def obtener(self, pid: int) -> Optional[InfoProceso]:
+        """Información del proceso, abriéndolo solo si no se conoce o si terminó"""
+        if not pid:
+            return None
+        with self._cerrojo:
+            entrada = self._procesos.get(pid)
+            if entrada is not None:
+                info, handle = entrada
+                if _WaitForSingleObject(handle, 0) != WAIT_OBJECT_0:
+                    return info
+                # El proceso terminó: el PID puede pertenecer ya a otro programa
+                del self._procesos[pid]
+                _CloseHandle(handle)
+            fallo = self._fallidos.get(pid)
+            if fallo is not None and time.monotonic() - fallo < VIGENCIA_FALLO:
+                return None
+        
+        handle = _OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | SYNCHRONIZE, False, pid)
+        if not handle:
+            ahora = time.monotonic()
+            with self._cerrojo:
+                if len(self._fallidos) >= self.capacidad:
+                    self._fallidos = {p: t for p, t in self._fallidos.items() if ahora - t < VIGENCIA_FALLO}
+                self._fallidos[pid] = ahora
+            return None
+        ruta = _ruta_desde_handle(handle)
+        ejecutable = os.path.basename(ruta)
+        nombre = descripcion_archivo(ruta) or os.path.splitext(ejecutable)[0]
+        info = InfoProceso(pid, ruta, ejecutable, nombre)
+        
+        with self._cerrojo:
+            self._fallidos.pop(pid, None)
+            if len(self._procesos) >= self.capacidad:
+                self._podar()
+            anterior = self._procesos.pop(pid, None)
+            if anterior is not None:
+                _CloseHandle(anterior[1])
+            self._procesos[pid] = (info, handle)
+        return info
+    
+    def _podar(self):
+        """Descartar los procesos terminados y, si no basta, los más antiguos"""
+        for pid, (_info, handle) in list(self._procesos.items()):
+            if _WaitForSingleObject(handle, 0) == WAIT_OBJECT_0:
+                del self._procesos[pid]
+                _CloseHandle(handle)
+        while len(self._procesos) >= self.capacidad:
+            pid = next(iter(self._procesos))
+            _CloseHandle(self._procesos.pop(pid)[1])
+    
+    def cerrar(self):
+        """Cerrar todos los handles de proceso"""
+        with self._cerrojo:
+            for _info, handle in self._procesos.values():
+                _CloseHandle(handle)
+            self._procesos.clear()
+            self._fallidos.clear()
@@ -0,0 +1,177 @@
+"""
+Reglas de colocación automática de ventanas.
+Una regla indica una aplicación (AUMID o ejecutable), un patrón de título o ambos, y
+el escritorio al que va la ventana (o que debe anclarse). Las reglas se compilan en
+un diccionario por aplicación y una sola expresión regular para las reglas de título,
+de modo que evaluar una ventana nueva es una sola pasada de esa expresión en lugar de
+una búsqueda por regla. Los patrones que
+no se pueden unir a los demás (grupos, referencias o indicadores globales en línea) se
+evalúan aparte, uno a uno.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_ARCHIVO = 1
+NOMBRE_ARCHIVO = "reglas.json"
+
+# Destino que significa «anclar en todos los escritorios»
+ANCLAR = 0
+
+# Indicadores de todos los patrones de título, combinados o aparte, para que coincidan igual
+OPCIONES_TITULO = re.IGNORECASE | re.DOTALL
+
+
+class Regla(NamedTuple):
+    """Regla de colocación; los campos vacíos no se tienen en cuenta"""
+    # AUMID o nombre del ejecutable (sin distinguir mayúsculas)
+    aplicacion: str = ""
+    # Expresión regular buscada en el título (sin distinguir mayúsculas)
+    titulo: str = ""
+    # Número de escritorio (1-based) o ANCLAR
+    escritorio: int = ANCLAR
+
+
+def validar_regla(regla: Regla) -> Optional[str]:
+    """Motivo por el que la regla no es válida (None si lo es)"""
+    if not regla.aplicacion.strip() and not regla.titulo:
+        return "La regla necesita una aplicación o un patrón de título"
+    if regla.escritorio < 0:
+        return "El escritorio debe ser un número positivo"
+    if regla.titulo:
+        try:
+            re.compile(regla.titulo)
+        except re.error as e:
+            return f"Patrón de título no válido: {e}"
+    return None
+
+
+def _combinable(patron: str) -> bool:
+    """Indica si un patrón se puede unir a los demás en una sola expresión regular"""
+    try:
+        # Sin grupos no hay nombres repetidos ni referencias que cambien de número
+        return re.compile(f"(?:{patron})").groups == 0
+    except re.error:
+        # Por ejemplo, indicadores globales en línea como (?i) fuera del inicio
+        return False
+
+
+class MotorReglas:
+    """Reglas compiladas para evaluar ventanas nuevas con una sola pasada de expresión regular"""
+    
+    def __init__(self, reglas: Optional[List[Regla]] = None):
+        self.reglas: List[Regla] = []
+        # Veces que se aplicó cada regla (misma posición que en reglas)
+        self.aciertos: List[int] = []
+        self._por_aplicacion: Dict[str, List[Tuple[int, Optional[Pattern]]]] = {}
+        self._titulos: Optional[Pattern] = None
+        # Reglas de título evaluadas una a una, en orden
+        self._titulos_aparte: List[Tuple[int, Pattern]] = []
+        self.establecer(reglas or [])
+    
+    def __len__(self) -> int:
+        return len(self.reglas)
+    
+    def establecer(self, reglas: List[Regla]):
+        """Sustituir las reglas y compilarlas (las no válidas se descartan)"""
+        self.reglas = []
+        for regla in reglas:
+            motivo = validar_regla(regla)
+            if motivo:
+                logger.warning(f"Regla descartada {regla}: {motivo}")
+                continue
+            self.reglas.append(regla)
+        self.aciertos = [0] * len(self.reglas)
+        
+        self._por_aplicacion = {}
+        self._titulos_aparte = []
+        alternativas = []
+        for i, regla in enumerate(self.reglas):
+            if regla.aplicacion.strip():
+                patron = re.compile(regla.titulo, OPCIONES_TITULO) if regla.titulo else None
+                self._por_aplicacion.setdefault(regla.aplicacion.strip().casefold(), []).append((i, patron))
+            elif _combinable(regla.titulo):
+                # Cada alternativa es una búsqueda anticipada desde el inicio: gana la primera regla que coincide
+                alternativas.append(f"(?P<r{i}>(?=.*?(?:{regla.titulo})))")
+            else:
+                self._titulos_aparte.append((i, re.compile(regla.titulo, OPCIONES_TITULO)))
+        self._titulos = None
+        if alternativas:
+            try:
+                self._titulos = re.compile("^(?:" + "|".join(alternativas) + ")", OPCIONES_TITULO)
+            except re.error as e:
+                # No debería ocurrir con patrones combinables; por si acaso, se evalúan todos aparte
+                logger.warning(f"No se pudieron combinar las reglas de título: {e}")
+                self._titulos_aparte = sorted(self._titulos_aparte + [
+                    (i, re.compile(regla.titulo, OPCIONES_TITULO))
+                    for i, regla in enumerate(self.reglas)
+                    if not regla.aplicacion.strip() and _combinable(regla.titulo)
+                ])
+    
+    def evaluar(self, titulo: str, *aplicaciones: str) -> Optional[Regla]:
+        """
+        Primera regla que corresponde a la ventana. Se indican sus identificadores de
+        aplicación (AUMID, ejecutable); las reglas de aplicación tienen prioridad.
+        """
+        for aplicacion in aplicaciones:
+            if not aplicacion:
+                continue
+            for i, patron in self._por_aplicacion.get(aplicacion.casefold(), ()):
+                if patron is None or patron.search(titulo):
+                    return self._acertar(i)
+        primera = None
+        if self._titulos is not None:
+            coincidencia = self._titulos.match(titulo)
+            if coincidencia:
+                primera = int(coincidencia.lastgroup[1:])
+        # Las reglas aparte solo importan si van antes que la combinada que coincidió
+        for i, patron in self._titulos_aparte:
+            if primera is not None and i > primera:
+                break
+            if patron.search(titulo):
+                return self._acertar(i)
+        if primera is not None:
+            return self._acertar(primera)
+        return None
+    
+    def _acertar(self, i: int) -> Regla:
+        self.aciertos[i] += 1
+        return self.reglas[i]
+    
+    def estadisticas(self) -> List[Tuple[Regla, int]]:
+        """Cada regla con las veces que se aplicó en esta sesión"""
+        return list(zip(self.reglas, self.aciertos))
+
+
+def cargar_reglas(directorio: Optional[str]) -> List[Regla]:
+    """Reglas guardadas en el directorio de datos (lista vacía si no hay)"""
+    if not directorio:
+        return []
+    try:
+        with open(os.path.join(directorio, NOMBRE_ARCHIVO), "r", encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+    except (OSError, ValueError):
+        return []
+    if datos.get("version") != VERSION_ARCHIVO:
+        return []
+    reglas = []
+    for entrada in datos.get("reglas", []):
+        try:
+            reglas.append(Regla(str(entrada[0]), str(entrada[1]), int(entrada[2])))
+        except (IndexError, TypeError, ValueError):
+            logger.debug(f"Regla ilegible: {entrada!r}")
+    return reglas
+
+
+def guardar_reglas(directorio: str, reglas: List[Regla]):
+    """Escribir las reglas en el directorio de datos (escritura atómica)"""
+    ruta = os.path.join(directorio, NOMBRE_ARCHIVO)
+    os.makedirs(directorio, exist_ok=True)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump({"version": VERSION_ARCHIVO, "reglas": [list(regla) for regla in reglas]}, archivo, ensure_ascii=False)
+    os.replace(ruta + ".tmp", ruta)
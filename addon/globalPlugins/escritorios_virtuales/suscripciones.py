@@ -0,0 +1,225 @@
+"""
+Suscripción a cambios de escritorios y ventanas.
+Los eventos se publican desde el hilo del vigilante del shell o desde el hilo principal
+y cada suscriptor los recibe en su propio hilo. La cola de cada suscriptor está acotada
+y combina los eventos pendientes equivalentes, de modo que un oyente lento nunca
+detiene al hilo que publica ni a los demás oyentes.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, NamedTuple, Optional, Tuple, Type, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Eventos pendientes por suscriptor antes de descartar los más antiguos
+CAPACIDAD_COLA = 256
+
+
+class EscritorioCambiado(NamedTuple):
+    """Cambio de escritorio actual (propio si lo hizo el gestor y no Windows u otro programa)"""
+    anterior: str
+    actual: str
+    propio: bool = False
+
+
+class EscritorioCreado(NamedTuple):
+    """Escritorio nuevo"""
+    id: str
+
+
+class EscritorioEliminado(NamedTuple):
+    """Escritorio eliminado"""
+    id: str
+
+
+class EscritorioRenombrado(NamedTuple):
+    """Nombre nuevo de un escritorio ("" si vuelve al predeterminado)"""
+    id: str
+    nombre: str
+
+
+class VentanaMovida(NamedTuple):
+    """Ventana que pasa a otro escritorio (origen "" si no se conocía)"""
+    hwnd: int
+    origen: str
+    destino: str
+
+
+class VentanaAnclada(NamedTuple):
+    """Ventana anclada en todos los escritorios o desanclada"""
+    hwnd: int
+    anclada: bool
+
+
+Evento = Union[
+    EscritorioCambiado, EscritorioCreado, EscritorioEliminado,
+    EscritorioRenombrado, VentanaMovida, VentanaAnclada,
+]
+
+TIPOS_EVENTO: Tuple[Type, ...] = (
+    EscritorioCambiado, EscritorioCreado, EscritorioEliminado,
+    EscritorioRenombrado, VentanaMovida, VentanaAnclada,
+)
+
+
+def clave_combinacion(evento: Evento) -> Hashable:
+    """Clave de los eventos que se combinan en la cola: del mismo tipo y sobre el mismo objeto"""
+    if isinstance(evento, EscritorioCambiado):
+        # Solo importa a qué escritorio se llegó
+        return (EscritorioCambiado,)
+    return (type(evento), evento[0])
+
+
+def combinar(previo: Evento, nuevo: Evento) -> Optional[Evento]:
+    """Evento que resume dos equivalentes, o None si se anulan (por ejemplo, ir y volver)"""
+    if isinstance(nuevo, EscritorioCambiado):
+        nuevo = EscritorioCambiado(previo.anterior, nuevo.actual, previo.propio and nuevo.propio)
+        return nuevo if nuevo.anterior != nuevo.actual else None
+    if isinstance(nuevo, VentanaMovida):
+        nuevo = VentanaMovida(nuevo.hwnd, previo.origen, nuevo.destino)
+        return nuevo if nuevo.origen != nuevo.destino else None
+    if isinstance(nuevo, VentanaAnclada) and nuevo.anclada != previo.anclada:
+        return None
+    return nuevo
+
+
+class Suscripcion:
+    """Oyente con su cola acotada y su hilo de entrega"""
+    
+    def __init__(
+        self,
+        bus: 'BusEventos',
+        al_recibir: Callable[[Evento], None],
+        tipos: Optional[Iterable[Type]] = None,
+        capacidad: int = CAPACIDAD_COLA,
+    ):
+        self._bus = bus
+        self._al_recibir = al_recibir
+        self.tipos = frozenset(tipos) if tipos is not None else None
+        self.capacidad = max(1, capacidad)
+        self._cola: "OrderedDict[Hashable, Evento]" = OrderedDict()
+        self._condicion = threading.Condition()
+        self._activa = True
+        # Eventos entregados, combinados con otro pendiente y descartados por cola llena
+        self.entregados = 0
+        self.combinados = 0
+        self.descartados = 0
+        self._hilo = threading.Thread(target=self._entregar, name="EscritoriosVirtualesSuscripcion", daemon=True)
+        self._hilo.start()
+    
+    @property
+    def activa(self) -> bool:
+        return self._activa
+    
+    def __len__(self) -> int:
+        """Eventos pendientes de entregar"""
+        return len(self._cola)
+    
+    def acepta(self, evento: Evento) -> bool:
+        return self.tipos is None or type(evento) in self.tipos
+    
+    def encolar(self, evento: Evento):
+        """Añadir un evento sin bloquear: se combina con uno pendiente o desplaza al más antiguo"""
+        with self._condicion:
+            if not self._activa:
+                return
+            clave = clave_combinacion(evento)
+            previo = self._cola.get(clave)
+            if previo is not None:
+                self.combinados += 1
+                combinado = combinar(previo, evento)
+                if combinado is None:
+                    del self._cola[clave]
+                else:
+                    # Conserva su posición en la cola
+                    self._cola[clave] = combinado
+                return
+            if len(self._cola) >= self.capacidad:
+                self._cola.popitem(last=False)
+                self.descartados += 1
+            self._cola[clave] = evento
+            self._condicion.notify()
+    
+    def _entregar(self):
+        while True:
+            with self._condicion:
+                while self._activa and not self._cola:
+                    self._condicion.wait()
+                if not self._activa:
+                    return
+                _clave, evento = self._cola.popitem(last=False)
+            try:
+                self._al_recibir(evento)
+            except Exception as e:
+                logger.error(f"Error en un suscriptor al procesar {evento}: {e}")
+            self.entregados += 1
+    
+    def _detener(self):
+        with self._condicion:
+            self._activa = False
+            self._cola.clear()
+            self._condicion.notify_all()
+    
+    def cancelar(self):
+        """Dejar de recibir eventos (los pendientes se descartan)"""
+        self._bus.cancelar(self)
+    
+    def __repr__(self):
+        return (
+            f"Suscripcion(pendientes={len(self._cola)}, entregados={self.entregados}, "
+            f"combinados={self.combinados}, descartados={self.descartados})"
+        )
+
+
+class BusEventos:
+    """
+    Publicación de eventos a los suscriptores del mismo proceso, sin sondeo.
+    Los oyentes se ejecutan en un hilo propio de cada suscripción: para tocar la
+    interfaz de NVDA deben pasar por wx.CallAfter.
+    """
+    
+    def __init__(self):
+        # Tupla inmutable: publicar la recorre sin tomar el cerrojo
+        self._suscripciones: Tuple[Suscripcion, ...] = ()
+        self._cerrojo = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._suscripciones)
+    
+    def suscribir(
+        self,
+        al_recibir: Callable[[Evento], None],
+        tipos: Optional[Iterable[Type]] = None,
+        capacidad: int = CAPACIDAD_COLA,
+    ) -> Suscripcion:
+        """Registrar un oyente para todos los eventos o solo para los tipos indicados"""
+        if tipos is not None:
+            tipos = tuple(tipos)
+            desconocidos = [tipo for tipo in tipos if tipo not in TIPOS_EVENTO]
+            if desconocidos:
+                raise ValueError(f"Tipos de evento desconocidos: {desconocidos}")
+        suscripcion = Suscripcion(self, al_recibir, tipos, capacidad)
+        with self._cerrojo:
+            self._suscripciones = self._suscripciones + (suscripcion,)
+        return suscripcion
+    
+    def cancelar(self, suscripcion: Suscripcion):
+        """Quitar un oyente y detener su hilo"""
+        with self._cerrojo:
+            self._suscripciones = tuple(s for s in self._suscripciones if s is not suscripcion)
+        suscripcion._detener()
+    
+    def publicar(self, evento: Evento):
+        """Entregar un evento a las colas de los suscriptores interesados (no bloquea)"""
+        for suscripcion in self._suscripciones:
+            if suscripcion.acepta(evento):
+                suscripcion.encolar(evento)
+    
+    def cerrar(self):
+        """Cancelar todas las suscripciones"""
+        with self._cerrojo:
+            suscripciones, self._suscripciones = self._suscripciones, ()
+        for suscripcion in suscripciones:
+            suscripcion._detener()
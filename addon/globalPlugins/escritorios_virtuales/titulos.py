@@ -0,0 +1,150 @@
+"""
+Obtención de títulos de ventana protegida contra aplicaciones colgadas.
+GetWindowTextW puede enviar mensajes a la ventana y bloquearse si la aplicación
+no responde; aquí se usa SendMessageTimeoutW con un límite de tiempo y, para las
+ventanas marcadas como colgadas, InternalGetWindowText (que no envía mensajes).
+Los títulos se guardan en una caché acotada; sin eventos de ventana que la invaliden,
+cada título caduca a los pocos segundos.
+"""
+
+import ctypes
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ctypes.wintypes import BOOL, HWND, INT, LPARAM, LPWSTR, UINT, WPARAM
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+from .cache import CacheLRU
+
+logger = logging.getLogger(__name__)
+
+WM_GETTEXT = 0x000D
+WM_GETTEXTLENGTH = 0x000E
+SMTO_BLOCK = 0x0001
+SMTO_ABORTIFHUNG = 0x0002
+
+# Longitud máxima de título que se lee
+LONGITUD_MAXIMA = 1024
+
+# Segundos que vale un título si no hay eventos de cambio de nombre (basta para un listado)
+VIGENCIA_SIN_EVENTOS = 2.0
+
+user32 = ctypes.windll.user32
+
+_SendMessageTimeoutW = ctypes.WINFUNCTYPE(
+    LPARAM, HWND, UINT, WPARAM, LPARAM, UINT, UINT, ctypes.POINTER(ctypes.c_size_t)
+)(("SendMessageTimeoutW", user32))
+_IsHungAppWindow = ctypes.WINFUNCTYPE(BOOL, HWND)(("IsHungAppWindow", user32))
+_IsWindow = ctypes.WINFUNCTYPE(BOOL, HWND)(("IsWindow", user32))
+_InternalGetWindowText = ctypes.WINFUNCTYPE(INT, HWND, LPWSTR, INT)(("InternalGetWindowText", user32))
+
+
+def _titulo_sin_mensajes(hwnd: int) -> str:
+    """Leer el título guardado por el sistema sin enviar mensajes a la ventana"""
+    buffer = ctypes.create_unicode_buffer(LONGITUD_MAXIMA)
+    _InternalGetWindowText(hwnd, buffer, LONGITUD_MAXIMA)
+    return buffer.value
+
+
+def leer_titulo(hwnd: int, tiempo_espera_ms: int = 200) -> str:
+    """Obtener el título de una ventana sin quedar bloqueado por aplicaciones colgadas"""
+    if not hwnd or not _IsWindow(hwnd):
+        return ""
+    if _IsHungAppWindow(hwnd):
+        return _titulo_sin_mensajes(hwnd)
+    
+    flags = SMTO_BLOCK | SMTO_ABORTIFHUNG
+    longitud = ctypes.c_size_t()
+    if not _SendMessageTimeoutW(hwnd, WM_GETTEXTLENGTH, 0, 0, flags, tiempo_espera_ms, ctypes.byref(longitud)):
+        # Tiempo agotado o ventana colgada
+        return _titulo_sin_mensajes(hwnd)
+    if not longitud.value:
+        return ""
+    
+    tamano = min(longitud.value, LONGITUD_MAXIMA) + 1
+    buffer = ctypes.create_unicode_buffer(tamano)
+    copiados = ctypes.c_size_t()
+    if not _SendMessageTimeoutW(
+        hwnd, WM_GETTEXT, tamano, ctypes.addressof(buffer), flags, tiempo_espera_ms, ctypes.byref(copiados)
+    ):
+        return _titulo_sin_mensajes(hwnd)
+    return buffer.value
+
+
+class CacheTitulos:
+    """Caché acotada de títulos por hwnd con resolución por lotes en paralelo"""
+    
+    def __init__(self, tiempo_espera_ms: int = 200, max_hilos: int = 4, capacidad: int = 1024):
+        self.tiempo_espera_ms = tiempo_espera_ms
+        self._max_hilos = max_hilos
+        # Segundos que vale cada título; None mientras los eventos de ventana lo mantienen al día
+        self.vigencia: Optional[float] = VIGENCIA_SIN_EVENTOS
+        # hwnd → (título, instante de lectura)
+        self._titulos = CacheLRU(capacidad)
+        self._cerrojo = threading.Lock()
+        self._ejecutor: Optional[ThreadPoolExecutor] = None
+    
+    def __len__(self) -> int:
+        return len(self._titulos)
+    
+    def _vigente(self, hwnd: int, ahora: float) -> Optional[str]:
+        """Título guardado si sigue valiendo (se llama con el cerrojo tomado)"""
+        entrada: Optional[Tuple[str, float]] = self._titulos.obtener(hwnd)
+        if entrada is None:
+            return None
+        if self.vigencia is not None and ahora - entrada[1] >= self.vigencia:
+            return None
+        return entrada[0]
+    
+    def obtener(self, hwnd: int) -> str:
+        """Título de la ventana desde la caché o leyéndolo si no se conoce o caducó"""
+        with self._cerrojo:
+            titulo = self._vigente(hwnd, time.monotonic())
+        if titulo is None:
+            titulo = leer_titulo(hwnd, self.tiempo_espera_ms)
+            with self._cerrojo:
+                self._titulos.poner(hwnd, (titulo, time.monotonic()))
+        return titulo
+    
+    def resolver_lote(self, hwnds: Iterable[int]) -> Dict[int, str]:
+        """Resolver en paralelo los títulos que falten de un lote de ventanas"""
+        hwnds = list(dict.fromkeys(hwnds))
+        ahora = time.monotonic()
+        with self._cerrojo:
+            resueltos = {hwnd: self._vigente(hwnd, ahora) for hwnd in hwnds}
+        pendientes = [hwnd for hwnd, titulo in resueltos.items() if titulo is None]
+        if len(pendientes) == 1:
+            resueltos[pendientes[0]] = self.obtener(pendientes[0])
+        elif pendientes:
+            if self._ejecutor is None:
+                self._ejecutor = ThreadPoolExecutor(max_workers=self._max_hilos, thread_name_prefix="TitulosVentanas")
+            titulos = list(self._ejecutor.map(lambda hwnd: leer_titulo(hwnd, self.tiempo_espera_ms), pendientes))
+            ahora = time.monotonic()
+            with self._cerrojo:
+                for hwnd, titulo in zip(pendientes, titulos):
+                    self._titulos.poner(hwnd, (titulo, ahora))
+            resueltos.update(zip(pendientes, titulos))
+        return resueltos
+    
+    def invalidar(self, hwnd: int):
+        """Descartar el título guardado (por ejemplo, tras un cambio de nombre)"""
+        with self._cerrojo:
+            self._titulos.quitar(hwnd)
+    
+    def podar(self, hwnds_vivos: Iterable[int]):
+        """Descartar los títulos de las ventanas que ya no aparecen en la enumeración"""
+        vivos = set(hwnds_vivos)
+        with self._cerrojo:
+            self._titulos.conservar(vivos)
+    
+    def limpiar(self):
+        """Descartar todos los títulos guardados"""
+        with self._cerrojo:
+            self._titulos.limpiar()
+    
+    def cerrar(self):
+        """Liberar los hilos del grupo de resolución"""
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown(wait=False)
+            self._ejecutor = None
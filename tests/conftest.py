@@ -0,0 +1,6 @@
+"""Configuración común de las pruebas: el paquete se importa desde addon/globalPlugins"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "addon", "globalPlugins"))
@@ -0,0 +1,30 @@
+"""Pruebas de la caché LRU que acota las consultas por hwnd (Python puro)"""
+
+import unittest
+
+from escritorios_virtuales.cache import CacheLRU
+
+
+class PruebasCacheLRU(unittest.TestCase):
+
+	def test_descarta_la_menos_usada(self):
+		cache = CacheLRU(2)
+		cache.poner(1, "a")
+		cache.poner(2, "b")
+		cache.obtener(1)
+		cache.poner(3, "c")
+		self.assertEqual(len(cache), 2)
+		self.assertNotIn(2, cache)
+		self.assertEqual(cache.obtener(1), "a")
+
+	def test_conservar_descarta_las_claves_que_no_siguen(self):
+		cache = CacheLRU()
+		for hwnd in (10, 20, 30):
+			cache.poner(hwnd, str(hwnd))
+		cache.conservar([20, 40])
+		self.assertEqual(len(cache), 1)
+		self.assertEqual(cache.obtener(20), "20")
+
+
+if __name__ == "__main__":
+	unittest.main()
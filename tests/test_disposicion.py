@@ -0,0 +1,61 @@
+"""Pruebas del emparejamiento de ventanas al restaurar la disposición (Python puro)"""
+
+import os
+import tempfile
+import unittest
+
+from escritorios_virtuales.disposicion import (
+	Disposicion,
+	Emparejador,
+	VentanaDisposicion,
+	patron_titulo,
+)
+
+
+class PruebasEmparejador(unittest.TestCase):
+
+	def test_coincidencia_exacta_antes_que_por_aplicacion(self):
+		emparejador = Emparejador([VentanaDisposicion("chrome", "a", 1), VentanaDisposicion("chrome", "b", 2)])
+		self.assertEqual(emparejador.asignar([("chrome", "c"), ("chrome", "a")]), [2, 1])
+
+	def test_cada_ventana_guardada_se_usa_una_vez(self):
+		emparejador = Emparejador([VentanaDisposicion("notepad.exe", patron_titulo("Nota 1"), 3)])
+		self.assertEqual(emparejador.asignar([("notepad.exe", "Nota 2"), ("notepad.exe", "Nota 7")]), [3, None])
+
+	def test_aplicacion_desconocida(self):
+		emparejador = Emparejador([VentanaDisposicion("chrome", "a", 1)])
+		self.assertEqual(emparejador.asignar([("word", "a")]), [None])
+
+
+class PruebasArchivoDisposicion(unittest.TestCase):
+
+	def test_ida_y_vuelta(self):
+		disposicion = Disposicion(["Trabajo", ""], [VentanaDisposicion("chrome", "a", 2), VentanaDisposicion("word", "b", 0)])
+		leida = Disposicion.desde_datos(disposicion.a_datos())
+		self.assertEqual((leida.nombres, leida.ventanas), (disposicion.nombres, disposicion.ventanas))
+
+	def test_datos_mal_formados_son_value_error(self):
+		for datos in (
+			[],
+			{"version": 1, "aplicaciones": ["chrome"], "ventanas": [[3, "a", 1]]},
+			{"version": 1, "aplicaciones": ["chrome"], "ventanas": [[0, "a"]]},
+			{"version": 1, "aplicaciones": ["chrome"], "ventanas": [[0, None, 1]]},
+			{"version": 1, "escritorios": "ab"},
+			{"version": 1, "ventanas": {"a": 1}},
+		):
+			with self.subTest(datos=datos), self.assertRaises(ValueError):
+				Disposicion.desde_datos(datos)
+
+	def test_guardar_con_nombre_de_archivo_sin_directorio(self):
+		anterior = os.getcwd()
+		with tempfile.TemporaryDirectory() as directorio:
+			os.chdir(directorio)
+			try:
+				Disposicion(["a"], []).guardar("disposicion.json")
+				self.assertEqual(Disposicion.cargar("disposicion.json").nombres, ["a"])
+			finally:
+				os.chdir(anterior)
+
+
+if __name__ == "__main__":
+	unittest.main()
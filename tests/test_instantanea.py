@@ -0,0 +1,21 @@
+"""Pruebas de las instantáneas de escritorios (Python puro, no requiere Windows)"""
+
+import unittest
+from types import SimpleNamespace
+
+from escritorios_virtuales.instantanea import EscritorioInstantanea, Instantanea
+
+
+class PruebasInstantanea(unittest.TestCase):
+
+	def test_destinos_con_nombre_personalizado_o_vacio(self):
+		escritorios = [
+			EscritorioInstantanea(SimpleNamespace(id="a"), 1, "Trabajo"),
+			EscritorioInstantanea(SimpleNamespace(id="b"), 2),
+		]
+		instantanea = Instantanea(escritorios, "a")
+		self.assertEqual(instantanea.destinos(), [(1, "Trabajo"), (2, "")])
+
+
+if __name__ == "__main__":
+	unittest.main()
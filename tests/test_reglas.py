@@ -0,0 +1,65 @@
+"""Pruebas del motor de reglas de colocación (Python puro, no requiere Windows)"""
+
+import unittest
+
+from escritorios_virtuales.reglas import ANCLAR, MotorReglas, Regla, validar_regla
+
+
+class PruebasMotorReglas(unittest.TestCase):
+
+	def test_regla_de_aplicacion_tiene_prioridad(self):
+		motor = MotorReglas([Regla("", "informe", 2), Regla("notepad.exe", "", 3)])
+		self.assertEqual(motor.evaluar("Informe - Bloc de notas", "", "NOTEPAD.EXE").escritorio, 3)
+		self.assertEqual(motor.evaluar("Informe - Word", "", "winword.exe").escritorio, 2)
+
+	def test_mismos_indicadores_en_todos_los_caminos(self):
+		titulo = "Informe\nfinal"
+		# Combinada, aparte (con grupo) y de aplicación
+		for regla in (Regla("", "informe.final", 2), Regla("", "(informe).final", 2), Regla("word", "informe.final", 2)):
+			with self.subTest(regla=regla):
+				self.assertIsNotNone(MotorReglas([regla]).evaluar(titulo, "word"))
+
+	def test_gana_la_primera_regla_de_titulo(self):
+		motor = MotorReglas([Regla("", "reunión", ANCLAR), Regla("", "reu", 4)])
+		self.assertEqual(motor.evaluar("Reunión semanal").escritorio, ANCLAR)
+		self.assertEqual(motor.evaluar("reunir").escritorio, 4)
+		self.assertIsNone(motor.evaluar("otra cosa"))
+
+	def test_indicadores_globales_en_linea(self):
+		motor = MotorReglas([Regla("", "(?i)foo", 1), Regla("", "bar", 2)])
+		self.assertEqual(len(motor), 2)
+		self.assertEqual(motor.evaluar("xFOOx").escritorio, 1)
+		self.assertEqual(motor.evaluar("bar").escritorio, 2)
+
+	def test_mismo_grupo_con_nombre_en_dos_reglas(self):
+		motor = MotorReglas([Regla("", "(?P<x>uno)", 1), Regla("", "(?P<x>dos)", 2)])
+		self.assertEqual(motor.evaluar("dos").escritorio, 2)
+		self.assertEqual(motor.evaluar("uno").escritorio, 1)
+
+	def test_referencia_a_grupo(self):
+		motor = MotorReglas([Regla("", "zz", 3), Regla("", r"(a)\1", 1)])
+		self.assertEqual(motor.evaluar("xaax").escritorio, 1)
+		self.assertIsNone(motor.evaluar("xax"))
+		self.assertEqual(motor.evaluar("aa zz").escritorio, 3)
+
+	def test_orden_entre_reglas_combinadas_y_aparte(self):
+		motor = MotorReglas([Regla("", "(?i)correo", 1), Regla("", "correo", 2), Regla("", r"(x)\1", 3)])
+		self.assertEqual(motor.evaluar("Correo").escritorio, 1)
+		self.assertEqual(motor.evaluar("xx").escritorio, 3)
+
+	def test_reglas_no_validas_se_descartan(self):
+		self.assertIsNotNone(validar_regla(Regla("", "(", 1)))
+		self.assertIsNotNone(validar_regla(Regla("", "", 1)))
+		motor = MotorReglas([Regla("", "(", 1), Regla("", "ok", 2)])
+		self.assertEqual(len(motor), 1)
+		self.assertEqual(motor.evaluar("ok").escritorio, 2)
+
+	def test_aciertos(self):
+		motor = MotorReglas([Regla("", "a", 1)])
+		motor.evaluar("a")
+		motor.evaluar("b")
+		self.assertEqual(motor.estadisticas(), [(Regla("", "a", 1), 1)])
+
+
+if __name__ == "__main__":
+	unittest.main()